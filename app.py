@@ -1,89 +1,670 @@
+import functools
+import os
+import threading
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import psycopg2
-import os
 from dotenv import load_dotenv
+from queries import QUERIES, MAP_BIN_SIZES, MONEY_SCALE, get_pool, fetch_query, fetch_concurrently
+import cube
+import perf
+import prefetch
 
 load_dotenv()
 
-# db connection
-def connect_to_database():
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST"),
-            database=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            port=os.getenv("DB_PORT", "5432"),
-        )
-        return conn
-    except Exception as e:
-        st.error(f"Database connection error: {e}")
-        return None
+# Line and area charts plotting more points than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_POINT_THRESHOLD = int(os.getenv("WEBGL_POINT_THRESHOLD", "1000"))
+
+# Scatter charts with more rows than this are drawn as a 2-d binned density instead of markers
+SCATTER_WEBGL_MAX_POINTS = int(os.getenv("SCATTER_WEBGL_MAX_POINTS", "1000000"))
+DENSITY_BINS = 200
+
+# States kept by the per-state charts' "States shown" control, the rest are summed into "Other"
+TOP_K_OPTIONS = [5, 10, 15, 20, "All"]
+
+def to_rupees(df, query_name):
+    # Amounts may be stored as integer paise (MONEY_AS_PAISE), they are only scaled to rupees for display
+    if MONEY_SCALE != 1:
+        for column in QUERIES[query_name].get("money_columns", []):
+            if df[column].dtype == object:  # e.g. box plot outlier lists
+                df[column] = df[column].apply(lambda values: [v / MONEY_SCALE for v in values])
+            else:
+                df[column] = df[column] / MONEY_SCALE
+    return df
 
 # get metrics of data
 def get_metrics():
-    conn = connect_to_database()
-    if conn is None:
-        return None, None, None, None
-    
     try:
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT SUM(Transaction_count) FROM agg_transaction")
-        total_transactions = cursor.fetchone()[0] or 0
-        
-        cursor.execute("SELECT SUM(Registered_Users) FROM agg_user")
-        total_users = cursor.fetchone()[0] or 0
-        
-        cursor.execute("SELECT SUM(Insurance_count) FROM agg_insurance")
-        total_insurance = cursor.fetchone()[0] or 0
-        
-        cursor.execute("SELECT SUM(Transaction_amount) FROM agg_transaction")
-        total_amount = cursor.fetchone()[0] or 0
-        
-        conn.close()
-        
-        return total_transactions, total_users, total_insurance, total_amount
-        
+        metrics = load_home_query("home_metrics").fillna(0).iloc[0]
+        return (
+            int(metrics['Total_Transactions']),
+            int(metrics['Total_Users']),
+            int(metrics['Total_Insurance']),
+            metrics['Total_Amount'],
+        )
     except Exception as e:
         st.error(f"Error fetching metrics: {e}")
-        conn.close()
         return None, None, None, None
 
-st.set_page_config(
-    page_title="PhonePe Dashboard",
-    page_icon="📱",
-    layout="wide"
+# Conic projection and extent shared by the India maps
+INDIA_GEO = dict(
+    projection=dict(
+        type='conic conformal',
+        parallels=[12.472944444, 35.172805555556],
+        rotation={'lat': 24, 'lon': 80}
+    ),
+    lonaxis={'range': [68, 98]},
+    lataxis={'range': [6, 38]}
 )
 
-st.title("PhonePe Transaction Insights Dashboard")
+########################## Analysis Charts ##########################
 
-st.sidebar.title("Navigation")
+# Each builder takes the DataFrame of its query and returns the Plotly figure; period-series builders
+# take a cube.period_series slice instead (periods x series array plus labels), totals builders a
+# cube.totals ranking (labels, values and their shares of the total)
 
-page_option = st.sidebar.selectbox(
-    "Choose Page:",
-    ["🏠 Home", "📊 Analysis"]
-)
+def box_stats_chart(df, title, yaxis_title, series_order=None):
+    # Boxes are drawn from quartiles/whiskers computed in SQL (queries.box_stats_sql)
+    if series_order:
+        df = df.set_index('Series').loc[series_order].reset_index()
+    fig = go.Figure()
+    for _, row in df.iterrows():
+        fig.add_trace(go.Box(
+            name=row['Series'],
+            x=[row['Series']],
+            q1=[row['Q1']],
+            median=[row['Median']],
+            q3=[row['Q3']],
+            lowerfence=[row['Lower_Fence']],
+            upperfence=[row['Upper_Fence']],
+            mean=[row['Mean']],
+            boxpoints=False,
+        ))
+        if row['Outliers']:
+            fig.add_trace(go.Scatter(
+                x=[row['Series']] * len(row['Outliers']),
+                y=row['Outliers'],
+                mode='markers',
+                name=f"{row['Series']} outliers",
+                showlegend=False,
+            ))
+    fig.update_layout(title=title, yaxis_title=yaxis_title)
+    return fig
 
+def histogram_chart(df, title, xaxis_title, yaxis_title):
+    # Bins and counts come from queries.histogram_sql, only the bin vector is shipped
+    if df['Log_Scale'].iloc[0]:
+        # Log-width bins don't line up on a linear axis, label each bin with its range instead
+        x = [f"{start:,.0f} – {end:,.0f}" for start, end in zip(df['Bin_Start'], df['Bin_End'])]
+        fig = go.Figure(go.Bar(x=x, y=df['Count'], opacity=0.7))
+    else:
+        fig = go.Figure(go.Bar(
+            x=(df['Bin_Start'] + df['Bin_End']) / 2,
+            y=df['Count'],
+            width=df['Bin_End'] - df['Bin_Start'],
+            opacity=0.7,
+        ))
+    fig.update_layout(title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title, bargap=0)
+    return fig
 
-if page_option == "🏠 Home":
-    st.session_state.page = "home"
-elif page_option == "📊 Analysis":
-    st.session_state.page = "analysis"
+def stacked_area_chart(series, title, yaxis_title, legend_title):
+    # One stacked trace per column of the slice, no long-format frame for Plotly to pivot
+    values = series['values']
+    fig = go.Figure()
+    if values.size > WEBGL_POINT_THRESHOLD:
+        # Scattergl has no stackgroup: stack the columns here and fill each band down to the one below
+        stacked = values.cumsum(axis=1)
+        for i, label in enumerate(series['series']):
+            fig.add_trace(go.Scattergl(x=series['periods'], y=stacked[:, i], name=label, mode='lines',
+                                       fill='tozeroy' if i == 0 else 'tonexty', customdata=values[:, i],
+                                       hovertemplate="%{x}: %{customdata:,.0f}"))
+    else:
+        for i, label in enumerate(series['series']):
+            fig.add_trace(go.Scatter(x=series['periods'], y=values[:, i], name=label,
+                                     mode='lines', stackgroup='one'))
+    fig.update_layout(title=title, xaxis_title="Year-Quarter", yaxis_title=yaxis_title,
+                      legend_title_text=legend_title)
+    return fig
 
+def share_pie_chart(totals, title):
+    # Slices are labelled with the cube's shares rather than percentages Plotly works out again
+    fig = go.Figure(go.Pie(labels=totals['labels'], values=totals['values'], hole=0.4,
+                           text=[f"{share:.1f}%" for share in totals['shares']], textinfo='text',
+                           hovertemplate="%{label}: %{value:,.0f} (%{text})<extra></extra>"))
+    fig.update_layout(title=title)
+    return fig
 
-if "page" not in st.session_state:
-    st.session_state.page = "home"
+def state_totals_chart(totals, title, yaxis_title):
+    fig = go.Figure(go.Bar(x=totals['labels'], y=totals['values'], customdata=totals['shares'],
+                           hovertemplate="%{x}: %{y:,.0f} (%{customdata:.1f}% of all states)<extra></extra>"))
+    fig.update_layout(title=title, xaxis_title="State", yaxis_title=yaxis_title)
+    fig.update_xaxes(tickangle=45)
+    return fig
 
+def amount_count_chart(df, title, xaxis_title, yaxis_title):
+    # Markers (WebGL above WEBGL_POINT_THRESHOLD) up to SCATTER_WEBGL_MAX_POINTS rows, then a density
+    # heatmap binned here with NumPy, so the browser gets DENSITY_BINS² cells instead of every row
+    if len(df) > SCATTER_WEBGL_MAX_POINTS:
+        counts, x_edges, y_edges = np.histogram2d(df['Count'], df['Amount'], bins=DENSITY_BINS)
+        fig = go.Figure(go.Heatmap(
+            x=(x_edges[:-1] + x_edges[1:]) / 2,
+            y=(y_edges[:-1] + y_edges[1:]) / 2,
+            # Log colour scale, empty cells stay transparent
+            z=np.where(counts > 0, np.log10(np.maximum(counts, 1)).round(2), np.nan).T,
+            customdata=counts.astype('int64').T,
+            colorscale='Viridis',
+            colorbar=dict(title={'text': 'Rows (log10)'}),
+            hovertemplate="Count %{x:,.0f}<br>Amount ₹%{y:,.0f}<br>Rows: %{customdata:,.0f}<extra></extra>",
+        ))
+        title = f"{title} (density of {len(df):,} rows)"
+    else:
+        trace = go.Scattergl if len(df) > WEBGL_POINT_THRESHOLD else go.Scatter
+        fig = go.Figure(trace(x=df['Count'], y=df['Amount'], mode='markers', opacity=0.6))
+    fig.update_layout(title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title)
+    return fig
 
-if st.session_state.page == "home":    
-    st.write("""
-    This dashboard helps you understand PhonePe transaction data across India.
-    """)
-    
+# Decoding Transaction Dynamics
+def transaction_volume_chart(series):
+    return stacked_area_chart(series, "Transaction Volume Over Time (Stacked by Type)",
+                              "Total Transactions", "Transaction Type")
+
+def transaction_type_chart(totals):
+    return share_pie_chart(totals, "Transaction Type Distribution")
+
+def transaction_scatter_chart(df):
+    return amount_count_chart(df, "Transaction Count vs Amount Relationship",
+                              "Transaction Count", "Transaction Amount (₹)")
+
+def transaction_amount_box_chart(df):
+    return box_stats_chart(df, "Distribution of Transaction Amounts", "Transaction Amount (₹)")
+
+def transaction_district_chart(df, title="Top Districts by Transaction Volume"):
+    fig = px.bar(df, x='District', y='Transactions', title=title)
+    fig.update_layout(xaxis_title="District", yaxis_title="Total Transactions")
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+def transaction_type_growth_chart(df):
+    df['Period'] = df['Year'].astype(str) + ' Q' + df['Quarter'].astype(str)
+    fig = px.line(df, x='Period', y='YoY_Pct', color='Transaction_Type', markers=True,
+                  render_mode='webgl' if len(df) > WEBGL_POINT_THRESHOLD else 'auto',
+                  title="Transaction Type Growth (YoY %)")
+    fig.update_layout(xaxis_title="Year-Quarter", yaxis_title="Year-over-Year Growth (%)")
+    return fig
+
+# Device Dominance & User Engagement
+def device_brand_chart(df):
+    fig = px.bar(df, x='Brand', y='Users',
+                 title="Device Brand Distribution")
+    fig.update_layout(xaxis_title="Brand", yaxis_title="Total Users")
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+def user_engagement_box_chart(df):
+    # Create box plot for both Users and App Opens
+    return box_stats_chart(df, "Distribution of Users and App Opens Across States", "Count",
+                           series_order=['Users', 'App_Opens'])
+
+def app_opens_vs_users_chart(df):
+    fig = px.scatter(df, x='Users', y='App_Opens',
+                     text='State',
+                     title="App Opens vs Registered Users by State")
+    fig.update_layout(xaxis_title="Registered Users", yaxis_title="App Opens")
+    fig.update_traces(textposition="top center")
+    return fig
+
+def user_district_chart(df):
+    fig = px.bar(df, x='District', y='Users',
+                 title="Top Districts by Registered Users")
+    fig.update_layout(xaxis_title="District", yaxis_title="Total Users")
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+def user_growth_chart(series):
+    return stacked_area_chart(series, "User Growth Over Time (Stacked by State)",
+                              "Total Registered Users", "State")
+
+def user_district_growth_chart(df):
+    fig = px.bar(df, x='District', y='YoY_Pct', hover_data=['State', 'Users', 'YoY_Delta'],
+                 title="Fastest Growing Districts by Registered Users (YoY)")
+    fig.update_layout(xaxis_title="District", yaxis_title="Year-over-Year Growth (%)")
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+# Insurance Penetration & Growth Potential
+def insurance_state_chart(totals):
+    return state_totals_chart(totals, "Insurance Adoption by State", "Total Insurance Count")
+
+def insurance_type_chart(totals):
+    return share_pie_chart(totals, "Insurance Type Distribution")
+
+def insurance_scatter_chart(df):
+    return amount_count_chart(df, "Insurance Count vs Amount Relationship",
+                              "Insurance Count", "Insurance Amount (₹)")
+
+def insurance_district_chart(df):
+    fig = px.bar(df, x='District', y='Insurance_Count',
+                 title="Top Districts by Insurance Count")
+    fig.update_layout(xaxis_title="District", yaxis_title="Total Insurance Count")
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+def insurance_growth_chart(series):
+    return stacked_area_chart(series, "Insurance Growth Over Time (Stacked by State)",
+                              "Total Insurance Count", "State")
+
+def insurance_state_growth_chart(df):
+    fig = px.bar(df, x='State', y='YoY_Pct', hover_data=['Insurance_Count', 'YoY_Delta'],
+                 title="Fastest Growing States by Insurance Count (YoY)")
+    fig.update_layout(xaxis_title="State", yaxis_title="Year-over-Year Growth (%)")
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+def insurance_density_chart(df):
+    # One marker per grid cell of map_insurance_bins, never the raw points
+    fig = go.Figure(go.Scattergeo(
+        lat=df['Latitude'], lon=df['Longitude'],
+        mode='markers',
+        marker=dict(symbol='square', size=6, color=df['Metric'], colorscale='Viridis',
+                    colorbar=dict(title={'text': 'Insurance'}, thickness=15, len=0.5)),
+        customdata=df[['Points']],
+        hovertemplate="%{lat:.2f}, %{lon:.2f}<br>Insurance: %{marker.color:,.0f}<br>"
+                      "Points: %{customdata[0]:,}<extra></extra>",
+    ))
+    fig.update_geos(showland=True, landcolor='whitesmoke', showcountries=True, countrycolor='gray', **INDIA_GEO)
+    fig.update_layout(title="Insurance Point Density", margin={'r': 0, 't': 40, 'l': 0, 'b': 0}, height=650)
+    return fig
+
+# User Engagement & Growth Strategy
+def engagement_ratio_histogram(df):
+    return histogram_chart(df, "Distribution of User Engagement Ratios Across States",
+                           "Engagement Ratio", "Number of States")
+
+def app_opens_box_chart(df):
+    return box_stats_chart(df, "Distribution of App Opens Across States", "App Opens")
+
+def engagement_scatter_chart(df):
+    df['Engagement_Ratio'] = pd.to_numeric(df['Engagement_Ratio'], errors='coerce')
+    fig = px.scatter(df, x='Registered_Users', y='App_Opens',
+                     text='State',
+                     title="Registered Users vs App Opens by State",
+                     size='Engagement_Ratio',
+                     color='Engagement_Ratio')
+    fig.update_layout(xaxis_title="Registered Users", yaxis_title="App Opens")
+    fig.update_traces(textposition="top center")
+    return fig
+
+def user_pincode_chart(df):
+    fig = px.bar(df, x='Pincode', y='Users',
+                 title="Top Pincodes by Registered Users")
+    fig.update_layout(xaxis_title="Pincode", yaxis_title="Total Users")
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+# Transaction Analysis Across States & Districts
+def transaction_state_chart(totals):
+    return state_totals_chart(totals, "Transaction Volume by State", "Total Transaction Count")
+
+def state_amount_box_chart(df):
+    return box_stats_chart(df, "Distribution of Transaction Amounts Across States", "Transaction Amount (₹)")
+
+def state_amount_histogram(df):
+    return histogram_chart(df, "Distribution of Transaction Amounts Across States",
+                           "Transaction Amount (₹)", "Number of States")
+
+def transaction_pincode_chart(df):
+    return px.pie(df, values='Transactions', names='Pincode',
+                  title="Top Pincodes by Transaction Count")
+
+
+# Analysis pages: each chart names the query (see queries.QUERIES) it is built from, or for period
+# series and totals the cube slice (see cube.period_series and cube.totals)
+ANALYSIS_PAGES = {
+    "Decoding Transaction Dynamics": {
+        "subheader": "📊 Transaction Pattern Analysis",
+        "description": "Understanding how transactions happen over time and across different categories.",
+        "charts": [
+            {"title": "📈 Chart 1: Transaction Volume Over Time",
+             "series": {"name": "transactions", "measure": "Transaction_count", "by": "category"},
+             "build": transaction_volume_chart, "empty": "No transaction data found for Chart 1."},
+            {"title": "🍩 Chart 2: Transaction Type Distribution",
+             "totals": {"name": "transactions", "measure": "Transaction_count", "by": "category"},
+             "build": transaction_type_chart, "empty": "No transaction type data found for Chart 2."},
+            {"title": "🔍 Chart 3: Transaction Amount vs Count Relationship", "query": "transaction_amount_vs_count",
+             "all_query": "transaction_amount_vs_count_all",
+             "build": transaction_scatter_chart, "empty": "No scatter plot data found for Chart 3."},
+            {"title": "📊 Chart 4: Transaction Amount Distribution", "query": "transaction_amount_box",
+             "build": transaction_amount_box_chart, "empty": "No box plot data found for Chart 4."},
+            {"title": "🏆 Chart 5: Top Districts by Transaction Volume", "query": "top_transaction_districts",
+             "build": transaction_district_chart, "empty": "No district data found for Chart 5."},
+            {"title": "📈 Chart 6: Transaction Type Growth (YoY %)", "query": "transaction_type_growth",
+             "build": transaction_type_growth_chart, "empty": "No year-over-year data found for Chart 6."},
+        ],
+    },
+    "Device Dominance & User Engagement": {
+        "subheader": "📱 Device and User Analysis",
+        "description": "Understanding which devices users prefer and how they engage with the app.",
+        "charts": [
+            {"title": "📊 Chart 1: Device Brand Distribution", "query": "device_brand_distribution",
+             "build": device_brand_chart, "empty": "No device data found for Chart 1."},
+            {"title": "📊 Chart 2: User Engagement Distribution by State", "query": "user_state_box",
+             "build": user_engagement_box_chart, "empty": "No user data found for Chart 2."},
+            {"title": "🔍 Chart 3: App Opens vs Registered Users Relationship", "query": "top_user_states",
+             "build": app_opens_vs_users_chart, "empty": "No scatter plot data found for Chart 3."},
+            {"title": "🏆 Chart 4: Top Districts by User Count", "query": "top_user_districts_map",
+             "build": user_district_chart, "empty": "No district user data found for Chart 4."},
+            {"title": "📈 Chart 5: User Growth Over Time",
+             "series": {"name": "users", "measure": "Registered_Users", "by": "state"}, "top_k": 10,
+             "build": user_growth_chart, "empty": "No growth data found for Chart 5."},
+            {"title": "🚀 Chart 6: Fastest Growing Districts by Users", "query": "fastest_growing_user_districts",
+             "build": user_district_growth_chart, "empty": "No year-over-year data found for Chart 6."},
+        ],
+    },
+    "Insurance Penetration & Growth Potential": {
+        "subheader": "🛡️ Insurance Market Analysis",
+        "description": "Understanding insurance adoption rates and finding growth opportunities.",
+        "charts": [
+            {"title": "📊 Chart 1: Insurance Adoption by State",
+             "totals": {"name": "insurance", "measure": "Insurance_count", "by": "state", "top": 15},
+             "build": insurance_state_chart, "empty": "No insurance data found for Chart 1."},
+            {"title": "🍩 Chart 2: Insurance Type Distribution",
+             "totals": {"name": "insurance", "measure": "Insurance_count", "by": "category"},
+             "build": insurance_type_chart, "empty": "No insurance type data found for Chart 2."},
+            {"title": "🔍 Chart 3: Insurance Amount vs Count Relationship", "query": "insurance_amount_vs_count",
+             "all_query": "insurance_amount_vs_count_all",
+             "build": insurance_scatter_chart, "empty": "No scatter plot data found for Chart 3."},
+            {"title": "🏆 Chart 4: Top Districts by Insurance Count", "query": "top_insurance_districts",
+             "build": insurance_district_chart, "empty": "No district insurance data found for Chart 4."},
+            {"title": "📈 Chart 5: Insurance Growth Over Time",
+             "series": {"name": "insurance", "measure": "Insurance_count", "by": "state"}, "top_k": 10,
+             "build": insurance_growth_chart, "empty": "No growth data found for Chart 5."},
+            {"title": "🗺️ Chart 6: Insurance Point Density", "query": "insurance_density_0",
+             "zoom_queries": [f"insurance_density_{zoom}" for zoom in range(len(MAP_BIN_SIZES))],
+             "build": insurance_density_chart, "empty": "No insurance point data found for Chart 6."},
+            {"title": "🚀 Chart 7: Fastest Growing States by Insurance", "query": "fastest_growing_insurance_states",
+             "build": insurance_state_growth_chart, "empty": "No year-over-year data found for Chart 7."},
+        ],
+    },
+    "User Engagement & Growth Strategy": {
+        "subheader": "👥 User Behavior Analysis",
+        "description": "Understanding how users interact with the app and planning growth strategies.",
+        "charts": [
+            {"title": "📊 Chart 1: User Engagement Ratio Distribution", "query": "engagement_ratio_histogram",
+             "build": engagement_ratio_histogram, "empty": "No user engagement data found for Chart 1."},
+            {"title": "📊 Chart 2: App Opens Distribution", "query": "app_opens_state_box",
+             "build": app_opens_box_chart, "empty": "No box plot data found for Chart 2."},
+            {"title": "🏆 Chart 3: Top Districts by User Count", "query": "top_user_districts",
+             "build": user_district_chart, "empty": "No district user data found for Chart 3."},
+            {"title": "🔍 Chart 4: User Growth vs App Engagement", "query": "user_engagement_by_state",
+             "build": engagement_scatter_chart, "empty": "No scatter plot data found for Chart 4."},
+            {"title": "📍 Chart 5: Top Pincodes by User Count", "query": "top_user_pincodes",
+             "build": user_pincode_chart, "empty": "No pincode user data found for Chart 5."},
+        ],
+    },
+    "Transaction Analysis Across States & Districts": {
+        "subheader": "🗺️ Geographic Transaction Analysis",
+        "description": "Understanding transaction patterns across different regions of India.",
+        "charts": [
+            {"title": "📊 Chart 1: Transaction Volume by State",
+             "totals": {"name": "transactions", "measure": "Transaction_count", "by": "state", "top": 15},
+             "build": transaction_state_chart, "empty": "No transaction data found for Chart 1."},
+            {"title": "💰 Chart 2: Transaction Amount Distribution", "query": "transaction_amount_state_box",
+             "build": state_amount_box_chart, "empty": "No transaction amount data found for Chart 2."},
+            {"title": "🏆 Chart 3: Top Districts by Transaction Count", "query": "top_transaction_districts",
+             "build": lambda df: transaction_district_chart(df, title="Top Districts by Transaction Count"),
+             "empty": "No district transaction data found for Chart 3."},
+            {"title": "📊 Chart 4: Transaction Amount Distribution", "query": "transaction_amount_state_histogram",
+             "log_query": "transaction_amount_state_histogram_log",
+             "build": state_amount_histogram, "empty": "No histogram data found for Chart 4."},
+            {"title": "🥧 Chart 5: Top Pincodes by Transaction Count", "query": "top_transaction_pincodes",
+             "build": transaction_pincode_chart, "empty": "No pincode transaction data found for Chart 5."},
+        ],
+    },
+}
+
+@st.cache_data(ttl=600, show_spinner=False)
+def cached_chart_query(name, params=None):
+    # Only runs on a cache miss, so a rerun that changes nothing on the page doesn't query again
+    perf.annotate(cache="miss")
+    return fetch_query(name, params)
+
+def with_script_ctx(fn):
+    """fn for a chart query pool thread with this session's script run context
+    attached for the duration of each call: st.cache_data neither reads nor stores results without one"""
+    ctx = get_script_run_ctx()
+    def call(*args):
+        # Set and restored by hand: add_script_run_ctx(thread, None) attaches the current context instead
+        thread = threading.current_thread()
+        previous = getattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+        setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, ctx)
+        try:
+            return fn(*args)
+        finally:
+            setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+    return call
+
+def render_chart(chart, query_name, df, error):
+    # Errors stay scoped to the chart, the rest of the page still renders
+    if error is not None:
+        st.error(f"Error fetching data for {chart['title']}: {error}")
+    elif df.empty:
+        st.warning(chart["empty"])
+    else:
+        draw_chart(query_name, lambda: chart["build"](to_rupees(df.copy(), query_name)))
+
+def render_cube_chart(chart, top=None):
+    # A slice of the in-memory cubes, only the first chart after a data version change queries them
+    if "totals" in chart:
+        spec = chart["totals"]
+        name = f"{spec['name']}.{spec['measure']} by {spec['by']}"
+    else:
+        spec = chart["series"]
+        name = f"{spec['name']}.{spec['measure']}"
+    try:
+        with perf.span(perf_run(), "cube", name):
+            if "totals" in chart:
+                data = cube.totals(**spec)
+                empty = not len(data["labels"])
+            else:
+                data = cube.period_series(**spec, top=top)
+                empty = not data["observed"].any()
+    except Exception as e:
+        st.error(f"Error fetching data for {chart['title']}: {e}")
+        return
+    if empty:
+        st.warning(chart["empty"])
+    else:
+        draw_chart(name, lambda: chart["build"](data))
+
+def draw_chart(name, build):
+    try:
+        with perf.span(perf_run(), "figure", name) as record:
+            fig = build()
+            # What is shipped to the browser: traces and plotted points
+            record["traces"] = len(fig.data)
+            record["points"] = sum(len(trace.x) for trace in fig.data if getattr(trace, "x", None) is not None)
+        with perf.span(perf_run(), "render", name):
+            st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error creating chart: {e}")
+
+def open_chart(key):
+    st.session_state.opened_charts.add(key)
+
+def render_analysis_page(page_name, page):
+    st.subheader(page["subheader"])
+    st.write(page["description"])
+
+    try:
+        get_pool()
+    except Exception as e:
+        st.error(f"Database connection error: {e}")
+        st.error("Unable to connect to database.")
+        return
+
+    # Charts are only queried and built once opened; the first chart of a page is always open
+    if "opened_charts" not in st.session_state:
+        st.session_state.opened_charts = set()
+    st.session_state.opened_charts.add((page_name, 0))
+
+    # Lay out every chart slot first so results can fill them in any order
+    slots = {}
+    cube_slots = {}
+    for i, chart in enumerate(page["charts"]):
+        key = (page_name, i)
+        opened = key in st.session_state.opened_charts
+        with st.expander(chart["title"], expanded=opened):
+            if opened and ("series" in chart or "totals" in chart):
+                top = None
+                if "top_k" in chart:
+                    top = st.select_slider("States shown", options=TOP_K_OPTIONS, value=chart["top_k"],
+                                           key=f"top_k_{page_name}_{i}")
+                    top = None if top == "All" else top
+                cube_slots[i] = (st.container(), top)
+            elif opened:
+                query_name = chart["query"]
+                if "log_query" in chart and st.toggle("Log-scale bins", key=f"log_bins_{page_name}_{i}"):
+                    query_name = chart["log_query"]
+                if "all_query" in chart and st.toggle("All points", key=f"all_points_{page_name}_{i}",
+                                                      help="Off: a deterministic sample per state and type"):
+                    query_name = chart["all_query"]
+                if "zoom_queries" in chart:
+                    zoom = st.select_slider("Grid cell size", options=range(len(chart["zoom_queries"])),
+                                            format_func=lambda zoom: f"{MAP_BIN_SIZES[zoom]}°",
+                                            key=f"zoom_{page_name}_{i}")
+                    query_name = chart["zoom_queries"][zoom]
+                slots[i] = (st.container(), query_name)
+            else:
+                st.button("Load chart", key=f"load_chart_{page_name}_{i}",
+                          on_click=open_chart, args=(key,))
+
+    # The queries run on the pool while the cube charts are drawn from memory
+    query_names = list(dict.fromkeys(query_name for _, query_name in slots.values()))
+    results = fetch_concurrently(
+        query_names, fetch=perf.timed_fetch(perf_run(), with_script_ctx(cached_chart_query), cache="hit"))
+
+    for i, (slot, top) in cube_slots.items():
+        with slot:
+            render_cube_chart(page["charts"][i], top)
+
+    for name, df, error in results:
+        for i, (slot, query_name) in slots.items():
+            if query_name == name:
+                with slot:
+                    render_chart(page["charts"][i], query_name, df, error)
+
+########################## Performance Panel ##########################
+
+# Queries, figure builds and chart renders of each script run are timed as spans (perf.py),
+# also appended to PERF_LOG as JSON lines when it is set
+
+def perf_run():
+    return st.session_state.perf_run
+
+def performance_panel(run, parent=st.sidebar):
+    spans = pd.DataFrame(run["spans"])
+    rerun_ms = spans.loc[spans["kind"] == "rerun", "ms"].iloc[-1]
+    spans = spans[spans["kind"] != "rerun"]
+    with parent.expander("⏱️ Performance", expanded=True):
+        st.caption(f"{run['page']}: this rerun took {rerun_ms:,.0f} ms. Analysis queries run concurrently, "
+                   "so their times can add up to more than that.")
+        if spans.empty:
+            st.write("Nothing was queried or drawn in this rerun.")
+            return
+        col1, col2 = st.columns(2)
+        col1.metric("Database", f"{spans.get('db_ms', pd.Series(dtype=float)).sum():,.0f} ms")
+        col2.metric("pandas", f"{spans.get('convert_ms', pd.Series(dtype=float)).sum():,.0f} ms")
+        col1.metric("Figures", f"{spans.loc[spans['kind'] == 'figure', 'ms'].sum():,.0f} ms")
+        col2.metric("Rendering", f"{spans.loc[spans['kind'] == 'render', 'ms'].sum():,.0f} ms")
+        columns = [c for c in ["kind", "name", "ms", "db_ms", "convert_ms", "rows", "bytes", "traces", "points",
+                               "cache", "error"]
+                   if c in spans.columns]
+        st.dataframe(spans[columns].round(1), hide_index=True, use_container_width=True)
+
+def timed_fragment(func):
+    """For fragments: a rerun of the fragment alone doesn't run the script, so it gets a perf run of its own,
+    finished and shown inside the fragment (the sidebar can't be redrawn from a fragment rerun)"""
+    @functools.wraps(func)
+    def run_fragment(*args):
+        ctx = get_script_run_ctx()
+        if ctx is None or ctx.current_fragment_id not in (ctx.fragment_ids_this_run or []):
+            # Part of a full run, or of the rerun of an enclosing fragment: its run collects the spans
+            return func(*args)
+        st.session_state.perf_run = perf.new_run(f"{st.session_state.page}/{func.__name__}")
+        try:
+            result = func(*args)
+        finally:
+            perf.finish_run(perf_run())
+        if st.session_state.get("perf_panel"):
+            performance_panel(perf_run(), st.container())
+        return result
+    return run_fragment
+
+########################## Home Page ##########################
+
+# The Home page is split into fragments so a widget change only reruns the fragment that owns it:
+# the filter bar (and the map, top 5, summary and national top panels it feeds) reruns on a filter change,
+# the metrics row never does. Query results are cached per parameter set on top of that.
+
+@st.cache_data(ttl=600, show_spinner=False)
+def cached_home_query(name, params=None):
+    # Only runs on a cache miss
+    perf.annotate(cache="miss")
+    return to_rupees(fetch_query(name, params), name)
+
+def load_home_query(name, params=None):
+    with perf.span(perf_run(), "query", name, cache="hit") as record:
+        df = cached_home_query(name, params)
+        perf.frame_stats(record, df)
+    return df
+
+# state mapping
+STATE_MAPPING = {
+    'andaman-&-nicobar-islands': 'Andaman & Nicobar',
+    'andhra-pradesh': 'Andhra Pradesh',
+    'arunachal-pradesh': 'Arunachal Pradesh',
+    'assam': 'Assam',
+    'bihar': 'Bihar',
+    'chandigarh': 'Chandigarh',
+    'chhattisgarh': 'Chhattisgarh',
+    'dadra-&-nagar-haveli-&-daman-&-diu': 'Dadra and Nagar Haveli and Daman and Diu',
+    'delhi': 'Delhi',
+    'goa': 'Goa',
+    'gujarat': 'Gujarat',
+    'haryana': 'Haryana',
+    'himachal-pradesh': 'Himachal Pradesh',
+    'jammu-&-kashmir': 'Jammu & Kashmir',
+    'jharkhand': 'Jharkhand',
+    'karnataka': 'Karnataka',
+    'kerala': 'Kerala',
+    'ladakh': 'Ladakh',
+    'lakshadweep': 'Lakshadweep',
+    'madhya-pradesh': 'Madhya Pradesh',
+    'maharashtra': 'Maharashtra',
+    'manipur': 'Manipur',
+    'meghalaya': 'Meghalaya',
+    'mizoram': 'Mizoram',
+    'nagaland': 'Nagaland',
+    'odisha': 'Odisha',
+    'puducherry': 'Puducherry',
+    'punjab': 'Punjab',
+    'rajasthan': 'Rajasthan',
+    'sikkim': 'Sikkim',
+    'tamil-nadu': 'Tamil Nadu',
+    'telangana': 'Telangana',
+    'tripura': 'Tripura',
+    'uttar-pradesh': 'Uttar Pradesh',
+    'uttarakhand': 'Uttarakhand',
+    'west-bengal': 'West Bengal'
+}
+
+@st.fragment
+@timed_fragment
+def metrics_fragment():
     st.subheader("📈 Metrics")
     
     total_transactions, total_users, total_insurance, total_amount = get_metrics()
@@ -120,12 +701,10 @@ if st.session_state.page == "home":
         
         with col4:
             st.metric("Total Amount", "Database Error")
-    
-    # India Map Visualization
-    st.divider()
-    st.markdown("<h2 style='text-align: center; color: #1f77b4;'>🗺️ India Map - State-wise Data Visualization</h2>", unsafe_allow_html=True)
-    st.divider()
-    
+
+@st.fragment
+@timed_fragment
+def filter_bar_fragment():
     # Dropdowns for data selection - positioned at top
     st.markdown("<h4 style='text-align: center; margin-bottom: 20px;'>Select Data Parameters</h4>", unsafe_allow_html=True)
     col1, col2, col3 = st.columns(3)
@@ -139,270 +718,303 @@ if st.session_state.page == "home":
     
     with col2:
         # Get available years from database
-        conn = connect_to_database()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT DISTINCT CAST(Year AS TEXT) FROM agg_transaction 
-                    UNION 
-                    SELECT DISTINCT CAST(Year AS TEXT) FROM agg_user 
-                    ORDER BY CAST(Year AS TEXT)
-                """)
-                available_years = [row[0] for row in cursor.fetchall()]
-                conn.close()
-                
-                year = st.selectbox(
-                    "Select Year:",
-                    available_years,
-                    key="home_year",
-                    on_change=lambda: st.rerun()
-                )
-            except Exception as e:
-                st.error(f"Error fetching years: {e}")
-                year = "2024"
-        else:
+        try:
+            available_years = load_home_query("home_years")['Year'].tolist()
+            
+            year = st.selectbox(
+                "Select Year:",
+                available_years,
+                key="home_year"
+            )
+        except Exception as e:
+            st.error(f"Error fetching years: {e}")
+            available_years = []
             year = "2024"
     
     with col3:
         # Get available quarters for selected year
-        if conn:
-            try:
-                conn = connect_to_database()
-                cursor = conn.cursor()
-                if data_type == "Transactions":
-                    cursor.execute("""
-                        SELECT DISTINCT Quarter FROM agg_transaction 
-                        WHERE CAST(Year AS TEXT) = %s 
-                        ORDER BY Quarter
-                    """, (year,))
-                else:  # Users
-                    cursor.execute("""
-                        SELECT DISTINCT Quarter FROM agg_user 
-                        WHERE CAST(Year AS TEXT) = %s 
-                        ORDER BY Quarter
-                    """, (year,))
-                
-                available_quarters = [f"Q{row[0]}" for row in cursor.fetchall()]
-                conn.close()
-                
-                quarter = st.selectbox(
-                    "Select Quarter:",
-                    available_quarters,
-                    key="home_quarter"
-                )
-            except Exception as e:
-                st.error(f"Error fetching quarters: {e}")
-                quarter = "Q1"
-        else:
-            quarter = "Q1"
-    
-    # Fetch data for the map
-    conn = connect_to_database()
-    if conn:
         try:
-            cursor = conn.cursor()
-            
-            
-            quarter_num = int(quarter[1])
-            
-            if data_type == "Transactions":
-                cursor.execute("""
-                    SELECT State, SUM(Transaction_count) as total_count, SUM(Transaction_amount) as total_amount
-                    FROM agg_transaction 
-                    WHERE CAST(Year AS TEXT) = %s AND Quarter = %s
-                    GROUP BY State
-                """, (year, quarter_num))
-            elif data_type == "Users":
-                cursor.execute("""
-                    SELECT State, SUM(Registered_Users) as total_count, SUM(App_Opens) as total_amount
-                    FROM agg_user 
-                    WHERE CAST(Year AS TEXT) = %s AND Quarter = %s
-                    GROUP BY State
-                """, (year, quarter_num))
+            quarters_query = "home_quarters_transactions" if data_type == "Transactions" else "home_quarters_users"
+            available_quarters = [f"Q{q}" for q in load_home_query(quarters_query, (year,))['Quarter']]
             
-            map_data = cursor.fetchall()
-            conn.close()
-            
-            if map_data:
-                # Create DataFrame for map
-                df_map = pd.DataFrame(map_data, columns=['State', 'Count', 'Amount'])
-                
-                df_map['Count'] = pd.to_numeric(df_map['Count'], errors='coerce')
-                df_map['Amount'] = pd.to_numeric(df_map['Amount'], errors='coerce')
-                
-                # Remove any rows with null or invalid data
-                df_map = df_map.dropna()
-                df_map = df_map[df_map['Count'] > 0]
-                
-                if len(df_map) == 0:
-                    st.warning("No valid data found after cleaning. Please check your database.")
-                else:
-                    
-                    # state mapping
-                    state_mapping = {
-                        'andaman-&-nicobar-islands': 'Andaman & Nicobar',
-                        'andhra-pradesh': 'Andhra Pradesh',
-                        'arunachal-pradesh': 'Arunachal Pradesh',
-                        'assam': 'Assam',
-                        'bihar': 'Bihar',
-                        'chandigarh': 'Chandigarh',
-                        'chhattisgarh': 'Chhattisgarh',
-                        'dadra-&-nagar-haveli-&-daman-&-diu': 'Dadra and Nagar Haveli and Daman and Diu',
-                        'delhi': 'Delhi',
-                        'goa': 'Goa',
-                        'gujarat': 'Gujarat',
-                        'haryana': 'Haryana',
-                        'himachal-pradesh': 'Himachal Pradesh',
-                        'jammu-&-kashmir': 'Jammu & Kashmir',
-                        'jharkhand': 'Jharkhand',
-                        'karnataka': 'Karnataka',
-                        'kerala': 'Kerala',
-                        'ladakh': 'Ladakh',
-                        'lakshadweep': 'Lakshadweep',
-                        'madhya-pradesh': 'Madhya Pradesh',
-                        'maharashtra': 'Maharashtra',
-                        'manipur': 'Manipur',
-                        'meghalaya': 'Meghalaya',
-                        'mizoram': 'Mizoram',
-                        'nagaland': 'Nagaland',
-                        'odisha': 'Odisha',
-                        'puducherry': 'Puducherry',
-                        'punjab': 'Punjab',
-                        'rajasthan': 'Rajasthan',
-                        'sikkim': 'Sikkim',
-                        'tamil-nadu': 'Tamil Nadu',
-                        'telangana': 'Telangana',
-                        'tripura': 'Tripura',
-                        'uttar-pradesh': 'Uttar Pradesh',
-                        'uttarakhand': 'Uttarakhand',
-                        'west-bengal': 'West Bengal'
-                    }
-                
-                # State name mapping
-                df_map['State_Clean'] = df_map['State'].map(state_mapping).fillna(df_map['State'])
-                color_column = 'Count'
-                title_suffix = "Count"
-                
-                try:
-                    fig = go.Figure(data=go.Choropleth(
-                        geojson="https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson",
-                        featureidkey='properties.ST_NM',
-                        locationmode='geojson-id',
-                        locations=df_map['State_Clean'],
-                        z=df_map[color_column],
-                        autocolorscale=False,
-                        colorscale='Viridis',
-                        marker_line_color='peachpuff',
-                        colorbar=dict(
-                            title={'text': title_suffix},
-                            thickness=15,
-                            len=0.35,
-                            bgcolor='rgba(255,255,255,0.6)',
-                            xanchor='left',
-                            x=0.01,
-                            yanchor='bottom',
-                            y=0.05
-                        )
-                    ))
-
-                    # Map projection for India
-                    fig.update_geos(
-                        visible=False,
-                        projection=dict(
-                            type='conic conformal',
-                            parallels=[12.472944444, 35.172805555556],
-                            rotation={'lat': 24, 'lon': 80}
-                        ),
-                        lonaxis={'range': [68, 98]},
-                        lataxis={'range': [6, 38]}
-                    )
-
-                    # Map layout
-                    fig.update_layout(
-                        title=dict(
-                            text=f"{data_type} {title_suffix} by State - {quarter} {year}",
-                            xanchor='center',
-                            x=0.5,
-                            yref='paper',
-                            yanchor='bottom',
-                            y=1,
-                            pad={'b': 10}
-                        ),
-                        margin={'r': 0, 't': 30, 'l': 0, 'b': 0},
-                        height=800,
-                        width=None
-                    )
-                    
-                except Exception as map_creation_error:
-                    st.error(f"Error creating choropleth map: {map_creation_error}")
-                    fig = None
-                
-                map_col, stats_col = st.columns([3, 1])
-                
-                # Left column: Display the choropleth map
-                with map_col:
-                    if fig is not None:
-                        st.subheader("📊 Interactive Map")
-                        st.plotly_chart(fig, use_container_width=True, height=700)
-                    else:
-                        st.warning("Choropleth map creation failed")
-                
-                # Right column: Display top 5 states
-                with stats_col:                    
-                    st.markdown("<h3 style='text-align: center; margin-bottom: 20px; color: #3477eb;'>🏆 Top 5 States</h3>", unsafe_allow_html=True)
-                    top_states = df_map.nlargest(5, color_column)
-                    
-                    for i, (_, row) in enumerate(top_states.iterrows(), 1):
-                        st.markdown(f"""
-                        <div style="
-                            background-color: white;
-                            border: 1px solid #dee2e6;
-                            border-radius: 8px;
-                            padding: 12px;
-                            margin-top: 24px;
-                            margin-bottom: 10px;
-                            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
-                        ">
-                            <div style="font-weight: bold; font-size: 24px; color: #414ad1; margin-bottom: 8px;">
-                                {i}. {row['State']}
-                            </div>
-                            <div style="font-size: 16px; color: #000108; margin-bottom: 4px;">
-                                Total Count  - {row['Count']:,}
-                            </div>
-                            <div style="font-size: 16px; color: #000108;">
-                                Total Amount  - ₹{row['Amount']:,.0f}
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    st.markdown("</div>", unsafe_allow_html=True)
-                
-                st.markdown("<br>", unsafe_allow_html=True)
-                st.subheader(f"📊 {data_type} Summary Statistics")
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.metric("Total States", len(df_map))
-                
-                with col2:
-                    st.metric(f"Total {title_suffix}", f"{df_map[color_column].sum():,}")
-                
-                with col3:
-                    st.metric(f"Average {title_suffix}", f"{df_map[color_column].mean():,.0f}")
-                
-                with col4:
-                    st.metric(f"Max {title_suffix}", f"{df_map[color_column].max():,}")
-                
-            else:
-                st.warning("No data available for the selected criteria.")
-                
+            quarter = st.selectbox(
+                "Select Quarter:",
+                available_quarters,
+                key="home_quarter"
+            )
         except Exception as e:
-            st.error(f"Error fetching map data: {e}")
-            if conn:
-                conn.close()
+            st.error(f"Error fetching quarters: {e}")
+            quarter = "Q1"
+    
+    # Fetch data for the map
+    try:
+        quarter_num = int(quarter[1])
+        df_map = load_home_period_query(map_query_name(data_type), year, quarter_num)
+    except Exception as e:
+        st.error(f"Error fetching map data: {e}")
+        return
+    
+    if len(df_map) == 0:
+        st.warning("No data available for the selected criteria.")
+        return
+    
+    df_map = clean_map_frame(df_map)
+    
+    if len(df_map) == 0:
+        st.warning("No valid data found after cleaning. Please check your database.")
+        return
+    
+    map_col, stats_col = st.columns([3, 1])
+    
+    with map_col:
+        map_panel(data_type, year, quarter)
+    
+    with stats_col:
+        top_states_panel(df_map)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    summary_panel(df_map, data_type)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    national_top_panel(data_type, year, quarter_num)
+
+    # Everything for this period is on screen, warm the cache for where the user is likely to go next
+    if year in available_years:
+        submit_prefetch(prefetch_neighbours, data_type, year, quarter, tuple(available_years))
+    submit_prefetch(prefetch_home_period, "Users" if data_type == "Transactions" else "Transactions", year, quarter)
+
+def clean_map_frame(df_map):
+    # Remove any rows with null or invalid data
+    df_map = df_map.dropna()
+    df_map = df_map[df_map['Count'] > 0].copy()
+    # State name mapping
+    df_map['State_Clean'] = df_map['State'].map(STATE_MAPPING).fillna(df_map['State'])
+    return df_map
+
+def build_home_map(df_map, data_type, year, quarter):
+    color_column = 'Count'
+    title_suffix = "Count"
+
+    fig = go.Figure(data=go.Choropleth(
+        geojson="https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson",
+        featureidkey='properties.ST_NM',
+        locationmode='geojson-id',
+        locations=df_map['State_Clean'],
+        z=df_map[color_column],
+        autocolorscale=False,
+        colorscale='Viridis',
+        marker_line_color='peachpuff',
+        colorbar=dict(
+            title={'text': title_suffix},
+            thickness=15,
+            len=0.35,
+            bgcolor='rgba(255,255,255,0.6)',
+            xanchor='left',
+            x=0.01,
+            yanchor='bottom',
+            y=0.05
+        )
+    ))
+
+    # Map projection for India
+    fig.update_geos(visible=False, **INDIA_GEO)
+
+    # Map layout
+    fig.update_layout(
+        title=dict(
+            text=f"{data_type} {title_suffix} by State - {quarter} {year}",
+            xanchor='center',
+            x=0.5,
+            yref='paper',
+            yanchor='bottom',
+            y=1,
+            pad={'b': 10}
+        ),
+        margin={'r': 0, 't': 30, 'l': 0, 'b': 0},
+        height=800,
+        width=None
+    )
+    return fig
+
+def map_query_name(data_type):
+    return "home_map_transactions" if data_type == "Transactions" else "home_map_users"
+
+def home_top_query(data_type):
+    return "home_top_transactions" if data_type == "Transactions" else "home_top_users"
+
+# The per-period results below go through the shared cache in prefetch.py rather than st.cache_data,
+# so the prefetch thread can fill them without a script run context; the compute functions only
+# run on a miss
+def home_period_query(name, year, quarter_num):
+    perf.annotate(cache="miss")
+    return to_rupees(fetch_query(name, (year, quarter_num)), name)
+
+def cached_home_period_query(name, year, quarter_num):
+    return prefetch.cached((name, year, quarter_num), lambda: home_period_query(name, year, quarter_num))
+
+def load_home_period_query(name, year, quarter_num):
+    with perf.span(perf_run(), "query", name, cache="hit") as record:
+        df = cached_home_period_query(name, year, quarter_num)
+        perf.frame_stats(record, df)
+    return df
+
+def home_map(data_type, year, quarter):
+    perf.annotate(cache="miss")
+    df_map = clean_map_frame(cached_home_period_query(map_query_name(data_type), year, int(quarter[1])))
+    return build_home_map(df_map, data_type, year, quarter)
+
+def cached_home_map(data_type, year, quarter):
+    return prefetch.cached(("home_map", data_type, year, quarter), lambda: home_map(data_type, year, quarter))
+
+def prefetch_home_period(data_type, year, quarter):
+    # Runs on the prefetch thread: the map figure (and its query) and the national top lists of one period
+    cached_home_map(data_type, year, quarter)
+    cached_home_period_query(home_top_query(data_type), year, int(quarter[1]))
+
+def prefetch_neighbours(data_type, year, quarter, available_years):
+    # Runs on the prefetch thread: finds the quarters before and after the one on screen, which can be
+    # in the years either side, and queues them
+    quarters_query = "home_quarters_transactions" if data_type == "Transactions" else "home_quarters_users"
+    position = available_years.index(year)
+    # Periods of this year and the years either side, in timeline order
+    periods = [(y, f"Q{q}") for y in available_years[max(position - 1, 0):position + 2]
+               for q in fetch_query(quarters_query, (y,))['Quarter']]
+    i = periods.index((year, quarter))
+    for period in periods[max(i - 1, 0):i] + periods[i + 1:i + 2]:
+        submit_prefetch(prefetch_home_period, data_type, *period)
+
+def submit_prefetch(task, *args):
+    """Queue task(*args) on the prefetch thread, which fills the shared cache in prefetch.py
+    (failures are logged there and only cost a cache miss later)"""
+    prefetch.submit((task.__name__, *args), functools.partial(task, *args))
+
+def map_panel(data_type, year, quarter):
+    try:
+        with perf.span(perf_run(), "figure", "home_map", cache="hit"):
+            fig = cached_home_map(data_type, year, quarter)
+    except Exception as map_creation_error:
+        st.error(f"Error creating choropleth map: {map_creation_error}")
+        fig = None
+    
+    # Left column: Display the choropleth map
+    if fig is not None:
+        st.subheader("📊 Interactive Map")
+        with perf.span(perf_run(), "render", "home_map"):
+            st.plotly_chart(fig, use_container_width=True, height=700)
     else:
-        st.error("Unable to connect to database for map visualization.")
+        st.warning("Choropleth map creation failed")
+
+def top_states_panel(df_map):
+    # Right column: Display top 5 states
+    st.markdown("<h3 style='text-align: center; margin-bottom: 20px; color: #3477eb;'>🏆 Top 5 States</h3>", unsafe_allow_html=True)
+    top_states = df_map.nlargest(5, 'Count')
+    
+    for i, (_, row) in enumerate(top_states.iterrows(), 1):
+        st.markdown(f"""
+        <div style="
+            background-color: white;
+            border: 1px solid #dee2e6;
+            border-radius: 8px;
+            padding: 12px;
+            margin-top: 24px;
+            margin-bottom: 10px;
+            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
+        ">
+            <div style="font-weight: bold; font-size: 24px; color: #414ad1; margin-bottom: 8px;">
+                {i}. {row['State']}
+            </div>
+            <div style="font-size: 16px; color: #000108; margin-bottom: 4px;">
+                Total Count  - {row['Count']:,}
+            </div>
+            <div style="font-size: 16px; color: #000108;">
+                Total Amount  - ₹{row['Amount']:,.0f}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+
+def summary_panel(df_map, data_type):
+    color_column = 'Count'
+    title_suffix = "Count"
+    
+    st.subheader(f"📊 {data_type} Summary Statistics")
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Total States", len(df_map))
+    
+    with col2:
+        st.metric(f"Total {title_suffix}", f"{df_map[color_column].sum():,}")
+    
+    with col3:
+        st.metric(f"Average {title_suffix}", f"{df_map[color_column].mean():,.0f}")
+    
+    with col4:
+        st.metric(f"Max {title_suffix}", f"{df_map[color_column].max():,}")
+
+def national_top_panel(data_type, year, quarter):
+    # India-wide rankings read straight from the country-level top tables, no per-state aggregation
+    try:
+        df_top = load_home_period_query(home_top_query(data_type), year, quarter)
+    except Exception as e:
+        st.error(f"Error fetching national top lists: {e}")
+        return
+
+    if df_top.empty:
+        return
+
+    st.subheader(f"🇮🇳 Top {data_type} Across India")
+    districts_col, pincodes_col = st.columns(2)
+    for col, level, title in ((districts_col, "district", "Districts"), (pincodes_col, "pincode", "Pincodes")):
+        with col:
+            st.markdown(f"**Top 10 {title}**")
+            ranking = df_top[df_top['Level'] == level].drop(columns='Level').head(10)
+            st.dataframe(ranking, hide_index=True, use_container_width=True)
+
+
+st.set_page_config(
+    page_title="PhonePe Dashboard",
+    page_icon="📱",
+    layout="wide"
+)
+
+st.title("PhonePe Transaction Insights Dashboard")
+
+st.sidebar.title("Navigation")
+
+page_option = st.sidebar.selectbox(
+    "Choose Page:",
+    ["🏠 Home", "📊 Analysis"]
+)
+
+show_performance = st.sidebar.toggle("Show performance panel", key="perf_panel")
+
+
+if page_option == "🏠 Home":
+    st.session_state.page = "home"
+elif page_option == "📊 Analysis":
+    st.session_state.page = "analysis"
+
+
+if "page" not in st.session_state:
+    st.session_state.page = "home"
+
+st.session_state.perf_run = perf.new_run(st.session_state.page)
+
+if st.session_state.page == "home":    
+    st.write("""
+    This dashboard helps you understand PhonePe transaction data across India.
+    """)
+    
+    metrics_fragment()
+    
+    # India Map Visualization
+    st.divider()
+    st.markdown("<h2 style='text-align: center; color: #1f77b4;'>🗺️ India Map - State-wise Data Visualization</h2>", unsafe_allow_html=True)
+    st.divider()
+    
+    filter_bar_fragment()
     
 
 ########################## Analysis Page ##########################
@@ -413,588 +1025,13 @@ elif st.session_state.page == "analysis":
     # Analysis type selection
     analysis_type = st.selectbox(
         "Choose Analysis Type:",
-        [
-            "Select Analysis",
-            "Decoding Transaction Dynamics",
-            "Device Dominance & User Engagement", 
-            "Insurance Penetration & Growth Potential",
-            "User Engagement & Growth Strategy",
-            "Transaction Analysis Across States & Districts"
-        ]
+        ["Select Analysis"] + list(ANALYSIS_PAGES)
     )
     
     if analysis_type == "Select Analysis":
         st.write("Please select an analysis type from the dropdown above.")
-        
-    elif analysis_type == "Decoding Transaction Dynamics":
-        st.subheader("📊 Transaction Pattern Analysis")
-        st.write("Understanding how transactions happen over time and across different categories.")
-        
-        conn = connect_to_database()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                
-                # Chart 1: Transaction Volume Over Time (Stacked Area Plot)
-                st.subheader("📈 Chart 1: Transaction Volume Over Time")
-                cursor.execute("""
-                    SELECT Year, Quarter, Transaction_type, SUM(Transaction_count) as total_transactions
-                    FROM agg_transaction 
-                    GROUP BY Year, Quarter, Transaction_type 
-                    ORDER BY Year, Quarter
-                """)
-                transaction_data = cursor.fetchall()
-                
-                if transaction_data:
-                    df = pd.DataFrame(transaction_data, columns=['Year', 'Quarter', 'Transaction_Type', 'Transactions'])
-                    df['Period'] = df['Year'].astype(str) + ' Q' + df['Quarter'].astype(str)
-                    
-                    fig = px.area(df, x='Period', y='Transactions', color='Transaction_Type',
-                                title="Transaction Volume Over Time (Stacked by Type)")
-                    fig.update_layout(xaxis_title="Year-Quarter", yaxis_title="Total Transactions")
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.warning("No transaction data found for Chart 1.")
-                
-                # Chart 2: Transaction Type Distribution (Donut Chart)
-                st.subheader("🍩 Chart 2: Transaction Type Distribution")
-                cursor.execute("""
-                    SELECT Transaction_type, SUM(Transaction_count) as total_count
-                    FROM agg_transaction 
-                    GROUP BY Transaction_type 
-                    ORDER BY total_count DESC
-                """)
-                type_data = cursor.fetchall()
-                
-                if type_data:
-                    df_type = pd.DataFrame(type_data, columns=['Transaction_Type', 'Count'])
-                    fig2 = px.pie(df_type, values='Count', names='Transaction_Type', 
-                                 title="Transaction Type Distribution",
-                                 hole=0.4)  # This creates a donut chart
-                    st.plotly_chart(fig2, use_container_width=True)
-                else:
-                    st.warning("No transaction type data found for Chart 2.")
-                
-                # Chart 3: Transaction Amount vs Count Scatter Plot
-                st.subheader("🔍 Chart 3: Transaction Amount vs Count Relationship")
-                cursor.execute("""
-                    SELECT Transaction_count, Transaction_amount
-                    FROM agg_transaction 
-                    WHERE Transaction_amount > 0
-                    LIMIT 1000
-                """)
-                scatter_data = cursor.fetchall()
-                
-                if scatter_data:
-                    df_scatter = pd.DataFrame(scatter_data, columns=['Count', 'Amount'])
-                    fig3 = px.scatter(df_scatter, x='Count', y='Amount', 
-                                    title="Transaction Count vs Amount Relationship",
-                                    opacity=0.6)
-                    fig3.update_layout(xaxis_title="Transaction Count", yaxis_title="Transaction Amount (₹)")
-                    st.plotly_chart(fig3, use_container_width=True)
-                else:
-                    st.warning("No scatter plot data found for Chart 3.")
-                
-                # Chart 4: Transaction Amount Distribution (Box Plot)
-                st.subheader("📊 Chart 4: Transaction Amount Distribution")
-                if scatter_data:
-                    fig4 = px.box(df_scatter, y='Amount',
-                                 title="Distribution of Transaction Amounts",
-                                 points="outliers")
-                    fig4.update_layout(yaxis_title="Transaction Amount (₹)")
-                    st.plotly_chart(fig4, use_container_width=True)
-                else:
-                    st.warning("No box plot data found for Chart 4.")
-                
-                # Chart 5: Top Districts by Transaction Volume (Bar Chart)
-                st.subheader("🏆 Chart 5: Top Districts by Transaction Volume")
-                cursor.execute("""
-                    SELECT District, SUM(Count) as total_transactions
-                    FROM map_transaction_hover 
-                    GROUP BY District 
-                    ORDER BY total_transactions DESC 
-                    LIMIT 15
-                """)
-                district_data = cursor.fetchall()
-                
-                if district_data:
-                    df_district = pd.DataFrame(district_data, columns=['District', 'Transactions'])
-                    fig5 = px.bar(df_district, x='District', y='Transactions',
-                                 title="Top Districts by Transaction Volume")
-                    fig5.update_layout(xaxis_title="District", yaxis_title="Total Transactions")
-                    fig5.update_xaxes(tickangle=45)
-                    st.plotly_chart(fig5, use_container_width=True)
-                else:
-                    st.warning("No district data found for Chart 5.")
-                
-                conn.close()
-                    
-            except Exception as e:
-                st.error(f"Error fetching transaction data: {e}")
-                if conn:
-                    conn.close()
-        else:
-            st.error("Unable to connect to database.")
-        
-    elif analysis_type == "Device Dominance & User Engagement":
-        st.subheader("📱 Device and User Analysis")
-        st.write("Understanding which devices users prefer and how they engage with the app.")
-        
-        conn = connect_to_database()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                
-                # Chart 1: Device Brand Popularity (Bar Chart)
-                st.subheader("📊 Chart 1: Device Brand Distribution")
-                cursor.execute("""
-                    SELECT Brand, SUM(User_Count) as total_users
-                    FROM agg_user_device 
-                    GROUP BY Brand 
-                    ORDER BY total_users DESC 
-                    LIMIT 10
-                """)
-                device_data = cursor.fetchall()
-                
-                if device_data:
-                    df = pd.DataFrame(device_data, columns=['Brand', 'Users'])
-                    fig = px.bar(df, x='Brand', y='Users',
-                                title="Device Brand Distribution")
-                    fig.update_layout(xaxis_title="Brand", yaxis_title="Total Users")
-                    fig.update_xaxes(tickangle=45)
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.warning("No device data found for Chart 1.")
-                
-                # Chart 2: User Engagement by State (Box Plot)
-                st.subheader("📊 Chart 2: User Engagement Distribution by State")
-                cursor.execute("""
-                    SELECT State, 
-                           SUM(Registered_Users) as total_users,
-                           SUM(App_Opens) as total_app_opens
-                    FROM agg_user 
-                    GROUP BY State 
-                    HAVING SUM(Registered_Users) > 0
-                    ORDER BY total_users DESC 
-                    LIMIT 15
-                """)
-                user_data = cursor.fetchall()
-                
-                if user_data:
-                    df_user = pd.DataFrame(user_data, columns=['State', 'Users', 'App_Opens'])
-                    # Create box plot for both Users and App Opens
-                    fig2 = px.box(df_user, y=['Users', 'App_Opens'],
-                                 title="Distribution of Users and App Opens Across States",
-                                 points="outliers")
-                    fig2.update_layout(yaxis_title="Count")
-                    st.plotly_chart(fig2, use_container_width=True)
-                else:
-                    st.warning("No user data found for Chart 2.")
-                
-                # Chart 3: App Opens vs Registered Users Scatter Plot
-                st.subheader("🔍 Chart 3: App Opens vs Registered Users Relationship")
-                if user_data:
-                    df_user = pd.DataFrame(user_data, columns=['State', 'Users', 'App_Opens'])
-                    fig3 = px.scatter(df_user, x='Users', y='App_Opens', 
-                                    text='State',
-                                    title="App Opens vs Registered Users by State")
-                    fig3.update_layout(xaxis_title="Registered Users", yaxis_title="App Opens")
-                    fig3.update_traces(textposition="top center")
-                    st.plotly_chart(fig3, use_container_width=True)
-                else:
-                    st.warning("No scatter plot data found for Chart 3.")
-                
-                # Chart 4: Top Districts by User Count (Bar Chart)
-                st.subheader("🏆 Chart 4: Top Districts by User Count")
-                cursor.execute("""
-                    SELECT District, SUM(Registered_Users) as total_users
-                    FROM map_user_hover 
-                    GROUP BY District 
-                    ORDER BY total_users DESC 
-                    LIMIT 15
-                """)
-                district_user_data = cursor.fetchall()
-                
-                if district_user_data:
-                    df_district_user = pd.DataFrame(district_user_data, columns=['District', 'Users'])
-                    fig4 = px.bar(df_district_user, x='District', y='Users',
-                                 title="Top Districts by Registered Users")
-                    fig4.update_layout(xaxis_title="District", yaxis_title="Total Users")
-                    fig4.update_xaxes(tickangle=45)
-                    st.plotly_chart(fig4, use_container_width=True)
-                else:
-                    st.warning("No district user data found for Chart 4.")
-                
-                # Chart 5: User Growth Over Time (Stacked Area Plot)
-                st.subheader("📈 Chart 5: User Growth Over Time")
-                cursor.execute("""
-                    SELECT Year, Quarter, State, SUM(Registered_Users) as total_users
-                    FROM agg_user 
-                    GROUP BY Year, Quarter, State 
-                    ORDER BY Year, Quarter
-                """)
-                growth_data = cursor.fetchall()
-                
-                if growth_data:
-                    df_growth = pd.DataFrame(growth_data, columns=['Year', 'Quarter', 'State', 'Users'])
-                    df_growth['Period'] = df_growth['Year'].astype(str) + ' Q' + df_growth['Quarter'].astype(str)
-                    
-                    fig5 = px.area(df_growth, x='Period', y='Users', color='State',
-                                  title="User Growth Over Time (Stacked by State)")
-                    fig5.update_layout(xaxis_title="Year-Quarter", yaxis_title="Total Registered Users")
-                    st.plotly_chart(fig5, use_container_width=True)
-                else:
-                    st.warning("No growth data found for Chart 5.")
-                
-                conn.close()
-                    
-            except Exception as e:
-                st.error(f"Error fetching device and user data: {e}")
-                if conn:
-                    conn.close()
-        else:
-            st.error("Unable to connect to database.")
-        
-    elif analysis_type == "Insurance Penetration & Growth Potential":
-        st.subheader("🛡️ Insurance Market Analysis")
-        st.write("Understanding insurance adoption rates and finding growth opportunities.")
-        
-        conn = connect_to_database()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                
-                # Chart 1: Insurance Adoption by State (Bar Chart)
-                st.subheader("📊 Chart 1: Insurance Adoption by State")
-                cursor.execute("""
-                    SELECT State, SUM(Insurance_count) as total_insurance
-                    FROM agg_insurance 
-                    GROUP BY State 
-                    ORDER BY total_insurance DESC 
-                    LIMIT 15
-                """)
-                insurance_data = cursor.fetchall()
-                
-                if insurance_data:
-                    df = pd.DataFrame(insurance_data, columns=['State', 'Insurance_Count'])
-                    fig = px.bar(df, x='State', y='Insurance_Count', 
-                                title="Insurance Adoption by State")
-                    fig.update_layout(xaxis_title="State", yaxis_title="Total Insurance Count")
-                    fig.update_xaxes(tickangle=45)
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.warning("No insurance data found for Chart 1.")
-                
-                # Chart 2: Insurance Type Distribution (Donut Chart)
-                st.subheader("🍩 Chart 2: Insurance Type Distribution")
-                cursor.execute("""
-                    SELECT Insurance_type, SUM(Insurance_count) as total_count
-                    FROM agg_insurance 
-                    GROUP BY Insurance_type 
-                    ORDER BY total_count DESC
-                """)
-                type_data = cursor.fetchall()
-                
-                if type_data:
-                    df_type = pd.DataFrame(type_data, columns=['Insurance_Type', 'Count'])
-                    fig2 = px.pie(df_type, values='Count', names='Insurance_Type', 
-                                 title="Insurance Type Distribution",
-                                 hole=0.4)  # This creates a donut chart
-                    st.plotly_chart(fig2, use_container_width=True)
-                else:
-                    st.warning("No insurance type data found for Chart 2.")
-                
-                # Chart 3: Insurance Amount vs Count Scatter Plot
-                st.subheader("🔍 Chart 3: Insurance Amount vs Count Relationship")
-                cursor.execute("""
-                    SELECT Insurance_count, Insurance_amount
-                    FROM agg_insurance 
-                    WHERE Insurance_amount > 0
-                    LIMIT 1000
-                """)
-                scatter_data = cursor.fetchall()
-                
-                if scatter_data:
-                    df_scatter = pd.DataFrame(scatter_data, columns=['Count', 'Amount'])
-                    fig3 = px.scatter(df_scatter, x='Count', y='Amount', 
-                                    title="Insurance Count vs Amount Relationship",
-                                    opacity=0.6)
-                    fig3.update_layout(xaxis_title="Insurance Count", yaxis_title="Insurance Amount (₹)")
-                    st.plotly_chart(fig3, use_container_width=True)
-                else:
-                    st.warning("No scatter plot data found for Chart 3.")
-                
-
-                
-                # Chart 4: Top Districts by Insurance Count (Bar Chart)
-                st.subheader("🏆 Chart 4: Top Districts by Insurance Count")
-                cursor.execute("""
-                    SELECT District, SUM(Count) as total_insurance
-                    FROM map_insurance_hover 
-                    GROUP BY District 
-                    ORDER BY total_insurance DESC 
-                    LIMIT 15
-                """)
-                district_data = cursor.fetchall()
-                
-                if district_data:
-                    df_district = pd.DataFrame(district_data, columns=['District', 'Insurance_Count'])
-                    fig4 = px.bar(df_district, x='District', y='Insurance_Count',
-                                 title="Top Districts by Insurance Count")
-                    fig4.update_layout(xaxis_title="District", yaxis_title="Total Insurance Count")
-                    fig4.update_xaxes(tickangle=45)
-                    st.plotly_chart(fig4, use_container_width=True)
-                else:
-                    st.warning("No district insurance data found for Chart 4.")
-                
-                # Chart 5: Insurance Growth Over Time (Stacked Area Plot)
-                st.subheader("📈 Chart 5: Insurance Growth Over Time")
-                cursor.execute("""
-                    SELECT Year, Quarter, State, SUM(Insurance_count) as total_insurance
-                    FROM agg_insurance 
-                    GROUP BY Year, Quarter, State 
-                    ORDER BY Year, Quarter
-                """)
-                growth_data = cursor.fetchall()
-                
-                if growth_data:
-                    df_growth = pd.DataFrame(growth_data, columns=['Year', 'Quarter', 'State', 'Insurance_Count'])
-                    df_growth['Period'] = df_growth['Year'].astype(str) + ' Q' + df_growth['Quarter'].astype(str)
-                    
-                    fig5 = px.area(df_growth, x='Period', y='Insurance_Count', color='State',
-                                  title="Insurance Growth Over Time (Stacked by State)")
-                    fig5.update_layout(xaxis_title="Year-Quarter", yaxis_title="Total Insurance Count")
-                    st.plotly_chart(fig5, use_container_width=True)
-                else:
-                    st.warning("No growth data found for Chart 5.")
-                
-                conn.close()
-                    
-            except Exception as e:
-                st.error(f"Error fetching insurance data: {e}")
-                if conn:
-                    conn.close()
-        else:
-            st.error("Unable to connect to database.")
-        
-    elif analysis_type == "User Engagement & Growth Strategy":
-        st.subheader("👥 User Behavior Analysis")
-        st.write("Understanding how users interact with the app and planning growth strategies.")
-        
-        conn = connect_to_database()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                
-                # Chart 1: User Engagement Ratio by State (Histogram)
-                st.subheader("📊 Chart 1: User Engagement Ratio Distribution")
-                cursor.execute("""
-                    SELECT State, 
-                           SUM(Registered_Users) as total_users,
-                           SUM(App_Opens) as total_app_opens,
-                           ROUND(AVG(App_Opens::numeric / NULLIF(Registered_Users, 0)), 2) as engagement_ratio
-                    FROM agg_user 
-                    GROUP BY State 
-                    HAVING SUM(Registered_Users) > 0
-                    ORDER BY engagement_ratio DESC 
-                    LIMIT 15
-                """)
-                user_data = cursor.fetchall()
-                
-                if user_data:
-                    df = pd.DataFrame(user_data, columns=['State', 'Registered_Users', 'App_Opens', 'Engagement_Ratio'])
-                    fig = px.histogram(df, x='Engagement_Ratio', nbins=15,
-                                      title="Distribution of User Engagement Ratios Across States",
-                                      opacity=0.7)
-                    fig.update_layout(xaxis_title="Engagement Ratio", yaxis_title="Number of States")
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.warning("No user engagement data found for Chart 1.")
-                
-                # Chart 2: App Opens Distribution (Box Plot)
-                st.subheader("📊 Chart 2: App Opens Distribution")
-                if user_data:
-                    df = pd.DataFrame(user_data, columns=['State', 'Registered_Users', 'App_Opens', 'Engagement_Ratio'])
-                    fig2 = px.box(df, y='App_Opens',
-                                 title="Distribution of App Opens Across States",
-                                 points="outliers")
-                    fig2.update_layout(yaxis_title="App Opens")
-                    st.plotly_chart(fig2, use_container_width=True)
-                else:
-                    st.warning("No box plot data found for Chart 2.")
-                
-                # Chart 3: Top User Districts (Bar Chart)
-                st.subheader("🏆 Chart 3: Top Districts by User Count")
-                cursor.execute("""
-                    SELECT District, SUM(Registered_Users) as total_users
-                    FROM top_user_district 
-                    GROUP BY District 
-                    ORDER BY total_users DESC 
-                    LIMIT 15
-                """)
-                district_data = cursor.fetchall()
-                
-                if district_data:
-                    df_district = pd.DataFrame(district_data, columns=['District', 'Users'])
-                    fig3 = px.bar(df_district, x='District', y='Users',
-                                 title="Top Districts by Registered Users")
-                    fig3.update_layout(xaxis_title="District", yaxis_title="Total Users")
-                    fig3.update_xaxes(tickangle=45)
-                    st.plotly_chart(fig3, use_container_width=True)
-                else:
-                    st.warning("No district user data found for Chart 3.")
-                
-                # Chart 4: User Growth vs App Engagement Colored Scatter Plot
-                st.subheader("🔍 Chart 4: User Growth vs App Engagement")
-                if user_data:
-                    df = pd.DataFrame(user_data, columns=['State', 'Registered_Users', 'App_Opens', 'Engagement_Ratio'])
-                    df['Engagement_Ratio'] = pd.to_numeric(df['Engagement_Ratio'], errors='coerce')
-                    fig4 = px.scatter(df, x='Registered_Users', y='App_Opens', 
-                                    text='State',
-                                    title="Registered Users vs App Opens by State",
-                                    size='Engagement_Ratio',
-                                    color='Engagement_Ratio')
-                    fig4.update_layout(xaxis_title="Registered Users", yaxis_title="App Opens")
-                    fig4.update_traces(textposition="top center")
-                    st.plotly_chart(fig4, use_container_width=True)
-                else:
-                    st.warning("No scatter plot data found for Chart 4.")
-                
-                # Chart 5: Top Pincodes by User Count (Bar Chart)
-                st.subheader("📍 Chart 5: Top Pincodes by User Count")
-                cursor.execute("""
-                    SELECT Pincode, SUM(Registered_Users) as total_users
-                    FROM top_user_pincode 
-                    GROUP BY Pincode 
-                    ORDER BY total_users DESC 
-                    LIMIT 15
-                """)
-                pincode_data = cursor.fetchall()
-                
-                if pincode_data:
-                    df_pincode = pd.DataFrame(pincode_data, columns=['Pincode', 'Users'])
-                    fig5 = px.bar(df_pincode, x='Pincode', y='Users',
-                                 title="Top Pincodes by Registered Users")
-                    fig5.update_layout(xaxis_title="Pincode", yaxis_title="Total Users")
-                    fig5.update_xaxes(tickangle=45)
-                    st.plotly_chart(fig5, use_container_width=True)
-                else:
-                    st.warning("No pincode user data found for Chart 5.")
-                
-
-                
-                conn.close()
-                    
-            except Exception as e:
-                st.error(f"Error fetching user data: {e}")
-                if conn:
-                    conn.close()
-        else:
-            st.error("Unable to connect to database.")
-        
-    elif analysis_type == "Transaction Analysis Across States & Districts":
-        st.subheader("🗺️ Geographic Transaction Analysis")
-        st.write("Understanding transaction patterns across different regions of India.")
-
-        conn = connect_to_database()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                
-                # Chart 1: Transaction Volume by State (Bar Chart)
-                st.subheader("📊 Chart 1: Transaction Volume by State")
-                cursor.execute("""
-                    SELECT State, 
-                           SUM(Transaction_count) as total_transactions,
-                           SUM(Transaction_amount) as total_amount
-                    FROM agg_transaction 
-                    GROUP BY State 
-                    ORDER BY total_transactions DESC 
-                    LIMIT 15
-                """)
-                transaction_data = cursor.fetchall()
-                
-                if transaction_data:
-                    df = pd.DataFrame(transaction_data, columns=['State', 'Transaction_Count', 'Transaction_Amount'])
-                    fig = px.bar(df, x='State', y='Transaction_Count', 
-                                title="Transaction Volume by State")
-                    fig.update_layout(xaxis_title="State", yaxis_title="Total Transaction Count")
-                    fig.update_xaxes(tickangle=45)
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.warning("No transaction data found for Chart 1.")
-                     
-                # Chart 2: Transaction Amount by State (Box Plot)
-                st.subheader("💰 Chart 2: Transaction Amount Distribution")
-                if transaction_data:
-                    fig2 = px.box(df, y='Transaction_Amount',
-                                 title="Distribution of Transaction Amounts Across States",
-                                 points="outliers")
-                    fig2.update_layout(yaxis_title="Transaction Amount (₹)")
-                    st.plotly_chart(fig2, use_container_width=True)
-                else:
-                    st.warning("No transaction amount data found for Chart 2.")
-                
-                # Chart 3: Top Transaction Districts (Bar Chart)
-                st.subheader("🏆 Chart 3: Top Districts by Transaction Count")
-                cursor.execute("""
-                    SELECT District, SUM(Count) as total_transactions
-                    FROM map_transaction_hover 
-                    GROUP BY District 
-                    ORDER BY total_transactions DESC 
-                    LIMIT 15
-                """)
-                district_data = cursor.fetchall()
-                
-                if district_data:
-                    df_district = pd.DataFrame(district_data, columns=['District', 'Transactions'])
-                    fig3 = px.bar(df_district, x='District', y='Transactions',
-                                 title="Top Districts by Transaction Count")
-                    fig3.update_layout(xaxis_title="District", yaxis_title="Total Transactions")
-                    fig3.update_xaxes(tickangle=45)
-                    st.plotly_chart(fig3, use_container_width=True)
-                else:
-                    st.warning("No district transaction data found for Chart 3.")
-                
-                # Chart 4: Transaction Amount Distribution (Histogram)
-                st.subheader("📊 Chart 4: Transaction Amount Distribution")
-                if transaction_data:
-                    df = pd.DataFrame(transaction_data, columns=['State', 'Transaction_Count', 'Transaction_Amount'])
-                    fig4 = px.histogram(df, x='Transaction_Amount', nbins=20,
-                                       title="Distribution of Transaction Amounts Across States",
-                                       opacity=0.7)
-                    fig4.update_layout(xaxis_title="Transaction Amount (₹)", yaxis_title="Number of States")
-                    st.plotly_chart(fig4, use_container_width=True)
-                else:
-                    st.warning("No histogram data found for Chart 4.")
-                
-                # Chart 5: Top Transaction Pincodes (Pie Chart)
-                st.subheader("🥧 Chart 5: Top Pincodes by Transaction Count")
-                cursor.execute("""
-                    SELECT Pincode, SUM(Pincode_Count) as total_transactions
-                    FROM top_transaction_pincode 
-                    GROUP BY Pincode 
-                    ORDER BY total_transactions DESC 
-                    LIMIT 10
-                """)
-                pincode_data = cursor.fetchall()
-                
-                if pincode_data:
-                    df_pincode = pd.DataFrame(pincode_data, columns=['Pincode', 'Transactions'])
-                    fig5 = px.pie(df_pincode, values='Transactions', names='Pincode',
-                                 title="Top Pincodes by Transaction Count")
-                    st.plotly_chart(fig5, use_container_width=True)
-                else:
-                    st.warning("No pincode transaction data found for Chart 5.")
-                
-                conn.close()
-                    
-            except Exception as e:
-                st.error(f"Error fetching transaction data: {e}")
-                if conn:
-                    conn.close()
-        else:
-            st.error("Unable to connect to database.")
+    else:
+        render_analysis_page(analysis_type, ANALYSIS_PAGES[analysis_type])
 
 # Footer
 st.markdown("""
@@ -1036,3 +1073,7 @@ st.markdown("""
     </div>
 </div>  
 """, unsafe_allow_html=True)
+
+perf.finish_run(perf_run())
+if show_performance:
+    performance_panel(perf_run())
@@ -0,0 +1,132 @@
+import io
+import os
+import re
+
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "postgres" (default), or "duckdb" for an embedded database file at DUCKDB_PATH with no server
+DB_BACKEND = os.getenv("DB_BACKEND", "postgres")
+DUCKDB_PATH = os.getenv("DUCKDB_PATH", "phonepe.duckdb")
+
+
+def postgres_params():
+    return dict(
+        host=os.getenv("DB_HOST"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT", "5432"),
+    )
+
+
+def connect():
+    """New read-write connection to the configured backend, psycopg2-style for both"""
+    if DB_BACKEND == "duckdb":
+        return DuckDBConnection()
+    return psycopg2.connect(**postgres_params())
+
+
+def copy_frame(cursor, table, df):
+    """Bulk insert df into the table's same-named columns: COPY FROM STDIN as CSV on PostgreSQL,
+    an INSERT ... SELECT over the registered frame on DuckDB"""
+    columns = ", ".join(df.columns)
+    if isinstance(cursor, DuckDBCursor):
+        cursor.insert_frame(table, columns, df)
+        return
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+# --------------------------------DuckDB--------------------------------
+def duckdb_sql(sql):
+    """PostgreSQL dialect used across the repo to DuckDB: %s placeholders and SERIAL ids"""
+    sql = sql.replace("%s", "?")
+    return re.sub(r"\bSERIAL PRIMARY KEY\b", "BIGINT DEFAULT nextval('serial_id') PRIMARY KEY", sql, flags=re.IGNORECASE)
+
+
+def open_duckdb(read_only=False):
+    import duckdb
+
+    db = duckdb.connect(DUCKDB_PATH, read_only=read_only)
+    if not read_only:
+        db.execute("CREATE SEQUENCE IF NOT EXISTS serial_id")
+    return db
+
+
+class DuckDBConnection:
+    """The part of the psycopg2 connection API data_extractor.py uses, over a DuckDB file.
+
+    Like psycopg2, a transaction is opened by the first statement and ended by commit()/rollback().
+    """
+
+    def __init__(self):
+        self.db = open_duckdb()
+        self.in_transaction = False
+        self.closed = False
+
+    def cursor(self):
+        return DuckDBCursor(self)
+
+    def begin(self):
+        if not self.in_transaction:
+            self.db.begin()
+            self.in_transaction = True
+
+    def commit(self):
+        if self.in_transaction:
+            self.db.commit()
+            self.in_transaction = False
+
+    def rollback(self):
+        if self.in_transaction:
+            self.db.rollback()
+            self.in_transaction = False
+
+    def close(self):
+        self.rollback()
+        self.db.close()
+        self.closed = True
+
+
+class DuckDBCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def execute(self, sql, params=None):
+        self.connection.begin()
+        result = self.connection.db.execute(duckdb_sql(sql), params)
+        self.description = result.description
+
+    def executemany(self, sql, rows):
+        self.connection.begin()
+        if rows:
+            self.connection.db.executemany(duckdb_sql(sql), rows)
+
+    def insert_frame(self, table, columns, df):
+        self.connection.begin()
+        self.connection.db.register("insert_frame", df)
+        try:
+            self.connection.db.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM insert_frame")
+        finally:
+            self.connection.db.unregister("insert_frame")
+
+    def fetchone(self):
+        return self.connection.db.fetchone()
+
+    def fetchall(self):
+        return self.connection.db.fetchall()
+
+    def close(self):
+        pass
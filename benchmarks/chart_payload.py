@@ -0,0 +1,164 @@
+"""Payload size and build/render time of the per-state growth charts, before and after Top-K folding.
+
+Each chart is drawn through Streamlit's AppTest harness with every "States shown" option. The
+baseline ("before") is the chart as it was: the long-format per-state query and px.area, serialized
+with plotly.io.to_json as st.plotly_chart does. For each setting it reports the traces and points in
+the figure, the JSON spec shipped to the browser, and the data (query or cube slice), figure build
+and render times (median of --iterations runs), from the app's own perf spans after the change.
+Render is serializing the figure for the browser, not the browser drawing it. Uses the configured
+database, or with --scale a synthetic pulse tree loaded into a scratch DuckDB file, as
+dashboard_latency.py does.
+
+    python benchmarks/chart_payload.py --iterations 5
+    python benchmarks/chart_payload.py --scale 10 --json chart_payload.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from dashboard_latency import APP_PATH, load_scaled_database
+
+# (page, chart index, title, perf span name) of the charts with a "States shown" control. The page's
+# first chart is always drawn too, only the spans named after the measured chart's cube slice count.
+CHARTS = [
+    ("Device Dominance & User Engagement", 4, "User Growth Over Time", "users.Registered_Users"),
+    ("Insurance Penetration & Growth Potential", 4, "Insurance Growth Over Time", "insurance.Insurance_count"),
+]
+
+# (label, States shown) drawn by the app
+SETTINGS = [(f"top {k}", k) for k in [5, 10, 15, 20]] + [("all states", "All")]
+
+BASELINE = "all states (before)"
+
+# title: (table, measure, column, y axis title) of the chart's pre-change query and px.area figure
+BASELINE_CHARTS = {
+    "User Growth Over Time": ("agg_user", "Registered_Users", "Users", "Total Registered Users"),
+    "Insurance Growth Over Time": ("agg_insurance", "Insurance_count", "Insurance_Count", "Total Insurance Count"),
+}
+
+
+def chart_spec(at, title):
+    for chart in at.get("plotly_chart"):
+        if title in chart.proto.spec:
+            return chart.proto.spec
+    raise RuntimeError(f"{title} was not drawn: {[e.value for e in at.exception] + [e.value for e in at.error]}")
+
+
+def figure_stats(spec):
+    figure = json.loads(spec)
+    return {
+        "traces": len(figure["data"]),
+        "points": sum(len(trace.get("x", [])) for trace in figure["data"]),
+        "webgl": any(trace["type"] == "scattergl" for trace in figure["data"]),
+        "spec_bytes": len(spec.encode()),
+    }
+
+
+def measure_baseline(title, iterations):
+    import plotly.express as px
+    import plotly.io as pio
+    from queries import run_query
+
+    table, measure, column, yaxis_title = BASELINE_CHARTS[title]
+    sql = f"""
+        SELECT Year, Quarter, State, SUM({measure})
+        FROM {table}
+        GROUP BY Year, Quarter, State
+        ORDER BY Year, Quarter
+    """
+    timings = {"data": [], "figure": [], "render": []}
+    for _ in range(iterations):
+        start = time.perf_counter()
+        df = run_query(sql, ["Year", "Quarter", "State", column])
+        built = time.perf_counter()
+        df["Period"] = df["Year"].astype(str) + " Q" + df["Quarter"].astype(str)
+        fig = px.area(df, x="Period", y=column, color="State", title=f"{title} (Stacked by State)")
+        fig.update_layout(xaxis_title="Year-Quarter", yaxis_title=yaxis_title)
+        drawn = time.perf_counter()
+        spec = pio.to_json(fig, validate=False)
+        timings["data"].append((built - start) * 1000)
+        timings["figure"].append((drawn - built) * 1000)
+        timings["render"].append((time.perf_counter() - drawn) * 1000)
+    return dict(figure_stats(spec), **{f"{kind}_ms": float(np.median(ms)) for kind, ms in timings.items()})
+
+
+def measure(at, page, index, title, span_name, top, iterations):
+    timings = {"data": [], "figure": [], "render": []}
+    for _ in range(iterations):
+        at.session_state["opened_charts"] = {(page, index)}
+        at.session_state[f"top_k_{page}_{index}"] = top
+        at.run()
+        spec = chart_spec(at, title)
+        # One cube slice, figure and render span of this chart per run
+        spans = {("data" if span["kind"] == "cube" else span["kind"]): span["ms"]
+                 for span in at.session_state["perf_run"]["spans"] if span["name"] == span_name}
+        if sorted(spans) != sorted(timings):
+            raise RuntimeError(f"{title}: expected {sorted(timings)} spans named {span_name}, got {sorted(spans)}")
+        for kind, ms in spans.items():
+            timings[kind].append(ms)
+    return dict(figure_stats(spec), **{f"{kind}_ms": float(np.median(ms)) for kind, ms in timings.items()})
+
+
+def run(iterations):
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    for page, index, title, span_name in CHARTS:
+        at = AppTest.from_file(APP_PATH, default_timeout=120)
+        at.run()
+        at.sidebar.selectbox[0].select("📊 Analysis").run()
+        at.selectbox[0].select(page).run()
+        results[title] = {BASELINE: measure_baseline(title, iterations)}
+        results[title].update({label: measure(at, page, index, title, span_name, top, iterations)
+                               for label, top in SETTINGS})
+    return results
+
+
+def print_results(results):
+    for title, settings in results.items():
+        print(f"\n{title}")
+        print(f"{'setting':<26}{'traces':>8}{'points':>9}{'webgl':>7}{'spec KB':>10}{'data ms':>9}"
+              f"{'figure ms':>11}{'render ms':>11}")
+        for label, r in settings.items():
+            print(f"{label:<26}{r['traces']:>8}{r['points']:>9,}{'yes' if r['webgl'] else 'no':>7}"
+                  f"{r['spec_bytes'] / 1024:>10.1f}{r['data_ms']:>9.1f}{r['figure_ms']:>11.1f}{r['render_ms']:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5, help="runs per chart and setting")
+    parser.add_argument("--scale", type=int, help="load a synthetic tree of this scale into a scratch DuckDB file")
+    parser.add_argument("--states", type=int, default=36, help="states in the synthetic tree")
+    parser.add_argument("--years", type=int, default=7, help="years in the synthetic tree")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    work_dir = None
+    if args.scale:
+        work_dir = tempfile.mkdtemp(prefix="chart_payload_")
+        start = time.perf_counter()
+        load_scaled_database(work_dir, args.scale, args.states, args.years)
+        print(f"Loaded a {args.scale}x synthetic tree in {time.perf_counter() - start:.1f}s")
+    try:
+        results = run(args.iterations)
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
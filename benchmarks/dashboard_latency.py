@@ -0,0 +1,375 @@
+"""Headless latency benchmark of the dashboard: the Home page and every analysis page, with all charts open.
+
+--driver app (default) runs app.py in Streamlit's AppTest harness, as a browser session would: each
+page load is one script run, so page latency includes queries, pandas and Plotly figure building.
+--driver queries replays the queries each page issued in that run straight on queries.py (the
+analysis pages through fetch_concurrently, as the app does), timing the data layer alone.
+
+Every query is recorded with its latency, rows and DataFrame bytes, and the pool is wrapped to count
+connection checkouts (PostgreSQL) or cursors (DuckDB) and the connections opened. --concurrency runs
+that many sessions in parallel: threads sharing one pool for the queries driver, like one Streamlit
+server; processes for the app driver, as AppTest only runs one session per process, so each has its
+own pool and caches. The configured database is used as is, or with --scale a synthetic pulse tree
+of that size (pulse_tree.py) is loaded into a scratch DuckDB file first.
+
+    python benchmarks/dashboard_latency.py --iterations 20 --concurrency 4
+    python benchmarks/dashboard_latency.py --scale 10 --driver queries --json latency.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+HOME = "Home"
+HOME_FILTER = "Home (filter change)"
+
+
+class Recorder:
+    """Query timings, rows and connection counts, shared by every session thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = []
+        self.pages = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.checkouts = 0
+        self.peak_connections = 0
+
+    def query(self, name, ms, df):
+        with self.lock:
+            self.queries.append((name, ms, len(df), int(df.memory_usage(deep=True).sum())))
+
+    def page(self, name, ms, errors=0):
+        with self.lock:
+            self.pages[name].append(ms)
+            self.errors[name] += errors
+
+    def checkout(self, opened):
+        with self.lock:
+            self.checkouts += 1
+            self.peak_connections = max(self.peak_connections, opened)
+
+    def state(self):
+        return {"queries": self.queries, "pages": dict(self.pages), "errors": dict(self.errors),
+                "checkouts": self.checkouts, "peak_connections": self.peak_connections}
+
+    def merge(self, state):
+        """Add another process's recording; its connections were open alongside this one's"""
+        self.queries.extend(state["queries"])
+        for page, timings in state["pages"].items():
+            self.pages[page].extend(timings)
+        for page, errors in state["errors"].items():
+            self.errors[page] += errors
+        self.checkouts += state["checkouts"]
+        self.peak_connections += state["peak_connections"]
+
+
+class CountingPool:
+    """queries.get_pool()'s pool (or DuckDB connection), counting checkouts and connections"""
+
+    def __init__(self, pool, recorder):
+        self.pool = pool
+        self.recorder = recorder
+        self.cursors = 0
+        self.lock = threading.Lock()
+
+    def getconn(self, *args, **kwargs):
+        conn = self.pool.getconn(*args, **kwargs)
+        # ThreadedConnectionPool keeps idle connections in _pool and checked out ones in _used
+        self.recorder.checkout(len(self.pool._pool) + len(self.pool._used))
+        return conn
+
+    def cursor(self):
+        # Each DuckDB cursor is its own connection to the database file, closed after the query
+        with self.lock:
+            self.cursors += 1
+            opened = self.cursors
+        cursor = self.pool.cursor()
+        self.recorder.checkout(opened)
+        original_close = cursor.close
+
+        def close():
+            with self.lock:
+                self.cursors -= 1
+            original_close()
+
+        return ClosingCursor(cursor, close)
+
+    def __getattr__(self, name):
+        return getattr(self.pool, name)
+
+
+class ClosingCursor:
+    def __init__(self, cursor, close):
+        self.cursor = cursor
+        self.close = close
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+def instrument(queries, recorder):
+    """Record every fetch_query and count pool use; app.py re-imports these names on each script run"""
+    fetch_query = queries.fetch_query
+    pool = CountingPool(queries.get_pool(), recorder)
+
+    def timed_fetch_query(name, params=None):
+        start = time.perf_counter()
+        df = fetch_query(name, params)
+        recorder.query(name, (time.perf_counter() - start) * 1000, df)
+        return df
+
+    queries.fetch_query = timed_fetch_query
+    queries.get_pool = lambda: pool
+
+
+def page_errors(at):
+    return len(at.exception) + len(at.error)
+
+
+def timed_run(at, recorder, page, fail_fast):
+    start = time.perf_counter()
+    at.run()
+    recorder.page(page, (time.perf_counter() - start) * 1000, page_errors(at))
+    if fail_fast and page_errors(at):
+        raise RuntimeError(f"{page}: {[e.value for e in at.exception] + [e.value for e in at.error]}")
+
+
+def app_session(recorder, pages, iterations, no_cache, fail_fast):
+    """One browser session: Home, a filter change, then each analysis page with every chart opened"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    for iteration in range(iterations):
+        if no_cache:
+            st.cache_data.clear()
+        if iteration:
+            at.sidebar.selectbox[0].select("🏠 Home")
+        timed_run(at, recorder, HOME, fail_fast)
+
+        quarters = at.selectbox(key="home_quarter").options
+        if len(quarters) > 1:
+            quarter = at.selectbox(key="home_quarter")
+            quarter.select(quarters[1] if quarter.value == quarters[0] else quarters[0])
+            timed_run(at, recorder, HOME_FILTER, fail_fast)
+
+        at.sidebar.selectbox[0].select("📊 Analysis").run()
+        for page in pages:
+            at.session_state["opened_charts"] = {(page, i) for i in range(pages[page][0])}
+            at.selectbox[0].select(page)
+            timed_run(at, recorder, page, fail_fast)
+
+
+def app_worker(pages, iterations, no_cache, fail_fast):
+    """An app_session in its own process, returning the recording"""
+    import queries
+
+    recorder = Recorder()
+    instrument(queries, recorder)
+    app_session(recorder, pages, iterations, no_cache, fail_fast)
+    return recorder.state()
+
+
+def run_app_sessions(recorder, concurrency, *args):
+    # By module name: AppTest runs app.py as __main__, so the workers can't find this script under it
+    from dashboard_latency import app_worker
+
+    with ProcessPoolExecutor(max_workers=concurrency, mp_context=get_context("spawn")) as executor:
+        futures = [executor.submit(app_worker, *args) for _ in range(concurrency)]
+        for future in futures:
+            recorder.merge(future.result())
+
+
+def discover_pages():
+    """Page name: (number of charts, the (query, params) calls it makes), from one recorded app run"""
+    import queries
+    from streamlit.testing.v1 import AppTest
+
+    calls = []
+    fetch_query = queries.fetch_query
+
+    def recording_fetch_query(name, params=None):
+        calls.append((name, params))
+        return fetch_query(name, params)
+
+    queries.fetch_query = recording_fetch_query
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=120)
+        at.run()
+        pages = {HOME: (0, list(calls))}
+        at.sidebar.selectbox[0].select("📊 Analysis").run()
+        for page in at.selectbox[0].options[1:]:
+            # Open the first chart, then every other one the page offers
+            at.selectbox[0].select(page).run()
+            charts = len(at.button) + 1
+            at.session_state["opened_charts"] = {(page, i) for i in range(charts)}
+            calls.clear()
+            at.run()
+            pages[page] = (charts, list(dict.fromkeys(calls)))
+    finally:
+        queries.fetch_query = fetch_query
+    return pages
+
+
+def queries_session(recorder, pages, iterations):
+    import queries
+
+    for _ in range(iterations):
+        for page, (_, calls) in pages.items():
+            start = time.perf_counter()
+            errors = 0
+            if page == HOME:
+                for name, params in calls:
+                    queries.fetch_query(name, params)
+            else:
+                # The analysis pages fetch their charts' queries concurrently on the pool
+                for _, _, error in queries.fetch_concurrently([name for name, _ in calls]):
+                    errors += error is not None
+            recorder.page(page, (time.perf_counter() - start) * 1000, errors)
+
+
+def run_sessions(target, concurrency, *args):
+    errors = []
+
+    def session():
+        try:
+            target(*args)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=session, name=f"session-{n}") for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def percentiles(timings):
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {"n": len(timings), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+
+
+def summarize(recorder, wall_seconds, args):
+    pages = {page: dict(percentiles(timings), errors=recorder.errors[page])
+             for page, timings in recorder.pages.items()}
+    per_query = defaultdict(list)
+    for name, ms, rows, size in recorder.queries:
+        per_query[name].append((ms, rows, size))
+    charts = {
+        name: dict(percentiles([ms for ms, _, _ in calls]),
+                   rows=sum(rows for _, rows, _ in calls), bytes=sum(size for _, _, size in calls))
+        for name, calls in per_query.items()
+    }
+    return {
+        "driver": args.driver,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "scale": args.scale,
+        "wall_seconds": wall_seconds,
+        "pages": pages,
+        "charts": charts,
+        "queries": len(recorder.queries),
+        "rows_transferred": sum(rows for _, _, rows, _ in recorder.queries),
+        "bytes_transferred": sum(size for _, _, _, size in recorder.queries),
+        "connection_checkouts": recorder.checkouts,
+        "peak_connections": recorder.peak_connections,
+    }
+
+
+def print_summary(results):
+    header = f"{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(f"\n{'page':<48}{header}{'errors':>8}")
+    for page, stats in results["pages"].items():
+        print(f"{page:<48}{stats['n']:>6}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+              f"{stats['errors']:>8}")
+
+    print(f"\n{'chart query':<48}{header}{'rows':>12}{'MB':>8}")
+    for name, stats in sorted(results["charts"].items()):
+        print(f"{name:<48}{stats['n']:>6}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+              f"{stats['rows']:>12,}{stats['bytes'] / 1e6:>8.1f}")
+
+    print(f"\n{results['queries']:,} queries, {results['rows_transferred']:,} rows "
+          f"({results['bytes_transferred'] / 1e6:.1f} MB) in {results['wall_seconds']:.1f}s; "
+          f"{results['connection_checkouts']:,} connection checkouts, "
+          f"at most {results['peak_connections']} connections open")
+
+
+def load_scaled_database(work_dir, scale, states, years):
+    """A scratch DuckDB file loaded from a synthetic tree; set up before queries.py is imported"""
+    from pulse_tree import generate
+
+    root = os.path.join(work_dir, "data")
+    generate(root, scale, states, years)
+    os.environ["DB_BACKEND"] = "duckdb"
+    os.environ["DUCKDB_PATH"] = os.path.join(work_dir, "dashboard_latency.duckdb")
+    import data_extractor
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_extractor.main(data_extractor.parse_args(["--data-root", root, "--no-parquet"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--driver", choices=["app", "queries"], default="app")
+    parser.add_argument("--iterations", type=int, default=10, help="passes over every page, per session")
+    parser.add_argument("--concurrency", type=int, default=1, help="sessions running in parallel")
+    parser.add_argument("--scale", type=int, help="load a synthetic tree of this scale into a scratch DuckDB file")
+    parser.add_argument("--states", type=int, default=36, help="states in the synthetic tree")
+    parser.add_argument("--years", type=int, default=7, help="years in the synthetic tree")
+    parser.add_argument("--no-cache", action="store_true", help="clear st.cache_data before every Home run")
+    parser.add_argument("--fail-fast", action="store_true", help="stop at the first page that shows an error")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    work_dir = None
+    if args.scale:
+        work_dir = tempfile.mkdtemp(prefix="dashboard_latency_")
+        start = time.perf_counter()
+        load_scaled_database(work_dir, args.scale, args.states, args.years)
+        print(f"Loaded a {args.scale}x synthetic tree in {time.perf_counter() - start:.1f}s")
+
+    try:
+        import queries
+
+        pages = discover_pages()
+        recorder = Recorder()
+        start = time.perf_counter()
+        if args.driver == "app":
+            analysis_pages = {page: charts for page, charts in pages.items() if page != HOME}
+            run_app_sessions(recorder, args.concurrency, analysis_pages, args.iterations,
+                             args.no_cache, args.fail_fast)
+        else:
+            instrument(queries, recorder)
+            run_sessions(queries_session, args.concurrency, recorder, pages, args.iterations)
+        results = summarize(recorder, time.perf_counter() - start, args)
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_summary(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
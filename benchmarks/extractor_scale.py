@@ -0,0 +1,148 @@
+"""Time every data_extractor.py extractor on synthetic pulse trees at increasing scale.
+
+For each --scales multiplier a tree is written with pulse_tree.py, then each extractor is timed in
+four phases: walk (listing the [state/]year/quarter files), parse (json.load of every file), build
+(the rest of the extractor: rows, DataFrame, dtypes) and load (its create table and save functions).
+Walk and parse are timed on their own; build is the extractor's total minus those two.
+
+Loads go to a scratch DuckDB file next to the tree, or with --backend postgres to the DB_* database,
+whose tables are replaced. The results are written as a JSON baseline, and --compare prints the
+ratio of each phase to an earlier baseline.
+
+    python benchmarks/extractor_scale.py --scales 1 10 100 --json baseline.json
+    python benchmarks/extractor_scale.py --scales 1 10 100 --compare baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pulse_tree import STATES, generate
+
+PHASES = ["walk", "parse", "build", "load"]
+
+
+def walk(path):
+    if path.endswith("state"):
+        year_paths = [os.path.join(path, state, year)
+                      for state in os.listdir(path) for year in os.listdir(os.path.join(path, state))]
+    else:
+        # A country-level dataset: country/india/<year>, next to the state/ subtree
+        year_paths = [os.path.join(path, year) for year in os.listdir(path) if year.isdigit()]
+    return [os.path.join(year_path, name) for year_path in year_paths for name in os.listdir(year_path)]
+
+
+def parse(files):
+    for file_path in files:
+        with open(file_path) as f:
+            json.load(f)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    # The extractors and save functions report progress per dataset, keep the table readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_scale(data_extractor, root, no_load):
+    data_extractor.DATA_ROOT = root
+    results = {}
+    for extractor, (create, save, _) in data_extractor.EXTRACTOR_LOADERS.items():
+        path = os.path.join(root, data_extractor.EXTRACTOR_PATHS[extractor])
+        files, walk_ms = timed(walk, path)
+        _, parse_ms = timed(parse, files)
+        result, extract_ms = timed(extractor)
+        frames = result if isinstance(result, tuple) else (result,)
+        timing = {
+            "files": len(files),
+            "rows": sum(len(df) for df in frames),
+            "walk_ms": walk_ms,
+            "parse_ms": parse_ms,
+            "build_ms": max(extract_ms - walk_ms - parse_ms, 0.0),
+            "load_ms": None,
+        }
+        if not no_load:
+            conn = data_extractor.connect()
+            try:
+                (created, save_ok), load_ms = timed(lambda: (create(conn), save(*frames, conn)))
+            finally:
+                conn.close()
+            if not (created and save_ok):
+                raise RuntimeError(f"{extractor.__name__}: loading failed, run data_extractor.py to see why")
+            timing["load_ms"] = load_ms
+        results[extractor.__name__] = timing
+    return results
+
+
+def print_scale(scale, results, baseline):
+    print(f"\nscale {scale}x")
+    print(f"{'extractor':<28}{'files':>8}{'rows':>11}" + "".join(f"{phase + ' ms':>11}" for phase in PHASES))
+    for name, timing in results.items():
+        line = f"{name:<28}{timing['files']:>8,}{timing['rows']:>11,}"
+        for phase in PHASES:
+            ms = timing[f"{phase}_ms"]
+            line += f"{'-':>11}" if ms is None else f"{ms:>11.1f}"
+        print(line)
+        if baseline and name in baseline:
+            ratios = ""
+            for phase in PHASES:
+                ms, before = timing[f"{phase}_ms"], baseline[name][f"{phase}_ms"]
+                ratios += f"{'-':>11}" if not (ms and before) else f"{ms / before:>10.2f}x"
+            print(f"{'  vs baseline':<47}{ratios}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--states", type=int, default=len(STATES))
+    parser.add_argument("--years", type=int, default=7)
+    parser.add_argument("--backend", choices=["duckdb", "postgres"], default="duckdb",
+                        help="where to time the loads: a scratch DuckDB file (default), or the DB_* PostgreSQL database")
+    parser.add_argument("--no-load", action="store_true", help="only time walk, parse and build")
+    parser.add_argument("--work-dir", help="write the trees here and keep them (default: a temporary directory)")
+    parser.add_argument("--json", default="extractor_scale.json", help="baseline file to write (default %(default)s)")
+    parser.add_argument("--compare", help="an earlier baseline to compare each phase against")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="pulse_scale_")
+    os.makedirs(work_dir, exist_ok=True)
+    # backends.py reads these when data_extractor imports it
+    os.environ["DB_BACKEND"] = args.backend
+    os.environ["DUCKDB_PATH"] = os.path.join(work_dir, "extractor_scale.duckdb")
+    import data_extractor
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["scales"]
+
+    results = {"states": args.states, "years": args.years, "backend": args.backend, "scales": {}}
+    try:
+        for scale in args.scales:
+            root = os.path.join(work_dir, f"scale_{scale}")
+            if not os.path.exists(root):
+                start = time.perf_counter()
+                files = generate(root, scale, args.states, args.years)
+                print(f"Wrote {files:,} files for scale {scale}x in {time.perf_counter() - start:.1f}s")
+            results["scales"][str(scale)] = run_scale(data_extractor, root, args.no_load)
+            print_scale(scale, results["scales"][str(scale)], baseline.get(str(scale)))
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.json, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
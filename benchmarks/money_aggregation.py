@@ -0,0 +1,93 @@
+"""SUM / GROUP BY cost of NUMERIC(30,2) rupee amounts vs BIGINT paise amounts.
+
+Loads the same synthetic amounts into two temporary tables, one per representation, and times
+the dashboard-style aggregations on each with EXPLAIN ANALYZE (server execution time only).
+
+    python benchmarks/money_aggregation.py --rows 1000000 --repeat 7
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from queries import get_pool
+
+TABLES = {
+    "numeric": "bench_money_numeric",
+    "paise": "bench_money_paise",
+}
+
+AGGREGATIONS = {
+    "sum": "SELECT SUM(amount) FROM {table}",
+    "group_by_state": "SELECT state, SUM(amount) FROM {table} GROUP BY state",
+    "group_by_state_period": "SELECT state, year, quarter, SUM(amount) FROM {table} GROUP BY state, year, quarter",
+}
+
+
+def create_tables(cursor, rows):
+    cursor.execute("SELECT setseed(0.42)")
+    cursor.execute(f"""
+        CREATE TEMP TABLE {TABLES['numeric']} AS
+        SELECT (random() * 35)::int as state,
+               2018 + (random() * 6)::int as year,
+               1 + (random() * 3)::int as quarter,
+               round((random() * 1e9)::numeric, 2)::numeric(30,2) as amount
+        FROM generate_series(1, %s)
+    """, (rows,))
+    cursor.execute(f"""
+        CREATE TEMP TABLE {TABLES['paise']} AS
+        SELECT state, year, quarter, (amount * 100)::bigint as amount
+        FROM {TABLES['numeric']}
+    """)
+    for table in TABLES.values():
+        cursor.execute(f"ANALYZE {table}")
+
+
+def execution_ms(cursor, sql):
+    cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Execution Time"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    db_pool = get_pool()
+    conn = db_pool.getconn()
+    results = {"rows": args.rows, "repeat": args.repeat, "median_ms": {}}
+    try:
+        cursor = conn.cursor()
+        print(f"Creating {args.rows:,} row benchmark tables...")
+        create_tables(cursor, args.rows)
+
+        print(f"\n{'aggregation':<24}{'numeric ms':>12}{'paise ms':>12}{'speedup':>10}")
+        for name, sql in AGGREGATIONS.items():
+            timings = {}
+            for kind, table in TABLES.items():
+                query = sql.format(table=table)
+                execution_ms(cursor, query)  # warm up
+                timings[kind] = statistics.median(execution_ms(cursor, query) for _ in range(args.repeat))
+            results["median_ms"][name] = timings
+            print(f"{name:<24}{timings['numeric']:>12.1f}{timings['paise']:>12.1f}"
+                  f"{timings['numeric'] / timings['paise']:>9.2f}x")
+    finally:
+        conn.rollback()
+        db_pool.putconn(conn)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Write a synthetic PhonePe Pulse JSON tree, in the same layout and JSON shapes as the data/ submodule.
+
+Every state-level dataset data_extractor.py reads (aggregated, map hover, top, and the map/insurance
+lat/lng points) gets one file per state, year and quarter, and the aggregated and top datasets one
+country-level file per year and quarter, with the national totals and top lists of those states. At --scale 1 the tree is about the size
+of the real one: 36 states, 7 years, ~20 districts per state, 10 top districts and pincodes, 11 device
+brands. --scale multiplies the districts, pincodes and brands in every file, so the row counts the
+extractors handle grow with it while the number of files stays the same; --years adds periods instead.
+
+    python benchmarks/pulse_tree.py /tmp/pulse --scale 10
+    DATA_ROOT=/tmp/pulse python data_extractor.py
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+STATES = [
+    "andaman-&-nicobar-islands", "andhra-pradesh", "arunachal-pradesh", "assam", "bihar", "chandigarh",
+    "chhattisgarh", "dadra-&-nagar-haveli-&-daman-&-diu", "delhi", "goa", "gujarat", "haryana",
+    "himachal-pradesh", "jammu-&-kashmir", "jharkhand", "karnataka", "kerala", "ladakh", "lakshadweep",
+    "madhya-pradesh", "maharashtra", "manipur", "meghalaya", "mizoram", "nagaland", "odisha", "puducherry",
+    "punjab", "rajasthan", "sikkim", "tamil-nadu", "telangana", "tripura", "uttar-pradesh", "uttarakhand",
+    "west-bengal",
+]
+
+TRANSACTION_TYPES = ["Recharge & bill payments", "Peer-to-peer payments", "Merchant payments",
+                     "Financial Services", "Others"]
+
+BRANDS = ["Xiaomi", "Samsung", "Vivo", "Oppo", "OnePlus", "Realme", "Apple", "Motorola", "Lenovo", "Huawei", "Others"]
+
+FIRST_YEAR = 2018
+
+# entries per file at --scale 1
+DISTRICTS = 20
+TOP_ENTRIES = 10
+MAP_POINTS = 50
+
+# usersByDevice is null in the real tree from this period on
+LAST_DEVICE_PERIOD = (2022, 1)
+
+
+def quarter_range(year, quarter):
+    """Epoch milliseconds of a quarter's first and last day, as the "from"/"to" of aggregated files"""
+    start = int(time.mktime((year, 3 * quarter - 2, 1, 0, 0, 0, 0, 0, -1))) * 1000
+    end = int(time.mktime((year + quarter // 4, 3 * quarter % 12 + 1, 1, 0, 0, 0, 0, 0, -1))) * 1000 - 86400000
+    return start, end
+
+
+def envelope(data):
+    return {"success": True, "code": "SUCCESS", "data": data, "responseTimestamp": 1700000000000}
+
+
+def total_metric(rng, count_max, amount_max):
+    return {"type": "TOTAL", "count": rng.randint(1, count_max), "amount": rng.random() * amount_max}
+
+
+def district_names(state, count):
+    return [f"{state.replace('-', ' ')} {n} district" for n in range(count)]
+
+
+def pincodes(state_index, count):
+    return [str(100000 + state_index * 20000 + n) for n in range(count)]
+
+
+def brand_names(scale):
+    return [brand if copy == 0 else f"{brand} {copy}" for copy in range(scale) for brand in BRANDS]
+
+
+def aggregated_transaction(rng, year, quarter):
+    start, end = quarter_range(year, quarter)
+    return envelope({
+        "from": start,
+        "to": end,
+        "transactionData": [
+            {"name": name, "paymentInstruments": [total_metric(rng, 10**8, 1e11)]} for name in TRANSACTION_TYPES
+        ],
+    })
+
+
+def aggregated_insurance(rng, year, quarter):
+    start, end = quarter_range(year, quarter)
+    return envelope({
+        "from": start,
+        "to": end,
+        "transactionData": [{"name": "Insurance", "paymentInstruments": [total_metric(rng, 10**5, 1e9)]}],
+    })
+
+
+def aggregated_user(rng, year, quarter, scale):
+    devices = None
+    if (year, quarter) <= LAST_DEVICE_PERIOD:
+        devices = [{"brand": brand, "count": rng.randint(1, 10**6), "percentage": rng.random()}
+                   for brand in brand_names(scale)]
+    return envelope({
+        "aggregated": {"registeredUsers": rng.randint(1, 10**8), "appOpens": rng.randint(0, 10**9)},
+        "usersByDevice": devices,
+    })
+
+
+def map_hover(rng, districts, count_max, amount_max):
+    return envelope({
+        "hoverDataList": [{"name": name, "metric": [total_metric(rng, count_max, amount_max)]} for name in districts],
+    })
+
+
+def map_user_hover(rng, districts):
+    return envelope({
+        "hoverData": {name: {"registeredUsers": rng.randint(1, 10**7), "appOpens": rng.randint(0, 10**8)}
+                      for name in districts},
+    })
+
+
+def map_insurance_points(rng, count):
+    return envelope({
+        "data": {
+            "columns": ["lat", "lng", "metric", "label"],
+            "data": [[8 + rng.random() * 27, 68 + rng.random() * 29, rng.randint(1, 100), ""] for _ in range(count)],
+        },
+    })
+
+
+def top_metric(rng, districts, pins, count_max, amount_max):
+    return envelope({
+        "states": None,
+        "districts": [{"entityName": name, "metric": total_metric(rng, count_max, amount_max)} for name in districts],
+        "pincodes": [{"entityName": pin, "metric": total_metric(rng, count_max // 10, amount_max / 10)} for pin in pins],
+    })
+
+
+def top_user(rng, districts, pins):
+    return envelope({
+        "states": None,
+        "districts": [{"name": name, "registeredUsers": rng.randint(1, 10**7)} for name in districts],
+        "pincodes": [{"name": pin, "registeredUsers": rng.randint(1, 10**6)} for pin in pins],
+    })
+
+
+def country_aggregated(period, dataset, year, quarter):
+    """Sum of the states' transactionData entries, by name"""
+    totals = {}
+    for _, datasets in period:
+        for entry in datasets[dataset]["data"]["transactionData"]:
+            metric = entry["paymentInstruments"][0]
+            count, amount = totals.get(entry["name"], (0, 0.0))
+            totals[entry["name"]] = (count + metric["count"], amount + metric["amount"])
+    start, end = quarter_range(year, quarter)
+    return envelope({
+        "from": start,
+        "to": end,
+        "transactionData": [
+            {"name": name, "paymentInstruments": [{"type": "TOTAL", "count": count, "amount": amount}]}
+            for name, (count, amount) in totals.items()
+        ],
+    })
+
+
+def country_user(period):
+    users = sum(datasets["aggregated/user"]["data"]["aggregated"]["registeredUsers"] for _, datasets in period)
+    opens = sum(datasets["aggregated/user"]["data"]["aggregated"]["appOpens"] for _, datasets in period)
+    brands = {}
+    for _, datasets in period:
+        for device in datasets["aggregated/user"]["data"]["usersByDevice"] or []:
+            brands[device["brand"]] = brands.get(device["brand"], 0) + device["count"]
+    total = sum(brands.values())
+    devices = [{"brand": brand, "count": count, "percentage": count / total} for brand, count in brands.items()]
+    return envelope({
+        "aggregated": {"registeredUsers": users, "appOpens": opens},
+        "usersByDevice": devices or None,
+    })
+
+
+def ranked(entries, value, count):
+    return sorted(entries, key=value, reverse=True)[:count]
+
+
+def country_top_metric(period, dataset, entries):
+    states = []
+    for state, datasets in period:
+        districts = datasets[dataset]["data"]["districts"]
+        states.append({"entityName": state, "metric": {
+            "type": "TOTAL",
+            "count": sum(d["metric"]["count"] for d in districts),
+            "amount": sum(d["metric"]["amount"] for d in districts),
+        }})
+    by_count = lambda entry: entry["metric"]["count"]
+    return envelope({
+        "states": ranked(states, by_count, TOP_ENTRIES),
+        "districts": ranked([d for _, ds in period for d in ds[dataset]["data"]["districts"]], by_count, entries),
+        "pincodes": ranked([p for _, ds in period for p in ds[dataset]["data"]["pincodes"]], by_count, entries),
+    })
+
+
+def country_top_user(period, entries):
+    states = [
+        {"name": state, "registeredUsers": sum(d["registeredUsers"] for d in datasets["top/user"]["data"]["districts"])}
+        for state, datasets in period
+    ]
+    by_users = lambda entry: entry["registeredUsers"]
+    return envelope({
+        "states": ranked(states, by_users, TOP_ENTRIES),
+        "districts": ranked([d for _, ds in period for d in ds["top/user"]["data"]["districts"]], by_users, entries),
+        "pincodes": ranked([p for _, ds in period for p in ds["top/user"]["data"]["pincodes"]], by_users, entries),
+    })
+
+
+def country_datasets(period, year, quarter, entries):
+    """The country-level files of a period, from its [(state, datasets)]"""
+    return {
+        "aggregated/transaction": country_aggregated(period, "aggregated/transaction", year, quarter),
+        "aggregated/insurance": country_aggregated(period, "aggregated/insurance", year, quarter),
+        "aggregated/user": country_user(period),
+        "top/transaction": country_top_metric(period, "top/transaction", entries),
+        "top/insurance": country_top_metric(period, "top/insurance", entries),
+        "top/user": country_top_user(period, entries),
+    }
+
+
+def write_json(root, dataset, state, year, quarter, data):
+    """Write a state file, or with state None the country file of the period"""
+    path = os.path.join(root, dataset, "country/india", *(["state", state] if state else []), str(year))
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, f"{quarter}.json"), "w") as f:
+        json.dump(data, f)
+
+
+def generate(root, scale=1, states=len(STATES), years=7, seed=0):
+    """Write the tree under root and return the number of files written"""
+    rng = random.Random(seed)
+    files = 0
+    entities = []
+    for state_index, state in enumerate(STATES[:states]):
+        districts = district_names(state, DISTRICTS * scale)
+        entities.append((state, districts, districts[:TOP_ENTRIES * scale], pincodes(state_index, TOP_ENTRIES * scale)))
+    for year in range(FIRST_YEAR, FIRST_YEAR + years):
+        for quarter in range(1, 5):
+            period = []
+            for state, districts, top_districts, top_pincodes in entities:
+                datasets = {
+                    "aggregated/transaction": aggregated_transaction(rng, year, quarter),
+                    "aggregated/insurance": aggregated_insurance(rng, year, quarter),
+                    "aggregated/user": aggregated_user(rng, year, quarter, scale),
+                    "map/transaction/hover": map_hover(rng, districts, 10**7, 1e10),
+                    "map/insurance/hover": map_hover(rng, districts, 10**4, 1e8),
+                    "map/user/hover": map_user_hover(rng, districts),
+                    "map/insurance": map_insurance_points(rng, MAP_POINTS * scale),
+                    "top/transaction": top_metric(rng, top_districts, top_pincodes, 10**7, 1e10),
+                    "top/insurance": top_metric(rng, top_districts, top_pincodes, 10**4, 1e8),
+                    "top/user": top_user(rng, top_districts, top_pincodes),
+                }
+                for dataset, data in datasets.items():
+                    write_json(root, dataset, state, year, quarter, data)
+                files += len(datasets)
+                period.append((state, datasets))
+            country = country_datasets(period, year, quarter, TOP_ENTRIES * scale)
+            for dataset, data in country.items():
+                write_json(root, dataset, None, year, quarter, data)
+            files += len(country)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="directory to write the tree into (the equivalent of data/)")
+    parser.add_argument("--scale", type=int, default=1, help="multiplier for districts, pincodes and brands per file")
+    parser.add_argument("--states", type=int, default=len(STATES), help=f"number of states, at most {len(STATES)}")
+    parser.add_argument("--years", type=int, default=7, help=f"number of years from {FIRST_YEAR}")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    files = generate(args.root, args.scale, args.states, args.years, args.seed)
+    print(f"Wrote {files:,} files to {args.root} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
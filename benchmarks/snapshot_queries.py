@@ -0,0 +1,113 @@
+"""Check every dashboard query answered from the in-memory snapshot against PostgreSQL, and time both.
+
+Runs each QUERIES entry through the SQL path and through snapshot.py, compares the DataFrames
+(same columns, dtypes and values; floats to 1e-12 relative, rows order-insensitive) and reports
+the median latency of each path: the SQL round trip, the snapshot computation itself, and what
+a chart actually waits for (answer_query, where everything but the Home filter queries is precomputed).
+
+    python benchmarks/snapshot_queries.py --repeat 7
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from queries import QUERIES, run_query
+from snapshot import SNAPSHOT_QUERIES, answer_query, get_tables
+
+
+def query_params(name, year):
+    if name.startswith("home_quarters"):
+        return (year,)
+    if name.startswith(("home_map", "home_top")):
+        return (year, 1)
+    return QUERIES[name].get("params")
+
+
+def sql_query(name, params):
+    # Always the database, whatever QUERY_MODE is set to
+    query = QUERIES[name]
+    return run_query(query["sql"], query["columns"], params,
+                     dtypes=query.get("dtypes"), copy=query.get("copy", True))
+
+
+def comparable(df):
+    df = df.copy()
+    if "Outliers" in df.columns:
+        df["Outliers"] = df["Outliers"].apply(sorted).apply(tuple)
+    return df.sort_values(list(df.columns), kind="stable").reset_index(drop=True)
+
+
+def same_result(sql_df, snapshot_df):
+    try:
+        pd.testing.assert_frame_equal(
+            comparable(sql_df).drop(columns=["Outliers"], errors="ignore"),
+            comparable(snapshot_df).drop(columns=["Outliers"], errors="ignore"),
+            check_exact=False,
+            rtol=1e-12,
+        )
+        if "Outliers" in sql_df.columns:
+            for a, b in zip(comparable(sql_df)["Outliers"], comparable(snapshot_df)["Outliers"]):
+                pd.testing.assert_series_equal(pd.Series(a, dtype="float64"), pd.Series(b, dtype="float64"),
+                                               check_exact=False, rtol=1e-12)
+        return True, ""
+    except AssertionError as e:
+        return False, str(e).splitlines()[0]
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tables, _ = get_tables()
+    load_ms = (time.perf_counter() - start) * 1000
+    rows = sum(len(df) for df in tables.values())
+    memory = sum(df.memory_usage(deep=True).sum() for df in tables.values())
+    print(f"Snapshot: {rows:,} rows in {memory / 1e6:.1f} MB, loaded in {load_ms:.0f} ms\n")
+
+    year = str(run_query(QUERIES["home_years"]["sql"], ["Year"], dtypes={"Year": str})["Year"].iloc[0])
+    results = {"load_ms": load_ms, "rows": rows, "memory_bytes": int(memory), "queries": {}}
+    mismatches = 0
+    print(f"{'query':<42}{'sql ms':>10}{'compute ms':>12}{'served ms':>11}  match")
+    for name in QUERIES:
+        params = query_params(name, year)
+        sql_df = sql_query(name, params)
+        snapshot_df = SNAPSHOT_QUERIES[name](tables, *(params or ()))
+        match, detail = same_result(sql_df, snapshot_df)
+        mismatches += not match
+
+        sql_ms = median_ms(lambda: sql_query(name, params), args.repeat)
+        compute_ms = median_ms(lambda: SNAPSHOT_QUERIES[name](tables, *(params or ())), args.repeat)
+        served_ms = median_ms(lambda: answer_query(name, params), args.repeat)
+        results["queries"][name] = {"sql_ms": sql_ms, "compute_ms": compute_ms, "served_ms": served_ms, "match": match}
+        print(f"{name:<42}{sql_ms:>10.1f}{compute_ms:>12.2f}{served_ms:>11.2f}  {'yes' if match else 'NO ' + detail}")
+
+    print(f"\n{len(QUERIES) - mismatches}/{len(QUERIES)} queries match")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import threading
+import time
+
+import numpy as np
+
+from queries import MONEY_SCALE, QUERY_MODE, run_query
+from snapshot import SNAPSHOT_CHECK_SECONDS, current_version, get_tables, group_sum, money
+
+# name: {"cube", "version", "checked_at"}
+_cubes = {}
+
+AXES = ["state", "period", "category"]
+
+
+# --------------------------------Cube Sources--------------------------------
+# One dense cube per source: every measure is a float64 array of shape (states, periods, categories),
+# summed from the table once per data version (from the in-memory tables in snapshot mode, which already
+# hold them). Sources without a category column get one "All" category.
+CUBES = {
+    "transactions": {
+        "table": "agg_transaction",
+        "category": "Transaction_type",
+        "measures": ["Transaction_count", "Transaction_amount"],
+        "money": ["Transaction_amount"],
+    },
+    "insurance": {
+        "table": "agg_insurance",
+        "category": "Insurance_type",
+        "measures": ["Insurance_count", "Insurance_amount"],
+        "money": ["Insurance_amount"],
+    },
+    "users": {
+        "table": "agg_user",
+        "category": None,
+        "measures": ["Registered_Users", "App_Opens"],
+    },
+}
+
+
+# One lock per cube, so a chart of one source doesn't wait for another source's cube to build
+_locks = {name: threading.Lock() for name in CUBES}
+
+
+def cube_sql(spec):
+    category = spec["category"]
+    sums = ", ".join(f"SUM({measure})" for measure in spec["measures"])
+    # PostgreSQL can't GROUP BY a constant, the "All" category is only selected
+    group_by = f"State, Year, Quarter, {category}" if category else "State, Year, Quarter"
+    return f"""
+        SELECT State, CAST(Year AS INT), Quarter, {category or "'All'"}, {sums}
+        FROM {spec['table']}
+        GROUP BY {group_by}
+    """
+
+
+def snapshot_frame(spec, tables):
+    """The rows cube_sql returns, summed from the snapshot's copy of the table"""
+    category = spec["category"]
+    keys = ["State", "Year", "Quarter"] + ([category] if category else [])
+    df = group_sum(tables[spec["table"]], keys, spec["measures"])
+    if not category:
+        df.insert(3, "Category", "All")
+    df.columns = ["State", "Year", "Quarter", "Category"] + spec["measures"]
+    df["State"] = df["State"].astype(str)
+    df["Category"] = df["Category"].astype(str)
+    for measure in spec.get("money", []):
+        # The snapshot holds paise, back to the unit the SQL path returns
+        df[measure] = money(df[measure])
+    return df
+
+
+def build_cube(spec, tables=None):
+    """The cube of one source: axis labels, the observed cells and each measure.
+    tables are the snapshot's, None to query the database."""
+    if tables is not None:
+        df = snapshot_frame(spec, tables)
+    else:
+        columns = ["State", "Year", "Quarter", "Category"] + spec["measures"]
+        df = run_query(cube_sql(spec), columns, dtypes={"State": str, "Category": str})
+    states, state_codes = np.unique(df["State"].to_numpy(), return_inverse=True)
+    categories, category_codes = np.unique(df["Category"].to_numpy(), return_inverse=True)
+    # Periods are a contiguous quarter index (Year * 4 + Quarter - 1), quarters with no rows are unobserved
+    period_index = df["Year"].to_numpy(dtype="int64") * 4 + df["Quarter"].to_numpy(dtype="int64") - 1
+    first = period_index.min() if len(df) else 0
+    periods = np.arange(first, period_index.max() + 1 if len(df) else 0)
+    period_codes = period_index - first
+
+    shape = (len(states), len(periods), len(categories))
+    cells = (state_codes, period_codes, category_codes)
+    observed = np.zeros(shape, dtype=bool)
+    observed[cells] = True
+    values = {}
+    for measure in spec["measures"]:
+        values[measure] = np.zeros(shape)
+        values[measure][cells] = df[measure].to_numpy(dtype="float64")
+        if measure in spec.get("money", []):
+            # Rupees, whichever way the amounts are stored
+            values[measure] /= MONEY_SCALE
+    labels = {"state": states, "period": periods, "category": categories}
+    return {
+        "labels": labels,
+        "observed": observed,
+        "values": values,
+    }
+
+
+def get_cube(name):
+    """Build a cube on first use and rebuild it when the data_version stamp changes"""
+    with _locks[name]:
+        now = time.monotonic()
+        cached = _cubes.get(name)
+        if QUERY_MODE == "snapshot":
+            # The snapshot checks the stamp itself, the cube follows its tables
+            tables, version = get_tables()
+        elif cached is None or now - cached["checked_at"] >= SNAPSHOT_CHECK_SECONDS:
+            tables, version = None, current_version()
+        else:
+            return cached["cube"]
+        if cached is None or version != cached["version"]:
+            cached = _cubes[name] = {"cube": build_cube(CUBES[name], tables), "version": version}
+        cached["checked_at"] = now
+        return cached["cube"]
+
+
+# --------------------------------Cube Operations--------------------------------
+def period_labels(periods):
+    return [f"{period // 4} Q{period % 4 + 1}" for period in periods]
+
+
+def rollup(values, observed, keep):
+    """Sum over every axis not in keep; a cell is observed when any of its summed cells was"""
+    axes = tuple(i for i, axis in enumerate(AXES) if axis not in keep)
+    return values.sum(axis=axes), observed.any(axis=axes)
+
+
+def shares(values, axis):
+    """Each value as a percentage of its total along axis"""
+    sums = values.sum(axis=axis, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(sums != 0, 100.0 * values / sums, np.nan)
+
+
+def ranking(values, k=None):
+    """Positions of a 1-d vector by value, largest first (ties keep label order), the first k of them"""
+    return np.argsort(-values, kind="stable")[:k]
+
+
+def fold_other(values, observed, labels, k):
+    """Keep the k columns with the largest totals, largest first, and sum the rest into one "Other" column"""
+    if k is None or len(labels) <= k:
+        return values, observed, labels
+    order = ranking(values.sum(axis=0))
+    keep, rest = order[:k], order[k:]
+    values = np.column_stack([values[:, keep], values[:, rest].sum(axis=1)])
+    observed = np.column_stack([observed[:, keep], observed[:, rest].any(axis=1)])
+    return values, observed, np.append(labels[keep], "Other")
+
+
+def period_series(name, measure, by=None, top=None):
+    """A measure over time split by state or category (or the total), straight from the cube.
+
+    Returns {"periods": "2024 Q1" labels, "series": labels, "values": periods x series,
+    "observed": the same shape}; top keeps that many series and folds the rest into "Other"."""
+    cube = get_cube(name)
+    values, observed = rollup(cube["values"][measure], cube["observed"], {"period", by})
+    if by == "state":
+        values, observed = values.T, observed.T
+    elif by is None:
+        values, observed = values[:, None], observed[:, None]
+    labels = cube["labels"][by] if by is not None else np.array(["Total"])
+    values, observed, labels = fold_other(values, observed, labels, top)
+    return {
+        "periods": period_labels(cube["labels"]["period"]),
+        "series": labels,
+        "values": values,
+        "observed": observed,
+    }
+
+
+def totals(name, measure, by, top=None):
+    """A measure summed over every period by state or category, largest first, straight from the cube.
+
+    Returns {"labels", "values", "shares": percent of the total over all labels}; unobserved labels
+    are left out and top keeps that many."""
+    cube = get_cube(name)
+    values, observed = rollup(cube["values"][measure], cube["observed"], {by})
+    labels = cube["labels"][by][observed]
+    values = values[observed]
+    order = ranking(values, top)
+    return {"labels": labels[order], "values": values[order], "shares": shares(values, 0)[order]}
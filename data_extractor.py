@@ -1,40 +1,234 @@
+import argparse
+import functools
 import json
-import pandas as pd
-import psycopg2
 import os
+import shutil
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
-from psycopg2.extras import execute_batch
+from backends import DB_BACKEND, connect, copy_frame
+from queries import GROWTH_ROLLUPS, MAP_BIN_SIZES, SCATTER_SAMPLES, MONEY_AS_PAISE, growth_sql
 
 # Load environment variables from .env file
 load_dotenv()
 
+# root of the PhonePe Pulse JSON tree (the data/ submodule); read when each extractor runs
+DATA_ROOT = os.getenv("DATA_ROOT", "data")
+
 
 # db connection
 def connect_to_database():
     try:
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST"),
-            database=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            port=os.getenv("DB_PORT", "5432"),
-        )
-        print("Connected to PostgreSQL database!")
+        # PostgreSQL, or the embedded DuckDB file when DB_BACKEND=duckdb
+        conn = connect()
+        print(f"Connected to {DB_BACKEND} database!")
         return conn
     except Exception as e:
-        print(f"PostgreSQL connection error: {e}")
+        print(f"{DB_BACKEND} connection error: {e}")
         return None
 
 
+def in_periods(periods, year, file_name):
+    """Whether the year folder and quarter file (e.g. "2019", "3.json") are selected, all are when periods is None"""
+    return periods is None or (int(year), int(os.path.splitext(file_name)[0])) in periods
+
+
+def clear_table(cursor, table, periods=None):
+    """Empty the table, or only the rows of the given (year, quarter) periods"""
+    if periods is None:
+        cursor.execute(f"TRUNCATE TABLE {table}")
+        return
+    for year, quarter in sorted(periods):
+        cursor.execute(f"DELETE FROM {table} WHERE CAST(Year AS INT) = %s AND Quarter = %s", (year, quarter))
+
+
+def insert_frame(cursor, table, df):
+    """Bulk load the table's PARQUET_DATASETS columns of df in one COPY, not a statement per row"""
+    copy_frame(cursor, table, df[PARQUET_DATASETS[table]])
+
+
+# money columns: rupees as NUMERIC(30,2), or whole paise as BIGINT when MONEY_AS_PAISE=1
+MONEY_TYPE = "BIGINT" if MONEY_AS_PAISE else "NUMERIC(30,2)"
+
+
+def store_money(df, *columns):
+    """Convert rupee amounts to integer paise once, at extraction, when MONEY_AS_PAISE is set"""
+    if MONEY_AS_PAISE:
+        for column in columns:
+            df[column] = (df[column].astype(float) * 100).round().astype("int64")
+    return df
+
+
+# text columns held as categoricals: a few dozen distinct states/types/brands repeated across every row
+CATEGORY_COLUMNS = {"State", "Insurance_type", "Transaction_type", "Brand", "District", "Pincode", "Level", "Entity_name"}
+
+
+def compact_frame(df, name):
+    """Categorical text columns, int16 years and int8 quarters, reporting the frame's memory.
+    Counts stay int64, they are summed into national totals well past int32."""
+    before = df.memory_usage(deep=True).sum()
+    for column in df.columns:
+        if column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype("category")
+    df["Year"] = df["Year"].astype("int16")
+    df["Quarter"] = df["Quarter"].astype("int8")
+    after = df.memory_usage(deep=True).sum()
+    print(f"{name}: {len(df)} rows, {after / 1024:.1f} KiB in memory (was {before / 1024:.1f} KiB)")
+    return df
+
+
+# --------------------------------Profiling--------------------------------
+# With --profile, every extractor's phases are timed (wall and CPU) and their tracemalloc peaks kept:
+# walk (directory listings), parse (json.load) and build (the rest of the extractor) make up extract,
+# then stage (Parquet) and load (create table and save). tracemalloc slows the whole run down.
+PROFILE = None
+
+
+class StageProfiler:
+    def __init__(self):
+        self.started = time.time()
+        self.extractors = {}
+        self.current = None
+        tracemalloc.start()
+
+    def extractor(self, name):
+        self.current = name
+        return self.extractors.setdefault(name, {"files": 0, "rows": 0, "phases": {}})
+
+    @contextmanager
+    def phase(self, phase, extractor=None, memory=True):
+        """Add a block's wall and CPU time to a phase of the current extractor; memory=False for the
+        walk/parse steps inside extract, which run thousands of times and share its peak"""
+        stats = self.extractor(extractor or self.current)["phases"].setdefault(
+            phase, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0})
+        if memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats["wall_s"] += time.perf_counter() - wall
+            stats["cpu_s"] += time.process_time() - cpu
+            stats["calls"] += 1
+            if memory:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                stats["peak_bytes"] = max(stats.get("peak_bytes", 0), peak)
+
+    def report(self):
+        extractors = {}
+        for name, profile in self.extractors.items():
+            phases = {phase: dict(stats) for phase, stats in profile["phases"].items()}
+            if "extract" in phases:
+                extract = phases["extract"]
+                # Build is what extract spent outside directory listings and json.load
+                phases["build"] = {
+                    key: max(extract[key] - sum(phases.get(step, {}).get(key, 0.0) for step in ("walk", "parse")), 0.0)
+                    for key in ("wall_s", "cpu_s")
+                }
+            extract_s = phases.get("extract", {}).get("wall_s")
+            load_s = phases.get("load", {}).get("wall_s")
+            extractors[name] = {
+                "files": profile["files"],
+                "rows": profile["rows"],
+                "files_per_s": profile["files"] / extract_s if extract_s else None,
+                "rows_per_s": profile["rows"] / extract_s if extract_s else None,
+                "load_rows_per_s": profile["rows"] / load_s if load_s and profile["rows"] else None,
+                "peak_bytes": max((stats.get("peak_bytes", 0) for stats in phases.values()), default=0),
+                "phases": phases,
+            }
+        return {
+            "started": self.started,
+            "wall_s": time.time() - self.started,
+            "backend": DB_BACKEND,
+            "data_root": DATA_ROOT,
+            "extractors": extractors,
+        }
+
+    def write(self, json_path, prom_path):
+        report = self.report()
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+        metrics = {
+            "phase_seconds": ("gauge", "Wall time of each extractor phase"),
+            "phase_cpu_seconds": ("gauge", "CPU time of each extractor phase"),
+            "phase_peak_memory_bytes": ("gauge", "tracemalloc peak above the phase's starting allocation"),
+            "files": ("gauge", "JSON files read by the extractor"),
+            "rows": ("gauge", "Rows the extractor produced"),
+            "files_per_second": ("gauge", "Files read per second of extract"),
+            "rows_per_second": ("gauge", "Rows produced per second of extract"),
+        }
+        samples = {metric: [] for metric in metrics}
+        for name, profile in report["extractors"].items():
+            for phase, stats in profile["phases"].items():
+                labels = f'extractor="{name}",phase="{phase}"'
+                samples["phase_seconds"].append((labels, stats["wall_s"]))
+                samples["phase_cpu_seconds"].append((labels, stats["cpu_s"]))
+                if "peak_bytes" in stats:
+                    samples["phase_peak_memory_bytes"].append((labels, stats["peak_bytes"]))
+            labels = f'extractor="{name}"'
+            samples["files"].append((labels, profile["files"]))
+            samples["rows"].append((labels, profile["rows"]))
+            if profile["files_per_s"] is not None:
+                samples["files_per_second"].append((labels, profile["files_per_s"]))
+                samples["rows_per_second"].append((labels, profile["rows_per_s"]))
+
+        lines = []
+        for metric, (kind, help_text) in metrics.items():
+            lines += [f"# HELP phonepe_extractor_{metric} {help_text}", f"# TYPE phonepe_extractor_{metric} {kind}"]
+            lines += [f"phonepe_extractor_{metric}{{{labels}}} {value}" for labels, value in samples[metric]]
+        lines += ["# HELP phonepe_extractor_last_run_timestamp_seconds When the profiled run started",
+                  "# TYPE phonepe_extractor_last_run_timestamp_seconds gauge",
+                  f"phonepe_extractor_last_run_timestamp_seconds {report['started']}"]
+        # Written aside and renamed, so the node exporter never reads a partial file
+        with open(prom_path + ".tmp", "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(prom_path + ".tmp", prom_path)
+        print(f"Profile written to {json_path} and {prom_path}")
+
+
+def profiled(phase, extractor=None):
+    """Time the decorated function as a phase of the current (or the given) extractor under --profile"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profile_phase(phase, extractor):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profile_phase(phase, extractor=None, memory=True):
+    return nullcontext() if PROFILE is None else PROFILE.phase(phase, extractor, memory)
+
+
+def list_dir(path):
+    with profile_phase("walk", memory=False):
+        return os.listdir(path)
+
+
+def load_json(f):
+    if PROFILE is not None:
+        PROFILE.extractors[PROFILE.current]["files"] += 1
+    with profile_phase("parse", memory=False):
+        return json.load(f)
+
+
 # --------------------------------Aggregated Insurance Data--------------------------------
-def agg_insurance_data():
-    path = "data/aggregated/insurance/country/india/state/"
+def agg_insurance_data(periods=None):
+    path = os.path.join(DATA_ROOT, "aggregated/insurance/country/india/state/")
 
     if not os.path.exists(path):
         print("Path not found!")
         return None
 
-    Agg_state_list = os.listdir(path)
+    Agg_state_list = list_dir(path)
     print(f"Found {len(Agg_state_list)} states")
 
     insurance_data = {
@@ -48,18 +242,20 @@ def agg_insurance_data():
 
     for i in Agg_state_list:
         p_i = os.path.join(path, i)
-        Agg_yr = os.listdir(p_i)
+        Agg_yr = list_dir(p_i)
 
         for j in Agg_yr:
             p_j = os.path.join(p_i, j)
-            Agg_yr_list = os.listdir(p_j)
+            Agg_yr_list = list_dir(p_j)
 
             for k in Agg_yr_list:
+                if not in_periods(periods, j, k):
+                    continue
                 p_k = os.path.join(p_j, k)
 
                 try:
                     with open(p_k, "r") as Data:
-                        D = json.load(Data)
+                        D = load_json(Data)
 
                     if (
                         "transactionData" in D.get("data", {})
@@ -82,16 +278,17 @@ def agg_insurance_data():
                     print(f"Error reading {p_k}: {e}")
                     continue
 
-    Agg_Insurance = pd.DataFrame(insurance_data)
+    Agg_Insurance = compact_frame(store_money(pd.DataFrame(insurance_data), "Insurance_amount"), "agg_insurance")
     print(f"Successfully created DataFrame with {len(Agg_Insurance)} rows")
     return Agg_Insurance
 
+@profiled("load")
 def insurance_table(conn):
     """Create table in PostgreSQL if it doesn't exist"""
     try:
         cursor = conn.cursor()
 
-        create_insurance_query = """
+        create_insurance_query = f"""
            CREATE TABLE IF NOT EXISTS agg_insurance (
               id SERIAL PRIMARY KEY,
               State VARCHAR(100),
@@ -99,7 +296,7 @@ def insurance_table(conn):
               Quarter INT,
               Insurance_type VARCHAR(100),
               Insurance_count BIGINT,
-              Insurance_amount NUMERIC(30,2)
+              Insurance_amount {MONEY_TYPE}
             )
         """
 
@@ -112,37 +309,24 @@ def insurance_table(conn):
         print(f"Table creation error: {e}")
         return False
 
-def save_to_postgres(df, conn):
+@profiled("load")
+def save_to_postgres(df, conn, periods=None):
     try:
         # Clear existing data
         cursor = conn.cursor()
-        cursor.execute("TRUNCATE TABLE agg_insurance")
-        conn.commit()
+        clear_table(cursor, "agg_insurance", periods)
 
         # Insert new data
-        for index, row in df.iterrows():
-            insert_query = """
-                INSERT INTO agg_insurance (State, Year, Quarter, Insurance_type, Insurance_count, Insurance_amount)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(
-                insert_query,
-                (
-                    row["State"],
-                    row["Year"],
-                    row["Quarter"],
-                    row["Insurance_type"],
-                    row["Insurance_count"],
-                    row["Insurance_amount"],
-                ),
-            )
+        insert_frame(cursor, "agg_insurance", df)
 
+        mark_loaded(cursor, "agg_insurance", df, periods)
         conn.commit()
         print("Data saved to PostgreSQL database!")
         return True
 
     except Exception as e:
         print(f"Save error: {e}")
+        conn.rollback()
         return False
 
 def show_data_from_postgres(conn):
@@ -167,32 +351,34 @@ def show_data_from_postgres(conn):
 
 
 # --------------------------------Aggregated Transaction Data--------------------------------
-def agg_transaction_data():
-    path = "data/aggregated/transaction/country/india/state/"
+def agg_transaction_data(periods=None):
+    path = os.path.join(DATA_ROOT, "aggregated/transaction/country/india/state/")
 
     if not os.path.exists(path):
         print("Path not found!")
         return None
 
-    Agg_state_list = os.listdir(path)
+    Agg_state_list = list_dir(path)
     print(f"Found {len(Agg_state_list)} states for transaction data")
 
     transaction_data = {'State':[], 'Year':[], 'Quarter':[], 'Transaction_type':[], 'Transaction_count':[], 'Transaction_amount':[]}
 
     for i in Agg_state_list:
         p_i = os.path.join(path, i)
-        Agg_yr = os.listdir(p_i)
+        Agg_yr = list_dir(p_i)
 
         for j in Agg_yr:
             p_j = os.path.join(p_i, j)
-            Agg_yr_list = os.listdir(p_j)
+            Agg_yr_list = list_dir(p_j)
 
             for k in Agg_yr_list:
+                if not in_periods(periods, j, k):
+                    continue
                 p_k = os.path.join(p_j, k)
 
                 try:
                     with open(p_k, 'r') as Data:
-                        D = json.load(Data)
+                        D = load_json(Data)
 
                     if (
                         "transactionData" in D.get("data", {})
@@ -215,15 +401,16 @@ def agg_transaction_data():
                     print(f"Error reading {p_k}: {e}")
                     continue
 
-    Agg_Transaction = pd.DataFrame(transaction_data)
+    Agg_Transaction = compact_frame(store_money(pd.DataFrame(transaction_data), "Transaction_amount"), "agg_transaction")
     print(f"Successfully created Transaction DataFrame with {len(Agg_Transaction)} rows")
     return Agg_Transaction
 
+@profiled("load")
 def transaction_table(conn):
     try:
         cursor = conn.cursor()
 
-        create_transaction_query = '''
+        create_transaction_query = f'''
             CREATE TABLE IF NOT EXISTS agg_transaction (
                 id SERIAL PRIMARY KEY,
                 State VARCHAR(100),
@@ -231,7 +418,7 @@ def transaction_table(conn):
                 Quarter INTEGER,
                 Transaction_type VARCHAR(100),
                 Transaction_count BIGINT,
-                Transaction_amount NUMERIC(30,2)
+                Transaction_amount {MONEY_TYPE}
             )
         '''
 
@@ -244,35 +431,24 @@ def transaction_table(conn):
         print(f"Transaction table creation error: {e}")
         return False
 
-def agg_transaction_db_save(df, conn):
+@profiled("load")
+def agg_transaction_db_save(df, conn, periods=None):
     try:
         # Clear existing data
         cursor = conn.cursor()
-        cursor.execute("TRUNCATE TABLE agg_transaction")
-        conn.commit()
+        clear_table(cursor, "agg_transaction", periods)
 
         # Insert new data
-        for index, row in df.iterrows():
-            insert_query = '''
-                INSERT INTO agg_transaction (State, Year, Quarter, Transaction_type, Transaction_count, Transaction_amount)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            '''
-            cursor.execute(insert_query, (
-                row["State"],
-                row["Year"],
-                row["Quarter"],
-                row["Transaction_type"],
-                row["Transaction_count"],
-                row["Transaction_amount"],
-            ),
-        )
+        insert_frame(cursor, "agg_transaction", df)
 
+        mark_loaded(cursor, "agg_transaction", df, periods)
         conn.commit()
         print("Transaction data saved to PostgreSQL database!")
         return True
 
     except Exception as e:
         print(f"Transaction save error: {e}")
+        conn.rollback()
         return False
 
 def agg_transaction_db_show(conn):
@@ -295,14 +471,14 @@ def agg_transaction_db_show(conn):
 
 
 # --------------------------------Aggregated User Data--------------------------------
-def agg_user_data():
-    path = "data/aggregated/user/country/india/state/"
+def agg_user_data(periods=None):
+    path = os.path.join(DATA_ROOT, "aggregated/user/country/india/state/")
 
     if not os.path.exists(path):
         print("Path not found!")
         return None
 
-    Agg_state_list = os.listdir(path)
+    Agg_state_list = list_dir(path)
     print(f"Found {len(Agg_state_list)} states for user data")
 
     # Data for aggregated user information
@@ -313,18 +489,20 @@ def agg_user_data():
 
     for i in Agg_state_list:
         p_i = os.path.join(path, i)
-        Agg_yr = os.listdir(p_i)
+        Agg_yr = list_dir(p_i)
 
         for j in Agg_yr:
             p_j = os.path.join(p_i, j)
-            Agg_yr_list = os.listdir(p_j)
+            Agg_yr_list = list_dir(p_j)
 
             for k in Agg_yr_list:
+                if not in_periods(periods, j, k):
+                    continue
                 p_k = os.path.join(p_j, k)
 
                 try:
                     with open(p_k, 'r') as Data:
-                        D = json.load(Data)
+                        D = load_json(Data)
 
                     if not D or 'data' not in D or not D['data']:
                         continue
@@ -359,14 +537,15 @@ def agg_user_data():
                     continue
 
     # Create DataFrames
-    Agg_User_Aggregated = pd.DataFrame(user_aggregated_data)
-    Agg_User_Device = pd.DataFrame(user_device_data)
+    Agg_User_Aggregated = compact_frame(pd.DataFrame(user_aggregated_data), "agg_user")
+    Agg_User_Device = compact_frame(pd.DataFrame(user_device_data), "agg_user_device")
 
     print(f"Successfully created User Aggregated DataFrame with {len(Agg_User_Aggregated)} rows")
     print(f"Successfully created User Device DataFrame with {len(Agg_User_Device)} rows")
 
     return Agg_User_Aggregated, Agg_User_Device
 
+@profiled("load")
 def create_user_tables(conn):
     """Create user tables in PostgreSQL if they don't exist"""
     try:
@@ -411,26 +590,21 @@ def create_user_tables(conn):
         conn.rollback()
         return False
 
-def save_user_data_to_postgres(aggregated_df, device_df, conn):
+@profiled("load")
+def save_user_data_to_postgres(aggregated_df, device_df, conn, periods=None):
     try:
         # Rollback any pending transaction to start fresh
         conn.rollback()
         
         with conn.cursor() as cursor:
-            cursor.execute("TRUNCATE TABLE agg_user")
-            cursor.execute("TRUNCATE TABLE agg_user_device")
+            clear_table(cursor, "agg_user", periods)
+            clear_table(cursor, "agg_user_device", periods)
 
-            agg_insert_query = '''
-                INSERT INTO agg_user (State, Year, Quarter, Registered_Users, App_Opens)
-                VALUES (%s, %s, %s, %s, %s)
-            '''
-            execute_batch(cursor, agg_insert_query, aggregated_df.values.tolist())
+            insert_frame(cursor, "agg_user", aggregated_df)
+            insert_frame(cursor, "agg_user_device", device_df)
 
-            device_insert_query = '''
-                INSERT INTO agg_user_device (State, Year, Quarter, Brand, User_Count, Percentage)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            '''
-            execute_batch(cursor, device_insert_query, device_df.values.tolist())
+            mark_loaded(cursor, "agg_user", aggregated_df, periods)
+            mark_loaded(cursor, "agg_user_device", device_df, periods)
 
         conn.commit()
         print("User data saved to PostgreSQL database!")
@@ -475,14 +649,14 @@ def show_user_data_from_postgres(conn):
 
 
 # --------------------------------Top Insurance Data--------------------------------
-def top_insurance_data():
-    path = "data/top/insurance/country/india/state/"
+def top_insurance_data(periods=None):
+    path = os.path.join(DATA_ROOT, "top/insurance/country/india/state/")
 
     if not os.path.exists(path):
         print("Path not found!")
         return None
 
-    Agg_state_list = os.listdir(path)
+    Agg_state_list = list_dir(path)
     print(f"Found {len(Agg_state_list)} states for top insurance data")
 
     # Data for top districts
@@ -493,18 +667,20 @@ def top_insurance_data():
 
     for i in Agg_state_list:
         p_i = os.path.join(path, i)
-        Agg_yr = os.listdir(p_i)
+        Agg_yr = list_dir(p_i)
 
         for j in Agg_yr:
             p_j = os.path.join(p_i, j)
-            Agg_yr_list = os.listdir(p_j)
+            Agg_yr_list = list_dir(p_j)
 
             for k in Agg_yr_list:
+                if not in_periods(periods, j, k):
+                    continue
                 p_k = os.path.join(p_j, k)
 
                 try:
                     with open(p_k, 'r') as Data:
-                        D = json.load(Data)
+                        D = load_json(Data)
 
                     # Extract top districts data
                     for district in D['data'].get('districts', []):
@@ -529,14 +705,15 @@ def top_insurance_data():
                     continue
 
     # Create DataFrames
-    Top_Insurance_District = pd.DataFrame(top_district_data)
-    Top_Insurance_Pincode = pd.DataFrame(top_pincode_data)
+    Top_Insurance_District = compact_frame(store_money(pd.DataFrame(top_district_data), "District_Amount"), "top_insurance_district")
+    Top_Insurance_Pincode = compact_frame(store_money(pd.DataFrame(top_pincode_data), "Pincode_Amount"), "top_insurance_pincode")
 
     print(f"✅ Created Top Insurance District DataFrame with {len(Top_Insurance_District)} rows")
     print(f"✅ Created Top Insurance Pincode DataFrame with {len(Top_Insurance_Pincode)} rows")
 
     return Top_Insurance_District, Top_Insurance_Pincode
 
+@profiled("load")
 def create_top_insurance_tables(conn):
     """Create top insurance tables in PostgreSQL if they don't exist"""
     try:
@@ -544,7 +721,7 @@ def create_top_insurance_tables(conn):
         cursor = conn.cursor()
 
         # Table for top districts
-        create_top_district_query = '''
+        create_top_district_query = f'''
             CREATE TABLE IF NOT EXISTS top_insurance_district (
                 id SERIAL PRIMARY KEY,
                 State VARCHAR(100),
@@ -552,12 +729,12 @@ def create_top_insurance_tables(conn):
                 Quarter INT,
                 District VARCHAR(100),
                 District_Count BIGINT,
-                District_Amount NUMERIC(30,2)
+                District_Amount {MONEY_TYPE}
             )
         '''
 
         # Table for top pincodes
-        create_top_pincode_query = '''
+        create_top_pincode_query = f'''
             CREATE TABLE IF NOT EXISTS top_insurance_pincode (
                 id SERIAL PRIMARY KEY,
                 State VARCHAR(100),
@@ -565,7 +742,7 @@ def create_top_insurance_tables(conn):
                 Quarter INT,
                 Pincode VARCHAR(10),
                 Pincode_Count BIGINT,
-                Pincode_Amount NUMERIC(30,2)
+                Pincode_Amount {MONEY_TYPE}
             )
         '''
 
@@ -579,35 +756,29 @@ def create_top_insurance_tables(conn):
         print(f"❌ Top insurance table creation error: {e}")
         return False
 
-def save_top_insurance_to_postgres(district_df, pincode_df, conn):
+@profiled("load")
+def save_top_insurance_to_postgres(district_df, pincode_df, conn, periods=None):
     try:
         conn.rollback()
         cursor = conn.cursor()
 
         # Clear existing data
-        cursor.execute("TRUNCATE TABLE top_insurance_district")
-        cursor.execute("TRUNCATE TABLE top_insurance_pincode")
+        clear_table(cursor, "top_insurance_district", periods)
+        clear_table(cursor, "top_insurance_pincode", periods)
 
-        # Insert top district data
-        insert_district_query = '''
-            INSERT INTO top_insurance_district (State, Year, Quarter, District, District_Count, District_Amount)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        '''
-        execute_batch(cursor, insert_district_query, district_df.values.tolist())
-
-        # Insert top pincode data
-        insert_pincode_query = '''
-            INSERT INTO top_insurance_pincode (State, Year, Quarter, Pincode, Pincode_Count, Pincode_Amount)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        '''
-        execute_batch(cursor, insert_pincode_query, pincode_df.values.tolist())
+        # Insert top district and pincode data
+        insert_frame(cursor, "top_insurance_district", district_df)
+        insert_frame(cursor, "top_insurance_pincode", pincode_df)
 
+        mark_loaded(cursor, "top_insurance_district", district_df, periods)
+        mark_loaded(cursor, "top_insurance_pincode", pincode_df, periods)
         conn.commit()
         print("✅ Top insurance data saved to PostgreSQL database!")
         return True
 
     except Exception as e:
         print(f"❌ Top insurance save error: {e}")
+        conn.rollback()
         return False
 
 def show_top_insurance_from_postgres(conn):
@@ -642,14 +813,14 @@ def show_top_insurance_from_postgres(conn):
 
 # --------------------------------Top Transaction Data--------------------------------
 
-def top_transaction_data():
-    path = "data/top/transaction/country/india/state/"
+def top_transaction_data(periods=None):
+    path = os.path.join(DATA_ROOT, "top/transaction/country/india/state/")
     
     if not os.path.exists(path):
         print("Path not found!")
         return None
 
-    Agg_state_list = os.listdir(path)
+    Agg_state_list = list_dir(path)
     print(f"Found {len(Agg_state_list)} states for top transaction data")
 
     # Data for top districts
@@ -660,18 +831,20 @@ def top_transaction_data():
 
     for i in Agg_state_list:
         p_i = os.path.join(path, i)
-        Agg_yr = os.listdir(p_i)
+        Agg_yr = list_dir(p_i)
 
         for j in Agg_yr:
             p_j = os.path.join(p_i, j)
-            Agg_yr_list = os.listdir(p_j)
+            Agg_yr_list = list_dir(p_j)
 
             for k in Agg_yr_list:
+                if not in_periods(periods, j, k):
+                    continue
                 p_k = os.path.join(p_j, k)
 
                 try:
                     with open(p_k, 'r') as Data:
-                        D = json.load(Data)
+                        D = load_json(Data)
 
                     # Extract top districts data
                     for district in D['data'].get('districts', []):
@@ -696,14 +869,15 @@ def top_transaction_data():
                     continue
 
     # Create DataFrames
-    Top_Transaction_District = pd.DataFrame(top_district_data)
-    Top_Transaction_Pincode = pd.DataFrame(top_pincode_data)
+    Top_Transaction_District = compact_frame(store_money(pd.DataFrame(top_district_data), "District_Amount"), "top_transaction_district")
+    Top_Transaction_Pincode = compact_frame(store_money(pd.DataFrame(top_pincode_data), "Pincode_Amount"), "top_transaction_pincode")
 
     print(f"✅ Created Top Transaction District DataFrame with {len(Top_Transaction_District)} rows")
     print(f"✅ Created Top Transaction Pincode DataFrame with {len(Top_Transaction_Pincode)} rows")
 
     return Top_Transaction_District, Top_Transaction_Pincode
 
+@profiled("load")
 def create_top_transaction_tables(conn):
     """Create top transaction tables in PostgreSQL if they don't exist"""
     try:
@@ -711,7 +885,7 @@ def create_top_transaction_tables(conn):
         cursor = conn.cursor()
 
         # Table for top districts
-        create_top_district_query = '''
+        create_top_district_query = f'''
             CREATE TABLE IF NOT EXISTS top_transaction_district (
                 id SERIAL PRIMARY KEY,
                 State VARCHAR(100),
@@ -719,12 +893,12 @@ def create_top_transaction_tables(conn):
                 Quarter INT,
                 District VARCHAR(100),
                 District_Count BIGINT,
-                District_Amount NUMERIC(30,2)
+                District_Amount {MONEY_TYPE}
             )
         '''
 
         # Table for top pincodes
-        create_top_pincode_query = '''
+        create_top_pincode_query = f'''
             CREATE TABLE IF NOT EXISTS top_transaction_pincode (
                 id SERIAL PRIMARY KEY,
                 State VARCHAR(100),
@@ -732,7 +906,7 @@ def create_top_transaction_tables(conn):
                 Quarter INT,
                 Pincode VARCHAR(20),
                 Pincode_Count BIGINT,
-                Pincode_Amount NUMERIC(30,2)
+                Pincode_Amount {MONEY_TYPE}
             )
         '''
 
@@ -747,29 +921,22 @@ def create_top_transaction_tables(conn):
         conn.rollback()
         return False
 
-def save_top_transaction_to_postgres(district_df, pincode_df, conn):
+@profiled("load")
+def save_top_transaction_to_postgres(district_df, pincode_df, conn, periods=None):
     try:
         conn.rollback()  # Reset transaction state
         cursor = conn.cursor()
 
         # Clear existing data
-        cursor.execute("TRUNCATE TABLE top_transaction_district")
-        cursor.execute("TRUNCATE TABLE top_transaction_pincode")
+        clear_table(cursor, "top_transaction_district", periods)
+        clear_table(cursor, "top_transaction_pincode", periods)
 
-        # Insert top district data
-        insert_district_query = '''
-            INSERT INTO top_transaction_district (State, Year, Quarter, District, District_Count, District_Amount)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        '''
-        execute_batch(cursor, insert_district_query, district_df.values.tolist())
-
-        # Insert top pincode data
-        insert_pincode_query = '''
-            INSERT INTO top_transaction_pincode (State, Year, Quarter, Pincode, Pincode_Count, Pincode_Amount)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        '''
-        execute_batch(cursor, insert_pincode_query, pincode_df.values.tolist())
+        # Insert top district and pincode data
+        insert_frame(cursor, "top_transaction_district", district_df)
+        insert_frame(cursor, "top_transaction_pincode", pincode_df)
 
+        mark_loaded(cursor, "top_transaction_district", district_df, periods)
+        mark_loaded(cursor, "top_transaction_pincode", pincode_df, periods)
         conn.commit()
         print("✅ Top transaction data saved to PostgreSQL database!")
         return True
@@ -813,14 +980,14 @@ def show_top_transaction_from_postgres(conn):
 
 # --------------------------------Top User Data--------------------------------
 
-def top_user_data():
-    path = "data/top/user/country/india/state/"
+def top_user_data(periods=None):
+    path = os.path.join(DATA_ROOT, "top/user/country/india/state/")
     
     if not os.path.exists(path):
         print("Path not found!")
         return None, None
 
-    Agg_state_list = os.listdir(path)
+    Agg_state_list = list_dir(path)
     print(f"Found {len(Agg_state_list)} states for top user data")
 
     # Data for top districts
@@ -831,18 +998,20 @@ def top_user_data():
 
     for i in Agg_state_list:
         p_i = os.path.join(path, i)
-        Agg_yr = os.listdir(p_i)
+        Agg_yr = list_dir(p_i)
 
         for j in Agg_yr:
             p_j = os.path.join(p_i, j)
-            Agg_yr_list = os.listdir(p_j)
+            Agg_yr_list = list_dir(p_j)
 
             for k in Agg_yr_list:
+                if not in_periods(periods, j, k):
+                    continue
                 p_k = os.path.join(p_j, k)
 
                 try:
                     with open(p_k, 'r') as Data:
-                        D = json.load(Data)
+                        D = load_json(Data)
 
                     # Extract top districts data
                     for district in D['data'].get('districts', []):
@@ -865,14 +1034,15 @@ def top_user_data():
                     continue
 
     # Create DataFrames
-    Top_User_District = pd.DataFrame(top_district_data)
-    Top_User_Pincode = pd.DataFrame(top_pincode_data)
+    Top_User_District = compact_frame(pd.DataFrame(top_district_data), "top_user_district")
+    Top_User_Pincode = compact_frame(pd.DataFrame(top_pincode_data), "top_user_pincode")
 
     print(f"✅ Created Top User District DataFrame with {len(Top_User_District)} rows")
     print(f"✅ Created Top User Pincode DataFrame with {len(Top_User_Pincode)} rows")
 
     return Top_User_District, Top_User_Pincode
 
+@profiled("load")
 def create_top_user_tables(conn):
     """Create top user tables in PostgreSQL if they don't exist"""
     try:
@@ -914,29 +1084,22 @@ def create_top_user_tables(conn):
         conn.rollback()
         return False
 
-def save_top_user_to_postgres(district_df, pincode_df, conn):
+@profiled("load")
+def save_top_user_to_postgres(district_df, pincode_df, conn, periods=None):
     try:
         conn.rollback()  # Reset transaction state
         cursor = conn.cursor()
 
         # Clear existing data
-        cursor.execute("TRUNCATE TABLE top_user_district")
-        cursor.execute("TRUNCATE TABLE top_user_pincode")
-
-        # Insert top district data
-        insert_district_query = '''
-            INSERT INTO top_user_district (State, Year, Quarter, District, Registered_Users)
-            VALUES (%s, %s, %s, %s, %s)
-        '''
-        execute_batch(cursor, insert_district_query, district_df.values.tolist())
+        clear_table(cursor, "top_user_district", periods)
+        clear_table(cursor, "top_user_pincode", periods)
 
-        # Insert top pincode data
-        insert_pincode_query = '''
-            INSERT INTO top_user_pincode (State, Year, Quarter, Pincode, Registered_Users)
-            VALUES (%s, %s, %s, %s, %s)
-        '''
-        execute_batch(cursor, insert_pincode_query, pincode_df.values.tolist())
+        # Insert top district and pincode data
+        insert_frame(cursor, "top_user_district", district_df)
+        insert_frame(cursor, "top_user_pincode", pincode_df)
 
+        mark_loaded(cursor, "top_user_district", district_df, periods)
+        mark_loaded(cursor, "top_user_pincode", pincode_df, periods)
         conn.commit()
         print("✅ Top user data saved to PostgreSQL database!")
         return True
@@ -981,197 +1144,187 @@ def show_top_user_from_postgres(conn):
 
 
 # --------------------------------Map Insurance Data--------------------------------
+# Every file is a {"columns": ["lat", "lng", "metric", "label"], "data": [...]} table of insurance
+# points, far too many for the browser. Points are kept as float32 columns (the labels are dropped)
+# and binned at load time into square lat/lng cells at each MAP_BIN_SIZES zoom level, which is all
+# the density map reads.
+
+def point_frame(rows, state, year, quarter):
+    """One file's [lat, lng, metric, label] rows as float32 columns, rows that don't parse are dropped"""
+    raw = pd.DataFrame.from_records(rows) if rows else pd.DataFrame(columns=range(3))
+    points = raw.iloc[:, :3].apply(pd.to_numeric, errors="coerce").dropna()
+    if len(points) < len(raw):
+        print(f"Skipping {len(raw) - len(points)} invalid points for {state} {year} Q{quarter}")
+    points = points.astype("float32")
+    points.columns = ["Latitude", "Longitude", "Metric"]
+    points.insert(0, "State", state)
+    points.insert(1, "Year", year)
+    points.insert(2, "Quarter", quarter)
+    return points
+
+
+def bin_points(points):
+    """Points per grid cell at every zoom level: Cell_row/Cell_col are floor(lat/lng / cell size)"""
+    metric = points["Metric"].astype("float64")
+    frames = []
+    for zoom, size in enumerate(MAP_BIN_SIZES):
+        cells = points[["State", "Year", "Quarter"]].assign(
+            Zoom=zoom,
+            Cell_row=np.floor(points["Latitude"] / size).astype("int32"),
+            Cell_col=np.floor(points["Longitude"] / size).astype("int32"),
+            Metric=metric,
+        )
+        frames.append(
+            cells.groupby(["State", "Year", "Quarter", "Zoom", "Cell_row", "Cell_col"], observed=True, sort=False)
+            .agg(Points=("Metric", "size"), Metric=("Metric", "sum"))
+            .reset_index()
+        )
+    bins = pd.concat(frames, ignore_index=True)
+    bins["Zoom"] = bins["Zoom"].astype("int8")
+    bins["Points"] = bins["Points"].astype("int32")
+    return bins
+
+
+def map_insurance_data(periods=None):
+    path = os.path.join(DATA_ROOT, "map/insurance/country/india/state/")
+
+    if not os.path.exists(path):
+        print("Path not found!")
+        return None
+
+    Agg_state_list = list_dir(path)
+    print(f"Found {len(Agg_state_list)} states for map insurance data")
+
+    # One float32 frame per file, never a Python object per point
+    point_frames = []
+
+    for i in Agg_state_list:
+        p_i = path + i + "/"
+        Agg_yr = list_dir(p_i)
 
-# def map_insurance_data():
-#     path = "data/map/insurance/country/india/state/"
-
-#     if not os.path.exists(path):
-#         print("Path not found!")
-#         return None
-
-#     Agg_state_list = os.listdir(path)
-#     print(f"Found {len(Agg_state_list)} states for map insurance data")
-
-#     # Data for map insurance - based on JSON format: [lat, lng, metric, label]
-#     map_insurance_data = {'State':[], 'Year':[], 'Quarter':[], 'Latitude':[], 'Longitude':[], 'Metric':[], 'Label':[]}
-
-#     for i in Agg_state_list:
-#         p_i = path + i + "/"
-#         Agg_yr = os.listdir(p_i)
-
-#         for j in Agg_yr:
-#             p_j = p_i + j + "/"
-#             Agg_yr_list = os.listdir(p_j)
-
-#             for k in Agg_yr_list:
-#                 p_k = p_j + k
-
-#                 try:
-#                     with open(p_k, 'r') as Data:
-#                         D = json.load(Data)
-
-                   
-#                     if D['data']['data']:
-#                         for location in D['data']['data']:
-#                             try:
-#                                 if len(location) == 4:
-#                                     lat, lng, metric, label = location
-                                    
-#                                     # Validate data types before adding
-#                                     try:
-#                                         lat_float = float(lat)
-#                                         lng_float = float(lng)
-#                                         metric_float = float(metric)
-#                                         label_str = str(label)
-                                        
-#                                         map_insurance_data['State'].append(i)
-#                                         map_insurance_data['Year'].append(int(j))
-#                                         map_insurance_data['Quarter'].append(int(k.strip('.json')))
-#                                         map_insurance_data['Latitude'].append(lat_float)
-#                                         map_insurance_data['Longitude'].append(lng_float)
-#                                         map_insurance_data['Metric'].append(metric_float)
-#                                         map_insurance_data['Label'].append(label_str)
-#                                     except (ValueError, TypeError) as val_error:
-#                                         print(f"Data validation error in {p_k}: lat={lat}, lng={lng}, metric={metric}, label={label}")
-#                                         print(f"Error: {val_error}")
-#                                         continue
-#                                 else:
-#                                     print(f"Skipping location with {len(location)} elements in {p_k}")
-#                             except Exception as unpack_error:
-#                                 print(f"Error unpacking location {location} in {p_k}: {unpack_error}")
-#                                 continue
-
-#                 except Exception as e:
-#                     print(f"Error reading {p_k}: {e}")
-#                     continue
-
-#     # Create DataFrame
-#     Map_Insurance = pd.DataFrame(map_insurance_data)
-
-#     print(f"Successfully created Map Insurance DataFrame with {len(Map_Insurance)} rows")
-
-#     return Map_Insurance
-
-# def create_map_insurance_table(conn):
-#     """Create map insurance table in PostgreSQL if it doesn't exist"""
-#     try:
-#         cursor = conn.cursor()
-
-#         # Check if table already exists and has data
-#         cursor.execute("""
-#             SELECT EXISTS (
-#                 SELECT FROM information_schema.tables 
-#                 WHERE table_name = 'map_insurance'
-#             )
-#         """)
-#         table_exists = cursor.fetchone()[0]
-
-#         if table_exists:
-#             # Check if table has data
-#             cursor.execute("SELECT COUNT(*) FROM map_insurance")
-#             row_count = cursor.fetchone()[0]
-#             if row_count > 0:
-#                 print(f"Table map_insurance already exists with {row_count} rows of data!")
-#                 return True
-#             else:
-#                 print("Table map_insurance exists but is empty. Proceeding with data insertion.")
-
-#         create_map_insurance_query = '''
-#             CREATE TABLE IF NOT EXISTS map_insurance (
-#                 id SERIAL PRIMARY KEY,
-#                 State VARCHAR(100),
-#                 Year INT,
-#                 Quarter INT,
-#                 Latitude NUMERIC(15,12),
-#                 Longitude NUMERIC(15,12),
-#                 Metric NUMERIC(30,2),
-#                 Label VARCHAR(100)
-#             )
-#         '''
-
-#         cursor.execute(create_map_insurance_query)
-#         conn.commit()
-#         print("Map insurance table created successfully!")
-#         return True
-
-#     except Exception as e:
-#         print(f"Map insurance table creation error: {e}")
-#         conn.rollback()
-#         return False
-
-# def save_map_insurance_to_postgres(df, conn):
-#     try:
-#         cursor = conn.cursor()
-
-#         # Clear existing data
-#         cursor.execute("DELETE FROM map_insurance")
-#         conn.commit()
-
-#         # Prepare insert query
-#         insert_query = '''
-#             INSERT INTO map_insurance (State, Year, Quarter, Latitude, Longitude, Metric, Label)
-#             VALUES (%s, %s, %s, %s, %s, %s, %s)
-#         '''
-
-#         data = []
-#         for idx, row in df.iterrows():
-#             try:
-#                 data_row = (
-#                     row['State'],
-#                     int(row['Year']),
-#                     int(row['Quarter']),
-#                     float(row['Latitude']),
-#                     float(row['Longitude']),
-#                     float(row['Metric']),
-#                     str(row['Label'])
-#                 )
-#                 data.append(data_row)
-#             except (ValueError, TypeError) as val_error:
-#                 print(f"Error converting row {idx}: {row}")
-#                 print(f"Error: {val_error}")
-#                 continue
-
-#         execute_batch(cursor, insert_query, data, page_size=1000)
-#         conn.commit()
-#         print("Map insurance data saved to PostgreSQL database!")
-#         return True
-
-#     except Exception as e:
-#         print(f"Map insurance save error: {e}")
-#         conn.rollback()
-#         return False
-
-# def show_map_insurance_from_postgres(conn):
-#     try:
-#         cursor = conn.cursor()
-
-#         cursor.execute("SELECT COUNT(*) FROM map_insurance")
-#         count = cursor.fetchone()[0]
-#         print(f"Total map insurance rows in database: {count}")
-
-#         cursor.execute("SELECT * FROM map_insurance LIMIT 5")
-#         rows = cursor.fetchall()
-
-#         print("First 5 map insurance rows:")
-#         for row in rows:
-#             print(f"ID: {row[0]}, State: {row[1]}, Year: {row[2]}, Quarter: {row[3]}, "
-#                   f"Lat: {row[4]}, Lng: {row[5]}, Metric: {row[6]}, Label: {row[7]}")
-
-#     except Exception as e:
-#         print(f"Map insurance read error: {e}")
-#         conn.rollback()
+        for j in Agg_yr:
+            p_j = p_i + j + "/"
+            Agg_yr_list = list_dir(p_j)
+
+            for k in Agg_yr_list:
+                if not in_periods(periods, j, k):
+                    continue
+                p_k = p_j + k
+
+                try:
+                    with open(p_k, 'r') as Data:
+                        D = load_json(Data)
+
+                    rows = ((D.get('data') or {}).get('data') or {}).get('data') or []
+                    point_frames.append(point_frame(rows, i, int(j), int(os.path.splitext(k)[0])))
+
+                except Exception as e:
+                    print(f"Error reading {p_k}: {e}")
+                    continue
+
+    columns = ["State", "Year", "Quarter", "Latitude", "Longitude", "Metric"]
+    points = pd.concat(point_frames, ignore_index=True) if point_frames else pd.DataFrame(columns=columns)
+    Map_Insurance = compact_frame(points, "map_insurance")
+    Map_Insurance_Bins = compact_frame(bin_points(Map_Insurance), "map_insurance_bins")
+
+    print(f"Successfully created Map Insurance DataFrame with {len(Map_Insurance)} points")
+    print(f"Successfully created Map Insurance Bins DataFrame with {len(Map_Insurance_Bins)} cells "
+          f"at {len(MAP_BIN_SIZES)} zoom levels")
+
+    return Map_Insurance, Map_Insurance_Bins
+
+@profiled("load")
+def create_map_insurance_tables(conn):
+    """Create the map insurance point and bin tables if they don't exist"""
+    try:
+        conn.rollback()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS map_insurance (
+                id SERIAL PRIMARY KEY,
+                State VARCHAR(100),
+                Year INT,
+                Quarter INT,
+                Latitude REAL,
+                Longitude REAL,
+                Metric REAL
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS map_insurance_bins (
+                id SERIAL PRIMARY KEY,
+                State VARCHAR(100),
+                Year INT,
+                Quarter INT,
+                Zoom SMALLINT,
+                Cell_row INT,
+                Cell_col INT,
+                Points INT,
+                Metric DOUBLE PRECISION
+            )
+        """)
+
+        conn.commit()
+        print("Map insurance tables created successfully!")
+        return True
+
+    except Exception as e:
+        print(f"Map insurance table creation error: {e}")
+        conn.rollback()
+        return False
+
+@profiled("load")
+def save_map_insurance_to_postgres(points_df, bins_df, conn, periods=None):
+    try:
+        conn.rollback()
+        cursor = conn.cursor()
+
+        # Clear existing data
+        clear_table(cursor, "map_insurance", periods)
+        clear_table(cursor, "map_insurance_bins", periods)
+
+        insert_frame(cursor, "map_insurance", points_df)
+        insert_frame(cursor, "map_insurance_bins", bins_df)
+
+        mark_loaded(cursor, "map_insurance", points_df, periods)
+        mark_loaded(cursor, "map_insurance_bins", bins_df, periods)
+        conn.commit()
+        print("Map insurance data saved to PostgreSQL database!")
+        return True
+
+    except Exception as e:
+        print(f"Map insurance save error: {e}")
+        conn.rollback()
+        return False
+
+def show_map_insurance_from_postgres(conn):
+    try:
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT COUNT(*) FROM map_insurance")
+        print(f"Total map insurance points in database: {cursor.fetchone()[0]}")
+
+        cursor.execute("SELECT Zoom, COUNT(*), SUM(Points) FROM map_insurance_bins GROUP BY Zoom ORDER BY Zoom")
+        for zoom, cells, points in cursor.fetchall():
+            print(f"Zoom {zoom} ({MAP_BIN_SIZES[zoom]}° cells): {cells} cells, {points} points")
+
+    except Exception as e:
+        print(f"Map insurance read error: {e}")
+        conn.rollback()
 
 
 # --------------------------------Map Insurance Hover Data--------------------------------
 
-def map_insurance_hover_data():
-    path = "data/map/insurance/hover/country/india/state/"
+def map_insurance_hover_data(periods=None):
+    path = os.path.join(DATA_ROOT, "map/insurance/hover/country/india/state/")
 
     if not os.path.exists(path):
         print("Path not found!")
         return None
 
-    Agg_state_list = os.listdir(path)
+    Agg_state_list = list_dir(path)
     print(f"Found {len(Agg_state_list)} states for map insurance hover data")
 
     # Data for map insurance hover
@@ -1179,18 +1332,20 @@ def map_insurance_hover_data():
 
     for i in Agg_state_list:
         p_i = path + i + "/"
-        Agg_yr = os.listdir(p_i)
+        Agg_yr = list_dir(p_i)
 
         for j in Agg_yr:
             p_j = p_i + j + "/"
-            Agg_yr_list = os.listdir(p_j)
+            Agg_yr_list = list_dir(p_j)
 
             for k in Agg_yr_list:
+                if not in_periods(periods, j, k):
+                    continue
                 p_k = p_j + k
 
                 try:
                     with open(p_k, 'r') as Data:
-                        D = json.load(Data)
+                        D = load_json(Data)
 
                     # Extract hover data list
                     if D['data']['hoverDataList']:
@@ -1211,12 +1366,13 @@ def map_insurance_hover_data():
                     continue
 
     # Create DataFrame
-    Map_Insurance_Hover = pd.DataFrame(map_insurance_data)
+    Map_Insurance_Hover = compact_frame(store_money(pd.DataFrame(map_insurance_data), "Amount"), "map_insurance_hover")
 
     print(f"Successfully created Map Insurance Hover DataFrame with {len(Map_Insurance_Hover)} rows")
 
     return Map_Insurance_Hover
 
+@profiled("load")
 def create_map_insurance_hover_table(conn):
     """Create map insurance hover table in PostgreSQL if it doesn't exist"""
     try:
@@ -1225,7 +1381,7 @@ def create_map_insurance_hover_table(conn):
         # Check if table already exists and has data
         cursor.execute("""
             SELECT EXISTS (
-                SELECT FROM information_schema.tables 
+                SELECT 1 FROM information_schema.tables 
                 WHERE table_name = 'map_insurance_hover'
             )
         """)
@@ -1241,7 +1397,7 @@ def create_map_insurance_hover_table(conn):
             else:
                 print("Table map_insurance_hover exists but is empty. Proceeding with data insertion.")
 
-        create_map_insurance_query = '''
+        create_map_insurance_query = f'''
             CREATE TABLE IF NOT EXISTS map_insurance_hover (
                 id SERIAL PRIMARY KEY,
                 State VARCHAR(100),
@@ -1249,7 +1405,7 @@ def create_map_insurance_hover_table(conn):
                 Quarter INT,
                 District VARCHAR(100),
                 Count BIGINT,
-                Amount NUMERIC(30,2)
+                Amount {MONEY_TYPE}
             )
         '''
 
@@ -1263,33 +1419,16 @@ def create_map_insurance_hover_table(conn):
         conn.rollback()
         return False
 
-def save_map_insurance_hover_to_postgres(df, conn):
+@profiled("load")
+def save_map_insurance_hover_to_postgres(df, conn, periods=None):
     try:
         cursor = conn.cursor()
 
         # Clear existing data
-        cursor.execute("DELETE FROM map_insurance_hover")
-        conn.commit()
+        clear_table(cursor, "map_insurance_hover", periods)
 
-        # Prepare insert query
-        insert_query = '''
-            INSERT INTO map_insurance_hover (State, Year, Quarter, District, Count, Amount)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        '''
-
-        data = [
-            (
-                row['State'],
-                int(row['Year']),
-                int(row['Quarter']),
-                row['District'],
-                int(row['Count']),
-                float(row['Amount'])
-            )
-            for _, row in df.iterrows()
-        ]
-
-        execute_batch(cursor, insert_query, data, page_size=1000)
+        insert_frame(cursor, "map_insurance_hover", df)
+        mark_loaded(cursor, "map_insurance_hover", df, periods)
         conn.commit()
         print("Map insurance hover data saved to PostgreSQL database!")
         return True
@@ -1321,14 +1460,14 @@ def show_map_insurance_hover_from_postgres(conn):
 
 # --------------------------------Map transaction hover Data--------------------------------
 
-def map_transaction_hover_data():
-    path = "data/map/transaction/hover/country/india/state/"
+def map_transaction_hover_data(periods=None):
+    path = os.path.join(DATA_ROOT, "map/transaction/hover/country/india/state/")
 
     if not os.path.exists(path):
         print("Path not found!")
         return None
 
-    Agg_state_list = os.listdir(path)
+    Agg_state_list = list_dir(path)
     print(f"Found {len(Agg_state_list)} states for map transaction hover data")
 
     # Data for map transaction hover
@@ -1336,18 +1475,20 @@ def map_transaction_hover_data():
 
     for i in Agg_state_list:
         p_i = path + i + "/"
-        Agg_yr = os.listdir(p_i)
+        Agg_yr = list_dir(p_i)
 
         for j in Agg_yr:
             p_j = p_i + j + "/"
-            Agg_yr_list = os.listdir(p_j)
+            Agg_yr_list = list_dir(p_j)
 
             for k in Agg_yr_list:
+                if not in_periods(periods, j, k):
+                    continue
                 p_k = p_j + k
 
                 try:
                     with open(p_k, 'r') as Data:
-                        D = json.load(Data)
+                        D = load_json(Data)
 
                     # Extract hover data list
                     if D['data']['hoverDataList']:
@@ -1368,18 +1509,19 @@ def map_transaction_hover_data():
                     continue
 
     # Create DataFrame
-    Map_Transaction_Hover = pd.DataFrame(map_transaction_data)
+    Map_Transaction_Hover = compact_frame(store_money(pd.DataFrame(map_transaction_data), "Amount"), "map_transaction_hover")
 
     print(f"Successfully created Map Transaction Hover DataFrame with {len(Map_Transaction_Hover)} rows")
 
     return Map_Transaction_Hover
 
+@profiled("load")
 def create_map_transaction_hover_table(conn):
     """Create map transaction hover table in PostgreSQL if it doesn't exist"""
     try:
         cursor = conn.cursor()
 
-        create_map_transaction_query = '''
+        create_map_transaction_query = f'''
             CREATE TABLE IF NOT EXISTS map_transaction_hover (
                 id SERIAL PRIMARY KEY,
                 State VARCHAR(100),
@@ -1387,7 +1529,7 @@ def create_map_transaction_hover_table(conn):
                 Quarter INT,
                 District VARCHAR(100),
                 Count BIGINT,
-                Amount NUMERIC(30,2)
+                Amount {MONEY_TYPE}
             )
         '''
 
@@ -1401,32 +1543,16 @@ def create_map_transaction_hover_table(conn):
         conn.rollback()
         return False
 
-def save_map_transaction_hover_to_postgres(df, conn):
+@profiled("load")
+def save_map_transaction_hover_to_postgres(df, conn, periods=None):
     try:
         cursor = conn.cursor()
 
         # Clear old data
-        cursor.execute("DELETE FROM map_transaction_hover")
-        conn.commit()
-
-        insert_query = '''
-            INSERT INTO map_transaction_hover (State, Year, Quarter, District, Count, Amount)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        '''
+        clear_table(cursor, "map_transaction_hover", periods)
 
-        data = [
-            (
-                row['State'],
-                int(row['Year']),
-                int(row['Quarter']),
-                str(row['District']).title(),
-                int(row['Count']),
-                float(row['Amount'])
-            )
-            for _, row in df.iterrows()
-        ]
-
-        execute_batch(cursor, insert_query, data, page_size=1000)
+        insert_frame(cursor, "map_transaction_hover", df.assign(District=df["District"].astype(str).str.title()))
+        mark_loaded(cursor, "map_transaction_hover", df, periods)
         conn.commit()
         print("Map transaction hover data saved to PostgreSQL database!")
         return True
@@ -1458,14 +1584,14 @@ def show_map_transaction_hover_from_postgres(conn):
 
 # --------------------------------Map User hover Data--------------------------------
 
-def map_user_hover_data():
-    path = "data/map/user/hover/country/india/state/"
+def map_user_hover_data(periods=None):
+    path = os.path.join(DATA_ROOT, "map/user/hover/country/india/state/")
 
     if not os.path.exists(path):
         print("Path not found!")
         return None
 
-    Agg_state_list = os.listdir(path)
+    Agg_state_list = list_dir(path)
     print(f"Found {len(Agg_state_list)} states for map user hover data")
 
     # Data for map user hover
@@ -1473,18 +1599,20 @@ def map_user_hover_data():
 
     for i in Agg_state_list:
         p_i = path + i + "/"
-        Agg_yr = os.listdir(p_i)
+        Agg_yr = list_dir(p_i)
 
         for j in Agg_yr:
             p_j = p_i + j + "/"
-            Agg_yr_list = os.listdir(p_j)
+            Agg_yr_list = list_dir(p_j)
 
             for k in Agg_yr_list:
+                if not in_periods(periods, j, k):
+                    continue
                 p_k = p_j + k
 
                 try:
                     with open(p_k, 'r') as Data:
-                        D = json.load(Data)
+                        D = load_json(Data)
 
                     # Extract hover data (different structure from insurance/transaction)
                     if D['data']['hoverData']:
@@ -1504,12 +1632,13 @@ def map_user_hover_data():
                     continue
 
     # Create DataFrame
-    Map_User_Hover = pd.DataFrame(map_user_data)
+    Map_User_Hover = compact_frame(pd.DataFrame(map_user_data), "map_user_hover")
 
     print(f"Successfully created Map User Hover DataFrame with {len(Map_User_Hover)} rows")
 
     return Map_User_Hover
 
+@profiled("load")
 def create_map_user_hover_table(conn):
     """Create map user hover table in PostgreSQL if it doesn't exist"""
     try:
@@ -1537,32 +1666,16 @@ def create_map_user_hover_table(conn):
         conn.rollback()
         return False
 
-def save_map_user_hover_to_postgres(df, conn):
+@profiled("load")
+def save_map_user_hover_to_postgres(df, conn, periods=None):
     try:
         cursor = conn.cursor()
 
         # Clear existing data
-        cursor.execute("DELETE FROM map_user_hover")
-        conn.commit()
-
-        insert_query = '''
-            INSERT INTO map_user_hover (State, Year, Quarter, District, Registered_Users, App_Opens)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        '''
+        clear_table(cursor, "map_user_hover", periods)
 
-        data = [
-            (
-                row['State'],
-                int(row['Year']),
-                int(row['Quarter']),
-                str(row['District']).title(),
-                int(row['Registered_Users']),
-                int(row['App_Opens'])
-            )
-            for _, row in df.iterrows()
-        ]
-
-        execute_batch(cursor, insert_query, data, page_size=1000)
+        insert_frame(cursor, "map_user_hover", df.assign(District=df["District"].astype(str).str.title()))
+        mark_loaded(cursor, "map_user_hover", df, periods)
         conn.commit()
         print("Map user hover data saved to PostgreSQL database!")
         return True
@@ -1592,655 +1705,755 @@ def show_map_user_hover_from_postgres(conn):
         conn.rollback()
 
 
-# --------------------------------Main Function--------------------------------
-def main():
-    # Get PostgreSQL connection
-    conn = connect_to_database()
-    if conn is None:
-        print("Failed to connect to PostgreSQL!")
+# --------------------------------Country Level Data--------------------------------
+# The aggregated/* and top/* datasets also have country/india/<year>/<quarter>.json files, next to the
+# state/ subtree: national totals and India-wide top states, districts and pincodes. Loaded as-is into
+# *_country tables, national KPIs and rankings read a few rows instead of summing every state row.
+
+# table: column definitions, in the order of its PARQUET_DATASETS columns
+COUNTRY_TABLES = {
+    "agg_insurance_country": ["Year INT", "Quarter INT", "Insurance_type VARCHAR(100)", "Insurance_count BIGINT",
+                              f"Insurance_amount {MONEY_TYPE}"],
+    "agg_transaction_country": ["Year INT", "Quarter INT", "Transaction_type VARCHAR(100)",
+                                "Transaction_count BIGINT", f"Transaction_amount {MONEY_TYPE}"],
+    "agg_user_country": ["Year INT", "Quarter INT", "Registered_Users BIGINT", "App_Opens BIGINT"],
+    "agg_user_device_country": ["Year INT", "Quarter INT", "Brand VARCHAR(100)", "User_Count BIGINT",
+                                "Percentage NUMERIC(12,6)"],
+    "top_insurance_country": ["Year INT", "Quarter INT", "Level VARCHAR(10)", "Entity_name VARCHAR(100)",
+                              "Count BIGINT", f"Amount {MONEY_TYPE}"],
+    "top_transaction_country": ["Year INT", "Quarter INT", "Level VARCHAR(10)", "Entity_name VARCHAR(100)",
+                                "Count BIGINT", f"Amount {MONEY_TYPE}"],
+    "top_user_country": ["Year INT", "Quarter INT", "Level VARCHAR(10)", "Entity_name VARCHAR(100)",
+                         "Registered_Users BIGINT"],
+}
+
+# top/* lists of a country file, and the Level they are stored under
+TOP_LEVELS = {"states": "state", "districts": "district", "pincodes": "pincode"}
+
+
+def country_files(dataset, periods=None):
+    """(year, quarter, parsed JSON) of every country file of a dataset, e.g. "aggregated/transaction" """
+    path = os.path.join(DATA_ROOT, dataset, "country/india")
+    if not os.path.exists(path):
+        print("Path not found!")
         return
+    # The year folders sit next to the state/ subtree
+    for j in sorted(year for year in list_dir(path) if year.isdigit()):
+        p_j = os.path.join(path, j)
+        for k in sorted(list_dir(p_j)):
+            if not in_periods(periods, j, k):
+                continue
+            p_k = os.path.join(p_j, k)
+            try:
+                with open(p_k, 'r') as Data:
+                    yield int(j), int(os.path.splitext(k)[0]), load_json(Data)
+            except Exception as e:
+                print(f"Error reading {p_k}: {e}")
 
-#--------------------------------Aggregated Insurance Data--------------------------------
-    # Check if insurance data already exists
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM agg_insurance")
-    insurance_count = cursor.fetchone()[0]
-    
-    if insurance_count == 0:
-        # Extract insurance data
-        insurance_df = agg_insurance_data()
-        if insurance_df is None:
-            print("Failed to extract insurance data!")
-            conn.close()
-            return
-        
-        # Create insurance table
-        if not insurance_table(conn):
-            print("Failed to create insurance table!")
-            conn.close()
-            return
-        
-        # Save insurance data
-        insurance_success = save_to_postgres(insurance_df, conn)
-        if not insurance_success:
-            print("Failed to save insurance data!")
-            conn.close()
-            return
-        
-        show_data_from_postgres(conn)
-    else:
-        print(f"Insurance data already exists ({insurance_count} rows), skipping...")
 
-    #--------------------------------Aggregated Transaction Data--------------------------------
-    # Check if transaction data already exists
-    try:
-        cursor.execute("SELECT COUNT(*) FROM agg_transaction")
-        transaction_count = cursor.fetchone()[0]
-        
-        if transaction_count == 0:
-            # Extract transaction data
-            transaction_df = agg_transaction_data()
-            if transaction_df is None:
-                print("Failed to extract transaction data!")
-                conn.close()
-                return
-            
-            # Create transaction table
-            if not transaction_table(conn):
-                print("Failed to create transaction table!")
-                conn.close()
-                return
-            
-            # Save transaction data
-            transaction_success = agg_transaction_db_save(transaction_df, conn)
-            if not transaction_success:
-                print("Failed to save transaction data!")
-                conn.close()
-                return
-            
-            agg_transaction_db_show(conn)
-        else:
-            print(f"Transaction data already exists ({transaction_count} rows), skipping...")
-    except Exception as e:
-        print("Transaction table doesn't exist, creating and processing... " + str(e))
-        
-        # Extract transaction data
-        transaction_df = agg_transaction_data()
-        if transaction_df is None:
-            print("Failed to extract transaction data!")
-            conn.close()
-            return
-        
-        # Create transaction table
-        if not transaction_table(conn):
-            print("Failed to create transaction table!")
-            conn.close()
-            return
-        
-        # Save transaction data
-        transaction_success = agg_transaction_db_save(transaction_df, conn)
-        if not transaction_success:
-            print("Failed to save transaction data!")
-            conn.close()
-            return
-        
-        agg_transaction_db_show(conn)
-        
-    #--------------------------------Aggregated User Data--------------------------------
-    # Check if user data already exists
-    try:
-        cursor.execute("SELECT COUNT(*) FROM agg_user")
-        user_count = cursor.fetchone()[0]
-        
-        if user_count == 0:
-            # Extract user data
-            user_aggregated_df, user_device_df = agg_user_data()
-            if user_aggregated_df is None or user_device_df is None:
-                print("Failed to extract user data!")
-                conn.close()
-                return
-
-            # Create user tables
-            if not create_user_tables(conn):
-                print("Failed to create user tables!")
-                conn.close()
-                return
-
-            # Save user data
-            user_success = save_user_data_to_postgres(user_aggregated_df, user_device_df, conn)
-            if not user_success:
-                print("Failed to save user data!")
-                conn.close()
-                return
-
-            show_user_data_from_postgres(conn)
-        else:
-            print(f"User data already exists ({user_count} rows), skipping...")
-    except Exception as e:
-        print("User table doesn't exist, creating and processing..." + str(e))
-        
-        # Extract user data
-        user_aggregated_df, user_device_df = agg_user_data()
-        if user_aggregated_df is None or user_device_df is None:
-            print("Failed to extract user data!")
-            conn.close()
-            return
+def payment_rows(dataset, periods):
+    """(year, quarter, name, count, amount) of every transactionData entry of the country files"""
+    rows = []
+    for year, quarter, D in country_files(dataset, periods):
+        for z in D.get("data", {}).get("transactionData") or []:
+            if z.get("paymentInstruments"):
+                instrument = z["paymentInstruments"][0]
+                rows.append((year, quarter, z["name"], instrument.get("count", 0), instrument.get("amount", 0.0)))
+    return rows
 
-        # Create user tables
-        if not create_user_tables(conn):
-            print("Failed to create user tables!")
-            conn.close()
-            return
 
-        # Save user data
-        user_success = save_user_data_to_postgres(user_aggregated_df, user_device_df, conn)
-        if not user_success:
-            print("Failed to save user data!")
-            conn.close()
-            return
+def country_frame(rows, table, money_column=None):
+    df = pd.DataFrame(rows, columns=PARQUET_DATASETS[table])
+    if money_column:
+        store_money(df, money_column)
+    return compact_frame(df, table)
 
-        show_user_data_from_postgres(conn)
 
-    # -------------- Top Insurance Data ---------------------------------
-    conn.rollback()
-    
-    # Get a fresh cursor after rollback
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("SELECT COUNT(*) FROM top_insurance_district")
-        top_insurance_district_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM top_insurance_pincode")
-        top_insurance_pincode_count = cursor.fetchone()[0]
-        
-        if top_insurance_district_count == 0 and top_insurance_pincode_count == 0:
-            print("Top insurance data doesn't exist, creating and processing...")
-            # Extract top insurance data
-            top_insurance_district_df, top_insurance_pincode_df = top_insurance_data()
-            if top_insurance_district_df is None or top_insurance_pincode_df is None:
-                print("Failed to extract top insurance data!")
-                conn.close()
-                return
-
-            # Create top insurance tables
-            if not create_top_insurance_tables(conn):
-                print("Failed to create top insurance tables!")
-                conn.close()
-                return
-
-            # Save top insurance data
-            top_insurance_success = save_top_insurance_to_postgres(top_insurance_district_df, top_insurance_pincode_df, conn)
-            if not top_insurance_success:
-                print("Failed to save top insurance data!")
-                conn.close()
-                return
-
-            show_top_insurance_from_postgres(conn)
-        else:
-            print(f"Top insurance data already exists (District: {top_insurance_district_count} rows, Pincode: {top_insurance_pincode_count} rows), skipping...")
-    except Exception as e:
-        # Tables don't exist, so process top insurance data
-        print("Top insurance tables don't exist, creating and processing... " + str(e))
-        
-        # Extract top insurance data
-        top_insurance_district_df, top_insurance_pincode_df = top_insurance_data()
-        if top_insurance_district_df is None or top_insurance_pincode_df is None:
-            print("Failed to extract top insurance data!")
-            conn.close()
-            return
+def agg_insurance_country_data(periods=None):
+    return country_frame(payment_rows("aggregated/insurance", periods), "agg_insurance_country", "Insurance_amount")
 
-        # Create top insurance tables
-        if not create_top_insurance_tables(conn):
-            print("Failed to create top insurance tables!")
-            conn.close()
-            return
 
-        # Save top insurance data
-        top_insurance_success = save_top_insurance_to_postgres(top_insurance_district_df, top_insurance_pincode_df, conn)
-        if not top_insurance_success:
-            print("Failed to save top insurance data!")
-            conn.close()
-            return
+def agg_transaction_country_data(periods=None):
+    return country_frame(payment_rows("aggregated/transaction", periods), "agg_transaction_country",
+                         "Transaction_amount")
 
-        show_top_insurance_from_postgres(conn)
 
-    # -------------- Top Transaction Data ---------------------------------
-    conn.rollback()
-    
-    # Get a fresh cursor after rollback
-    cursor = conn.cursor()
-    
-    # Check if top transaction data already exists
-    try:
-        cursor.execute("SELECT COUNT(*) FROM top_transaction_district")
-        top_transaction_district_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM top_transaction_pincode")
-        top_transaction_pincode_count = cursor.fetchone()[0]
-        
-        if top_transaction_district_count == 0 and top_transaction_pincode_count == 0:
-            print("Top transaction data doesn't exist, creating and processing...")
-            # Extract top transaction data
-            top_transaction_district_df, top_transaction_pincode_df = top_transaction_data()
-            if top_transaction_district_df is None or top_transaction_pincode_df is None:
-                print("Failed to extract top transaction data!")
-                conn.close()
-                return
-
-            # Create top transaction tables
-            if not create_top_transaction_tables(conn):
-                print("Failed to create top transaction tables!")
-                conn.close()
-                return
-
-            # Save top transaction data
-            top_transaction_success = save_top_transaction_to_postgres(top_transaction_district_df, top_transaction_pincode_df, conn)
-            if not top_transaction_success:
-                print("Failed to save top transaction data!")
-                conn.close()
-                return
-
-            show_top_transaction_from_postgres(conn)
-        else:
-            print(f"Top transaction data already exists (District: {top_transaction_district_count} rows, Pincode: {top_transaction_pincode_count} rows), skipping...")
-    except Exception as e:
-        # Tables don't exist, so process top transaction data
-        print("Top transaction tables don't exist, creating and processing... " + str(e))
-        
-        # Extract top transaction data
-        top_transaction_district_df, top_transaction_pincode_df = top_transaction_data()
-        if top_transaction_district_df is None or top_transaction_pincode_df is None:
-            print("Failed to extract top transaction data!")
-            conn.close()
-            return
+def agg_user_country_data(periods=None):
+    user_rows, device_rows = [], []
+    for year, quarter, D in country_files("aggregated/user", periods):
+        aggregated = D.get("data", {}).get("aggregated") or {}
+        user_rows.append((year, quarter, aggregated.get("registeredUsers", 0), aggregated.get("appOpens", 0)))
+        # usersByDevice is null in the later quarters
+        for device in D["data"].get("usersByDevice") or []:
+            device_rows.append((year, quarter, device["brand"], device["count"], device["percentage"]))
+    return country_frame(user_rows, "agg_user_country"), country_frame(device_rows, "agg_user_device_country")
 
-        # Create top transaction tables
-        if not create_top_transaction_tables(conn):
-            print("Failed to create top transaction tables!")
-            conn.close()
-            return
 
-        # Save top transaction data
-        top_transaction_success = save_top_transaction_to_postgres(top_transaction_district_df, top_transaction_pincode_df, conn)
-        if not top_transaction_success:
-            print("Failed to save top transaction data!")
-            conn.close()
-            return
+def top_metric_rows(dataset, periods):
+    """(year, quarter, level, name, count, amount) of the states, districts and pincodes lists"""
+    rows = []
+    for year, quarter, D in country_files(dataset, periods):
+        for key, level in TOP_LEVELS.items():
+            for entity in D.get("data", {}).get(key) or []:
+                rows.append((year, quarter, level, entity["entityName"],
+                             entity["metric"]["count"], entity["metric"]["amount"]))
+    return rows
 
-        show_top_transaction_from_postgres(conn)
 
-    # -------------- Top User Data ---------------------------------
-    conn.rollback()
-    
-    # Get a fresh cursor after rollback
-    cursor = conn.cursor()
-    
-    # Check if top user data already exists
+def top_insurance_country_data(periods=None):
+    return country_frame(top_metric_rows("top/insurance", periods), "top_insurance_country", "Amount")
+
+
+def top_transaction_country_data(periods=None):
+    return country_frame(top_metric_rows("top/transaction", periods), "top_transaction_country", "Amount")
+
+
+def top_user_country_data(periods=None):
+    rows = []
+    for year, quarter, D in country_files("top/user", periods):
+        for key, level in TOP_LEVELS.items():
+            for entity in D.get("data", {}).get(key) or []:
+                rows.append((year, quarter, level, entity["name"], entity["registeredUsers"]))
+    return country_frame(rows, "top_user_country")
+
+
+def country_loaders(*tables):
+    """(create, save, show) for an extractor's *_country tables, all built from COUNTRY_TABLES"""
+    label = ", ".join(tables)
+
+    @profiled("load")
+    def create(conn):
+        try:
+            conn.rollback()
+            cursor = conn.cursor()
+            for table in tables:
+                columns = ",\n".join(COUNTRY_TABLES[table])
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (id SERIAL PRIMARY KEY, {columns})")
+            conn.commit()
+            print(f"Country tables {label} created successfully!")
+            return True
+        except Exception as e:
+            print(f"Country table creation error: {e}")
+            conn.rollback()
+            return False
+
+    @profiled("load")
+    def save(*args, periods=None):
+        # save(*frames, conn), like the other save functions
+        *frames, conn = args
+        try:
+            conn.rollback()
+            cursor = conn.cursor()
+            for table, df in zip(tables, frames):
+                clear_table(cursor, table, periods)
+                insert_frame(cursor, table, df)
+                mark_loaded(cursor, table, df, periods)
+            conn.commit()
+            print(f"Country data saved to {label}!")
+            return True
+        except Exception as e:
+            print(f"Country data save error: {e}")
+            conn.rollback()
+            return False
+
+    def show(conn):
+        try:
+            cursor = conn.cursor()
+            for table in tables:
+                cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                print(f"📊 Total {table} rows: {cursor.fetchone()[0]}")
+        except Exception as e:
+            print(f"Country data read error: {e}")
+            conn.rollback()
+
+    return create, save, show
+
+
+# --------------------------------Scatter Sample Tables--------------------------------
+
+@profiled("load", "scatter_samples")
+def create_scatter_sample_tables(conn):
+    """Materialise the stratified scatter samples (see queries.SCATTER_SAMPLES)"""
     try:
-        cursor.execute("SELECT COUNT(*) FROM top_user_district")
-        top_user_district_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM top_user_pincode")
-        top_user_pincode_count = cursor.fetchone()[0]
-        
-        if top_user_district_count == 0 and top_user_pincode_count == 0:
-            print("Top user data doesn't exist, creating and processing...")
-            # Extract top user data
-            top_user_district_df, top_user_pincode_df = top_user_data()
-            if top_user_district_df is None or top_user_pincode_df is None:
-                print("Failed to extract top user data!")
-                conn.close()
-                return
-
-            # Create top user tables
-            if not create_top_user_tables(conn):
-                print("Failed to create top user tables!")
-                conn.close()
-                return
-
-            # Save top user data
-            top_user_success = save_top_user_to_postgres(top_user_district_df, top_user_pincode_df, conn)
-            if not top_user_success:
-                print("Failed to save top user data!")
-                conn.close()
-                return
-
-            show_top_user_from_postgres(conn)
-        else:
-            print(f"Top user data already exists (District: {top_user_district_count} rows, Pincode: {top_user_pincode_count} rows), skipping...")
+        conn.rollback()
+        cursor = conn.cursor()
+
+        for table, sample_query in SCATTER_SAMPLES.items():
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(f"CREATE TABLE {table} AS {sample_query}")
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            print(f"Scatter sample table {table} created with {cursor.fetchone()[0]} rows")
+
+        conn.commit()
+        return True
+
     except Exception as e:
-        # Tables don't exist, so process top user data
-        print("Top user tables don't exist, creating and processing..." + str(e))
-        
-        # Extract top user data
-        top_user_district_df, top_user_pincode_df = top_user_data()
-        if top_user_district_df is None or top_user_pincode_df is None:
-            print("Failed to extract top user data!")
-            conn.close()
-            return
+        print(f"Scatter sample table creation error: {e}")
+        conn.rollback()
+        return False
 
-        # Create top user tables
-        if not create_top_user_tables(conn):
-            print("Failed to create top user tables!")
-            conn.close()
-            return
 
-        # Save top user data
-        top_user_success = save_top_user_to_postgres(top_user_district_df, top_user_pincode_df, conn)
-        if not top_user_success:
-            print("Failed to save top user data!")
-            conn.close()
-            return
+# --------------------------------Growth Rollups--------------------------------
 
-        show_top_user_from_postgres(conn)
-        
-    # -------------- Map Insurance Data ---------------------------------
-    
-    # try:
-    #     # Get a fresh cursor after rollback
-    #     cursor = conn.cursor()
-        
-    #     # Check if map insurance data already exists
-    #     cursor.execute("SELECT COUNT(*) FROM map_insurance")
-    #     map_insurance_count = cursor.fetchone()[0]
-        
-    #     if map_insurance_count == 0:
-    #         print("Map insurance data doesn't exist, creating and processing...")
-    #         # Extract map insurance data
-    #         map_insurance_df = map_insurance_data()
-    #         if map_insurance_df is None:
-    #             print("Failed to extract map insurance data!")
-    #             conn.rollback()
-    #             conn.close()
-    #             return
-
-    #         # Create map insurance table
-    #         if not create_map_insurance_table(conn):
-    #             print("Failed to create map insurance table!")
-    #             conn.rollback()
-    #             conn.close()
-    #             return
-
-    #         # Save map insurance data
-    #         map_insurance_success = save_map_insurance_to_postgres(map_insurance_df, conn)
-    #         if not map_insurance_success:
-    #             print("Failed to save map insurance data!")
-    #             conn.rollback()
-    #             conn.close()
-    #             return
-
-    #         show_map_insurance_from_postgres(conn)
-    #     else:
-    #         print(f"Map insurance data already exists with {map_insurance_count} rows, skipping...")
-            
-    # except Exception as e:
-    #     # Table doesn't exist, so process map insurance data
-    #     print("Map insurance table doesn't exist, creating and processing..." + str(e))
-    #     conn.rollback()
-        
-    #     try:
-    #         # Extract map insurance data
-    #         map_insurance_df = map_insurance_data()
-    #         if map_insurance_df is None:
-    #             print("Failed to extract map insurance data!")
-    #             conn.rollback()
-    #             conn.close()
-    #             return
-
-    #         # Create map insurance table
-    #         if not create_map_insurance_table(conn):
-    #             print("Failed to create map insurance table!")
-    #             conn.rollback()
-    #             conn.close()
-    #             return
-
-    #         # Save map insurance data
-    #         map_insurance_success = save_map_insurance_to_postgres(map_insurance_df, conn)
-    #         if not map_insurance_success:
-    #             print("Failed to save map insurance data!")
-    #             conn.rollback()
-    #             conn.close()
-    #             return
-
-    #         show_map_insurance_from_postgres(conn)
-            
-    #     except Exception as inner_e:
-    #         print(f"Error during map insurance data processing: {inner_e}")
-    #         conn.rollback()
-    #         conn.close()
-    #         return
-        
-    # -------------- Map Insurance Hover Data ---------------------------------
-    
+@profiled("load", "growth_rollups")
+def create_growth_tables(conn):
+    """Materialise QoQ/YoY growth, cumulative and rolling 4-quarter totals (see queries.GROWTH_ROLLUPS)"""
     try:
-        # Get a fresh cursor after rollback
+        conn.rollback()
         cursor = conn.cursor()
-        
-        # Check if map insurance hover data already exists
-        cursor.execute("SELECT COUNT(*) FROM map_insurance_hover")
-        map_insurance_count = cursor.fetchone()[0]
-        
-        if map_insurance_count == 0:
-            print("Map insurance hover data doesn't exist, creating and processing...")
-            # Extract map insurance hover data
-            map_insurance_hover_df = map_insurance_hover_data()
-            if map_insurance_hover_df is None:
-                print("Failed to extract map insurance hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Create map insurance hover table
-            if not create_map_insurance_hover_table(conn):
-                print("Failed to create map insurance hover table!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Save map insurance hover data
-            map_insurance_success = save_map_insurance_hover_to_postgres(map_insurance_hover_df, conn)
-            if not map_insurance_success:
-                print("Failed to save map insurance hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            show_map_insurance_hover_from_postgres(conn)
-        else:
-            print(f"Map insurance hover data already exists with {map_insurance_count} rows, skipping...")
-            
+
+        for table, (source, keys, measure) in GROWTH_ROLLUPS.items():
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(f"CREATE TABLE {table} AS {growth_sql(source, keys, measure)}")
+            cursor.execute(f"CREATE INDEX idx_{table}_period ON {table} (Period)")
+            cursor.execute(f"CREATE INDEX idx_{table}_keys ON {table} ({', '.join(keys)}, Period)")
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            print(f"Growth table {table} created with {cursor.fetchone()[0]} rows")
+
+        conn.commit()
+        return True
+
     except Exception as e:
-        # Table doesn't exist, so process map insurance hover data
-        print("Map insurance hover table doesn't exist, creating and processing..." + str(e))
+        print(f"Growth table creation error: {e}")
         conn.rollback()
-        
-        try:
-            # Extract map insurance hover data
-            map_insurance_hover_df = map_insurance_hover_data()
-            if map_insurance_hover_df is None:
-                print("Failed to extract map insurance hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Create map insurance hover table
-            if not create_map_insurance_hover_table(conn):
-                print("Failed to create map insurance hover table!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Save map insurance hover data
-            map_insurance_success = save_map_insurance_hover_to_postgres(map_insurance_hover_df, conn)
-            if not map_insurance_success:
-                print("Failed to save map insurance hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            show_map_insurance_hover_from_postgres(conn)
-            
-        except Exception as inner_e:
-            print(f"Error during map insurance hover data processing: {inner_e}")
-            conn.rollback()
-            conn.close()
-            return
+        return False
 
-    # -------------- Map Transaction Hover Data ---------------------------------
-    
+
+# --------------------------------Data Version Stamp--------------------------------
+
+@profiled("load", "data_version")
+def stamp_data_version(conn):
+    """Record the load time, app.py in snapshot mode reloads its in-memory tables when it changes"""
     try:
-        # Get a fresh cursor after rollback
+        conn.rollback()
         cursor = conn.cursor()
-        
-        # Check if map transaction hover data already exists
-        cursor.execute("SELECT COUNT(*) FROM map_transaction_hover")
-        map_transaction_count = cursor.fetchone()[0]
-        
-        if map_transaction_count == 0:
-            print("Map transaction hover data doesn't exist, creating and processing...")
-            # Extract map transaction hover data
-            map_transaction_hover_df = map_transaction_hover_data()
-            if map_transaction_hover_df is None:
-                print("Failed to extract map transaction hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Create map transaction hover table
-            if not create_map_transaction_hover_table(conn):
-                print("Failed to create map transaction hover table!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Save map transaction hover data
-            map_transaction_success = save_map_transaction_hover_to_postgres(map_transaction_hover_df, conn)
-            if not map_transaction_success:
-                print("Failed to save map transaction hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            show_map_transaction_hover_from_postgres(conn)
-        else:
-            print(f"Map transaction hover data already exists with {map_transaction_count} rows, skipping...")
-            
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS data_version (
+                id INT PRIMARY KEY,
+                loaded_at TIMESTAMPTZ NOT NULL
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO data_version (id, loaded_at) VALUES (1, CURRENT_TIMESTAMP)
+            ON CONFLICT (id) DO UPDATE SET loaded_at = EXCLUDED.loaded_at
+        """)
+
+        conn.commit()
+        print("Data version stamped")
+        return True
+
     except Exception as e:
-        # Table doesn't exist, so process map transaction hover data
-        print("Map transaction hover table doesn't exist, creating and processing..." + str(e))
+        print(f"Data version stamp error: {e}")
         conn.rollback()
-        
-        try:
-            # Extract map transaction hover data
-            map_transaction_hover_df = map_transaction_hover_data()
-            if map_transaction_hover_df is None:
-                print("Failed to extract map transaction hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Create map transaction hover table
-            if not create_map_transaction_hover_table(conn):
-                print("Failed to create map transaction hover table!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Save map transaction hover data
-            map_transaction_success = save_map_transaction_hover_to_postgres(map_transaction_hover_df, conn)
-            if not map_transaction_success:
-                print("Failed to save map transaction hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            show_map_transaction_hover_from_postgres(conn)
-            
-        except Exception as inner_e:
-            print(f"Error during map transaction hover data processing: {inner_e}")
-            conn.rollback()
-            conn.close()
-            return
+        return False
 
-    # -------------- Map User Hover Data ---------------------------------
-    
+
+# --------------------------------Ingest Checkpoints--------------------------------
+# One row per table and (year, quarter) partition, written by the save functions in the same transaction
+# as the partition's rows. A partition is either loaded and checkpointed or not there at all, so a run
+# that stops halfway resumes from the first partition without a checkpoint.
+CHECKPOINT_TABLE = "ingest_checkpoint"
+
+
+def create_checkpoint_table(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+            table_name VARCHAR(100),
+            Year INT,
+            Quarter INT,
+            Row_count BIGINT,
+            Loaded_at TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (table_name, Year, Quarter)
+        )
+    """)
+
+
+def mark_loaded(cursor, table, df, periods=None):
+    """Checkpoint the periods of a table just saved from df (without periods, every period df holds)"""
+    create_checkpoint_table(cursor)
+    if periods is None:
+        periods = {(int(year), int(quarter)) for year, quarter in df[["Year", "Quarter"]].drop_duplicates().values}
+        cursor.execute(f"DELETE FROM {CHECKPOINT_TABLE} WHERE table_name = %s", (table,))
+    rows = df.groupby([df["Year"].astype(int), df["Quarter"].astype(int)], observed=True).size()
+    for year, quarter in sorted(periods):
+        cursor.execute(f"""
+            INSERT INTO {CHECKPOINT_TABLE} (table_name, Year, Quarter, Row_count, Loaded_at)
+            VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (table_name, Year, Quarter) DO UPDATE
+            SET Row_count = EXCLUDED.Row_count, Loaded_at = EXCLUDED.Loaded_at
+        """, (table, year, quarter, int(rows.get((year, quarter), 0))))
+
+
+def checkpointed_periods(conn, tables):
+    """(year, quarter) periods checkpointed for every one of the tables, none before the first load"""
+    cursor = conn.cursor()
     try:
-        # Get a fresh cursor after rollback
-        cursor = conn.cursor()
-        
-        # Check if map user hover data already exists
-        cursor.execute("SELECT COUNT(*) FROM map_user_hover")
-        map_user_count = cursor.fetchone()[0]
-        
-        if map_user_count == 0:
-            print("Map user hover data doesn't exist, creating and processing...")
-            # Extract map user hover data
-            map_user_hover_df = map_user_hover_data()
-            if map_user_hover_df is None:
-                print("Failed to extract map user hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Create map user hover table
-            if not create_map_user_hover_table(conn):
-                print("Failed to create map user hover table!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Save map user hover data
-            map_user_success = save_map_user_hover_to_postgres(map_user_hover_df, conn)
-            if not map_user_success:
-                print("Failed to save map user hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            show_map_user_hover_from_postgres(conn)
+        cursor.execute(f"""
+            SELECT Year, Quarter FROM {CHECKPOINT_TABLE}
+            WHERE table_name IN ({", ".join(["%s"] * len(tables))})
+            GROUP BY Year, Quarter
+            HAVING COUNT(*) = %s
+        """, (*tables, len(tables)))
+        return {(int(year), int(quarter)) for year, quarter in cursor.fetchall()}
+    except Exception:
+        conn.rollback()
+        return set()
+
+
+def stamp_is_current(conn):
+    """Whether the data version was stamped after the last checkpoint, i.e. the last run got to the end"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT (SELECT loaded_at FROM data_version WHERE id = 1)
+                >= (SELECT MAX(Loaded_at) FROM {CHECKPOINT_TABLE})
+        """)
+        return bool(cursor.fetchone()[0])
+    except Exception:
+        conn.rollback()
+        return False
+
+
+# --------------------------------Parquet Stage--------------------------------
+# Every extracted DataFrame is also written to PARQUET_DIR/<dataset>/Year=<y>/Quarter=<q>/ (zstd),
+# so the database, rollups or a notebook can be rebuilt without re-parsing the pulse JSON tree.
+PARQUET_DIR = os.getenv("PARQUET_DIR", "parquet")
+
+# dataset: columns in the order the save functions expect them
+PARQUET_DATASETS = {
+    "agg_insurance": ["State", "Year", "Quarter", "Insurance_type", "Insurance_count", "Insurance_amount"],
+    "agg_transaction": ["State", "Year", "Quarter", "Transaction_type", "Transaction_count", "Transaction_amount"],
+    "agg_user": ["State", "Year", "Quarter", "Registered_Users", "App_Opens"],
+    "agg_user_device": ["State", "Year", "Quarter", "Brand", "User_Count", "Percentage"],
+    "top_insurance_district": ["State", "Year", "Quarter", "District", "District_Count", "District_Amount"],
+    "top_insurance_pincode": ["State", "Year", "Quarter", "Pincode", "Pincode_Count", "Pincode_Amount"],
+    "top_transaction_district": ["State", "Year", "Quarter", "District", "District_Count", "District_Amount"],
+    "top_transaction_pincode": ["State", "Year", "Quarter", "Pincode", "Pincode_Count", "Pincode_Amount"],
+    "top_user_district": ["State", "Year", "Quarter", "District", "Registered_Users"],
+    "top_user_pincode": ["State", "Year", "Quarter", "Pincode", "Registered_Users"],
+    "map_insurance": ["State", "Year", "Quarter", "Latitude", "Longitude", "Metric"],
+    "map_insurance_bins": ["State", "Year", "Quarter", "Zoom", "Cell_row", "Cell_col", "Points", "Metric"],
+    "map_insurance_hover": ["State", "Year", "Quarter", "District", "Count", "Amount"],
+    "map_transaction_hover": ["State", "Year", "Quarter", "District", "Count", "Amount"],
+    "map_user_hover": ["State", "Year", "Quarter", "District", "Registered_Users", "App_Opens"],
+    "agg_insurance_country": ["Year", "Quarter", "Insurance_type", "Insurance_count", "Insurance_amount"],
+    "agg_transaction_country": ["Year", "Quarter", "Transaction_type", "Transaction_count", "Transaction_amount"],
+    "agg_user_country": ["Year", "Quarter", "Registered_Users", "App_Opens"],
+    "agg_user_device_country": ["Year", "Quarter", "Brand", "User_Count", "Percentage"],
+    "top_insurance_country": ["Year", "Quarter", "Level", "Entity_name", "Count", "Amount"],
+    "top_transaction_country": ["Year", "Quarter", "Level", "Entity_name", "Count", "Amount"],
+    "top_user_country": ["Year", "Quarter", "Level", "Entity_name", "Registered_Users"],
+}
+
+PARQUET_MONEY_COLUMNS = {"Insurance_amount", "Transaction_amount", "District_Amount", "Pincode_Amount", "Amount"}
+
+# extractor: the datasets it returns, in order
+EXTRACTOR_DATASETS = {
+    agg_insurance_data: ["agg_insurance"],
+    agg_transaction_data: ["agg_transaction"],
+    agg_user_data: ["agg_user", "agg_user_device"],
+    top_insurance_data: ["top_insurance_district", "top_insurance_pincode"],
+    top_transaction_data: ["top_transaction_district", "top_transaction_pincode"],
+    top_user_data: ["top_user_district", "top_user_pincode"],
+    map_insurance_data: ["map_insurance", "map_insurance_bins"],
+    map_insurance_hover_data: ["map_insurance_hover"],
+    map_transaction_hover_data: ["map_transaction_hover"],
+    map_user_hover_data: ["map_user_hover"],
+    agg_insurance_country_data: ["agg_insurance_country"],
+    agg_transaction_country_data: ["agg_transaction_country"],
+    agg_user_country_data: ["agg_user_country", "agg_user_device_country"],
+    top_insurance_country_data: ["top_insurance_country"],
+    top_transaction_country_data: ["top_transaction_country"],
+    top_user_country_data: ["top_user_country"],
+}
+
+# extractor: (create tables, save, show) for its output
+EXTRACTOR_LOADERS = {
+    agg_insurance_data: (insurance_table, save_to_postgres, show_data_from_postgres),
+    agg_transaction_data: (transaction_table, agg_transaction_db_save, agg_transaction_db_show),
+    agg_user_data: (create_user_tables, save_user_data_to_postgres, show_user_data_from_postgres),
+    top_insurance_data: (create_top_insurance_tables, save_top_insurance_to_postgres, show_top_insurance_from_postgres),
+    top_transaction_data: (create_top_transaction_tables, save_top_transaction_to_postgres,
+                           show_top_transaction_from_postgres),
+    top_user_data: (create_top_user_tables, save_top_user_to_postgres, show_top_user_from_postgres),
+    map_insurance_data: (create_map_insurance_tables, save_map_insurance_to_postgres, show_map_insurance_from_postgres),
+    map_insurance_hover_data: (create_map_insurance_hover_table, save_map_insurance_hover_to_postgres,
+                               show_map_insurance_hover_from_postgres),
+    map_transaction_hover_data: (create_map_transaction_hover_table, save_map_transaction_hover_to_postgres,
+                                 show_map_transaction_hover_from_postgres),
+    map_user_hover_data: (create_map_user_hover_table, save_map_user_hover_to_postgres,
+                          show_map_user_hover_from_postgres),
+}
+EXTRACTOR_LOADERS.update({
+    extractor: country_loaders(*tables) for extractor, tables in EXTRACTOR_DATASETS.items() if tables[0] in COUNTRY_TABLES
+})
+
+
+def write_parquet(df, dataset, parquet_dir, periods=None):
+    """Replace a dataset in the Parquet stage, or only the partitions of the given periods,
+    keeping the extractor's compact dtypes"""
+    path = os.path.join(parquet_dir, dataset)
+    if periods is None:
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        for year, quarter in periods:
+            shutil.rmtree(os.path.join(path, f"Year={year}", f"Quarter={quarter}"), ignore_errors=True)
+    df[PARQUET_DATASETS[dataset]].to_parquet(path, partition_cols=["Year", "Quarter"], compression="zstd", index=False)
+    print(f"Parquet dataset {dataset} written with {len(df)} rows")
+
+
+def read_parquet(dataset, parquet_dir, periods=None):
+    """A dataset from the Parquet stage (only the given periods' partitions), in the shape and
+    money unit its extractor returns"""
+    filters = None
+    if periods is not None:
+        filters = [[("Year", "=", year), ("Quarter", "=", quarter)] for year, quarter in sorted(periods)]
+    df = pd.read_parquet(os.path.join(parquet_dir, dataset), filters=filters)
+    # The Year/Quarter partition keys come back as categoricals
+    df["Year"] = df["Year"].astype(df["Year"].cat.categories.dtype)
+    df["Quarter"] = df["Quarter"].astype(df["Quarter"].cat.categories.dtype)
+    for column in PARQUET_MONEY_COLUMNS.intersection(df.columns):
+        # The stage keeps whatever unit it was written in, convert to the current MONEY_AS_PAISE
+        if MONEY_AS_PAISE and not pd.api.types.is_integer_dtype(df[column].dtype):
+            store_money(df, column)
+        elif not MONEY_AS_PAISE and pd.api.types.is_integer_dtype(df[column].dtype):
+            df[column] = df[column] / 100
+    return compact_frame(df[PARQUET_DATASETS[dataset]], dataset)
+
+
+def staged(extractor, args, periods=None):
+    """Run an extractor on the JSON tree and stage its output as Parquet, or with --source parquet
+    read its datasets back from the stage instead. periods limits both to those (year, quarter)s."""
+    datasets = EXTRACTOR_DATASETS[extractor]
+    if PROFILE is not None:
+        profile = PROFILE.extractor(extractor.__name__)
+
+    if args.source == "parquet":
+        with profile_phase("read_stage"):
+            frames = [read_parquet(dataset, args.parquet_dir, periods) for dataset in datasets]
+        if PROFILE is not None:
+            profile["rows"] += sum(len(df) for df in frames)
+        return frames[0] if len(frames) == 1 else tuple(frames)
+
+    with profile_phase("extract"):
+        result = extractor(periods)
+    frames = result if isinstance(result, tuple) else (result,)
+    if PROFILE is not None:
+        profile["rows"] += sum(len(df) for df in frames if df is not None)
+    if not args.no_parquet and all(df is not None for df in frames):
+        with profile_phase("stage"):
+            for dataset, df in zip(datasets, frames):
+                write_parquet(df, dataset, args.parquet_dir, periods)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract the PhonePe Pulse data into the database")
+    parser.add_argument("--data-root", default=DATA_ROOT, help=f"PhonePe Pulse JSON tree (default {DATA_ROOT})")
+    parser.add_argument("--source", choices=["json", "parquet"], default="json",
+                        help="read the pulse JSON tree (default), or the Parquet stage of an earlier run")
+    parser.add_argument("--parquet-dir", default=PARQUET_DIR, help=f"Parquet stage directory (default {PARQUET_DIR})")
+    parser.add_argument("--parquet-only", action="store_true",
+                        help="only extract the JSON tree into the Parquet stage, without a database")
+    parser.add_argument("--no-parquet", action="store_true", help="don't write the Parquet stage")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS, help="datasets to refresh (default all)")
+    parser.add_argument("--families", nargs="+", choices=FAMILIES, default=FAMILIES,
+                        help="aggregated, top and/or map hover tables of those datasets (default all)")
+    parser.add_argument("--years", type=period_range, help="only these years, e.g. 2024 or 2022-2024")
+    parser.add_argument("--quarters", type=period_range, help="only these quarters, e.g. 4 or 1-2")
+    parser.add_argument("--force", action="store_true",
+                        help="reload the selected periods even when the tables already hold them")
+    parser.add_argument("--workers", type=int, default=1, help="extract the datasets in this many processes")
+    parser.add_argument("--dry-run", action="store_true", help="only show what would be loaded")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every extractor phase and track memory peaks (slower), see --profile-json/--profile-prom")
+    parser.add_argument("--profile-json", default="extractor_profile.json", help="profile report (default %(default)s)")
+    parser.add_argument("--profile-prom", default="extractor_profile.prom",
+                        help="profile as a Prometheus textfile for the node exporter (default %(default)s)")
+    return parser.parse_args(argv)
+
+
+def export_parquet(args):
+    start = time.perf_counter()
+    plan = plan_refresh(None, args)
+    if args.dry_run:
+        return
+    for _ in run_extractions(plan, args):
+        pass
+    print(f"Parquet stage written to {args.parquet_dir} in {time.perf_counter() - start:.1f}s")
+
+
+# --------------------------------Selective Refresh--------------------------------
+# A run loads the periods (year, quarter) each selected table has no checkpoint for yet, so a new quarter
+# in the pulse tree, or the rest of an interrupted run, means parsing and loading those files only.
+# --force reloads the selected periods.
+
+# extractor: its dataset in the pulse tree, under DATA_ROOT
+EXTRACTOR_PATHS = {
+    agg_insurance_data: "aggregated/insurance/country/india/state",
+    agg_transaction_data: "aggregated/transaction/country/india/state",
+    agg_user_data: "aggregated/user/country/india/state",
+    top_insurance_data: "top/insurance/country/india/state",
+    top_transaction_data: "top/transaction/country/india/state",
+    top_user_data: "top/user/country/india/state",
+    map_insurance_data: "map/insurance/country/india/state",
+    map_insurance_hover_data: "map/insurance/hover/country/india/state",
+    map_transaction_hover_data: "map/transaction/hover/country/india/state",
+    map_user_hover_data: "map/user/hover/country/india/state",
+    agg_insurance_country_data: "aggregated/insurance/country/india",
+    agg_transaction_country_data: "aggregated/transaction/country/india",
+    agg_user_country_data: "aggregated/user/country/india",
+    top_insurance_country_data: "top/insurance/country/india",
+    top_transaction_country_data: "top/transaction/country/india",
+    top_user_country_data: "top/user/country/india",
+}
+
+FAMILIES = ["agg", "top", "map"]
+KINDS = ["insurance", "transaction", "user"]
+
+
+def extractor_kind(extractor):
+    """(family, kind) of an extractor from its name, e.g. ("map", "user") for map_user_hover_data"""
+    family, kind = extractor.__name__.split("_")[:2]
+    return family, kind
+
+
+def period_range(text):
+    """argparse type for a year or quarter, or an inclusive range of them: "2023", "2021-2023" """
+    first, _, last = text.partition("-")
+    return range(int(first), int(last or first) + 1)
+
+
+def selected_period(args, year, quarter):
+    return (args.years is None or year in args.years) and (args.quarters is None or quarter in args.quarters)
+
+
+def available_periods(extractor, args):
+    """Selected (year, quarter) periods of an extractor's dataset, with the number of files each has,
+    in the JSON tree or with --source parquet in the Parquet stage"""
+    periods = {}
+    if args.source == "parquet":
+        path = os.path.join(args.parquet_dir, EXTRACTOR_DATASETS[extractor][0])
+        for year_dir in os.listdir(path) if os.path.exists(path) else []:
+            for quarter_dir in os.listdir(os.path.join(path, year_dir)):
+                period = (int(year_dir.split("=")[1]), int(quarter_dir.split("=")[1]))
+                periods[period] = len(os.listdir(os.path.join(path, year_dir, quarter_dir)))
+    else:
+        path = os.path.join(DATA_ROOT, EXTRACTOR_PATHS[extractor])
+        if not os.path.exists(path):
+            year_dirs = []
+        elif path.endswith("state"):
+            year_dirs = [os.path.join(path, state, year)
+                         for state in os.listdir(path) for year in os.listdir(os.path.join(path, state))]
         else:
-            print(f"Map user hover data already exists with {map_user_count} rows, skipping...")
-            
+            # country/india: the year folders, not the state/ subtree next to them
+            year_dirs = [os.path.join(path, year) for year in os.listdir(path) if year.isdigit()]
+        for year_dir in year_dirs:
+            for file_name in os.listdir(year_dir):
+                period = (int(os.path.basename(year_dir)), int(os.path.splitext(file_name)[0]))
+                periods[period] = periods.get(period, 0) + 1
+    return {period: files for period, files in periods.items() if selected_period(args, *period)}
+
+
+def describe_periods(periods):
+    if periods is None:
+        return "all periods"
+    labels = [f"{year} Q{quarter}" for year, quarter in sorted(periods)]
+    return ", ".join(labels) if len(labels) <= 4 else f"{labels[0]} to {labels[-1]} ({len(labels)} periods)"
+
+
+def plan_refresh(conn, args):
+    """[(extractor, periods, files)] this run has to extract and load. periods is None for a whole dataset
+    (no --years/--quarters, and nothing loaded yet or --force), so its tables are replaced outright.
+    conn None plans a --parquet-only run, which doesn't look at the database."""
+    plan = []
+    for extractor in EXTRACTOR_DATASETS:
+        family, kind = extractor_kind(extractor)
+        if family not in args.families or kind not in args.kinds:
+            continue
+        available = available_periods(extractor, args)
+        loaded = set() if args.force or conn is None else checkpointed_periods(conn, EXTRACTOR_DATASETS[extractor])
+        periods = set(available) - loaded
+        tables = ", ".join(EXTRACTOR_DATASETS[extractor])
+        if not periods:
+            print(f"{tables}: up to date, skipping...")
+            continue
+        files = sum(available[period] for period in periods)
+        if args.years is None and args.quarters is None and not loaded:
+            periods = None
+        print(f"{tables}: {describe_periods(periods)}, {files} files to {'read' if conn is None else 'load'}")
+        plan.append((extractor, periods, files))
+    return plan
+
+
+def extract_in_worker(extractor, args, periods):
+    """staged() in a --workers process, which has to take --data-root from args itself"""
+    global DATA_ROOT
+    DATA_ROOT = args.data_root
+    return staged(extractor, args, periods)
+
+
+# Extractors whose output for every period doesn't fit in memory at once (the map insurance points):
+# they are extracted, staged and loaded one (year, quarter) at a time, in this process even with --workers
+STREAMED_EXTRACTORS = {map_insurance_data}
+
+
+def streamed_periods(extractor, periods, args):
+    """(periods, reset) chunks of one period each for a streamed extractor. A whole dataset (periods None)
+    resets its tables with the first chunk and drops its Parquet stage up front, since each chunk
+    only replaces its own partitions."""
+    reset = periods is None
+    if reset:
+        periods = available_periods(extractor, args)
+        if args.source == "json" and not args.no_parquet:
+            for dataset in EXTRACTOR_DATASETS[extractor]:
+                shutil.rmtree(os.path.join(args.parquet_dir, dataset), ignore_errors=True)
+    for i, period in enumerate(sorted(periods)):
+        yield {period}, reset and i == 0
+
+
+def run_extractions(plan, args):
+    """Yield (extractor, periods, result, reset) in plan order, streamed extractors last; reset is whether
+    the result replaces the whole dataset. With --workers the extractors run in that many processes
+    (JSON parsing is CPU bound), and each result is loaded while the later ones are still parsed."""
+    pooled = [(extractor, periods) for extractor, periods, _ in plan if extractor not in STREAMED_EXTRACTORS]
+    streamed = [(extractor, periods) for extractor, periods, _ in plan if extractor in STREAMED_EXTRACTORS]
+    if args.workers > 1 and PROFILE is None:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [(extractor, periods, executor.submit(extract_in_worker, extractor, args, periods))
+                       for extractor, periods in pooled]
+            for extractor, periods, future in futures:
+                yield extractor, periods, future.result(), periods is None
+    else:
+        if args.workers > 1:
+            print("--profile extracts in this process, ignoring --workers")
+        for extractor, periods in pooled:
+            yield extractor, periods, staged(extractor, args, periods), periods is None
+    for extractor, periods in streamed:
+        for chunk, reset in streamed_periods(extractor, periods, args):
+            yield extractor, chunk, staged(extractor, args, chunk), reset
+
+
+def partitions(frames, periods):
+    """(period, frames) of every period in the extractor's output, the unit a save commits.
+    Periods an extractor found no rows for are still checkpointed, with empty frames."""
+    if periods is None:
+        periods = set()
+        for df in frames:
+            periods.update((int(year), int(quarter)) for year, quarter in df[["Year", "Quarter"]].drop_duplicates().values)
+    groups = [df.groupby([df["Year"].astype(int), df["Quarter"].astype(int)], observed=True).indices for df in frames]
+    for period in sorted(periods):
+        yield period, [df.iloc[group.get(period, [])] for df, group in zip(frames, groups)]
+
+
+def reset_tables(conn, tables):
+    """Empty the tables and drop their checkpoints in one transaction, before a full reload"""
+    try:
+        conn.rollback()
+        cursor = conn.cursor()
+        for table in tables:
+            clear_table(cursor, table)
+        create_checkpoint_table(cursor)
+        cursor.execute(f"DELETE FROM {CHECKPOINT_TABLE} WHERE table_name IN ({', '.join(['%s'] * len(tables))})",
+                       tables)
+        conn.commit()
+        return True
     except Exception as e:
-        print("Map user hover table doesn't exist, creating and processing..." + str(e))
+        print(f"Reset error: {e}")
         conn.rollback()
-        
-        try:
-            # Extract map user hover data
-            map_user_hover_df = map_user_hover_data()
-            if map_user_hover_df is None:
-                print("Failed to extract map user hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Create map user hover table
-            if not create_map_user_hover_table(conn):
-                print("Failed to create map user hover table!")
-                conn.rollback()
-                conn.close()
-                return
-
-            # Save map user hover data
-            map_user_success = save_map_user_hover_to_postgres(map_user_hover_df, conn)
-            if not map_user_success:
-                print("Failed to save map user hover data!")
-                conn.rollback()
-                conn.close()
-                return
-
-            show_map_user_hover_from_postgres(conn)
-            
-        except Exception as inner_e:
-            print(f"Error during map user hover data processing: {inner_e}")
-            conn.rollback()
+        return False
+
+
+def load_extracted(conn, extractor, periods, result, reset):
+    """Create the extractor's tables and save its output one (year, quarter) partition per transaction,
+    each with its checkpoint, so an interrupted load keeps every partition it finished.
+    reset empties the tables first (see run_extractions)."""
+    create, save, show = EXTRACTOR_LOADERS[extractor]
+    tables = EXTRACTOR_DATASETS[extractor]
+    frames = result if isinstance(result, tuple) else (result,)
+    if any(df is None for df in frames):
+        print(f"Failed to extract {', '.join(tables)} data!")
+        return False
+    if not create(conn):
+        print(f"Failed to create {', '.join(tables)} tables!")
+        return False
+    # A whole dataset (first load, or --force without --years/--quarters) also drops periods that are
+    # no longer in the pulse tree
+    if reset and not reset_tables(conn, tables):
+        print(f"Failed to reset {', '.join(tables)} tables!")
+        return False
+    for period, partition in partitions(frames, periods):
+        if not save(*partition, conn, periods={period}):
+            print(f"Failed to save {', '.join(tables)} data for {describe_periods({period})}!")
+            return False
+    show(conn)
+    return True
+
+# --------------------------------Main Function--------------------------------
+def main(args):
+    global DATA_ROOT
+    DATA_ROOT = args.data_root
+
+    if args.parquet_only:
+        export_parquet(args)
+        return
+
+    # PostgreSQL, or the DuckDB file
+    conn = connect_to_database()
+    if conn is None:
+        print("Failed to connect to the database!")
+        return
+
+    plan = plan_refresh(conn, args)
+    if args.dry_run:
+        print(f"\n{sum(files for _, _, files in plan)} files to load")
+        conn.close()
+        return
+    # An earlier run that loaded everything but stopped before the stamp still gets its samples and stamp
+    if not plan and stamp_is_current(conn):
+        print("\nNothing to load")
+        conn.close()
+        return
+
+    for extractor, periods, result, reset in run_extractions(plan, args):
+        if not load_extracted(conn, extractor, periods, result, reset):
             conn.close()
             return
 
+    # -------------- Scatter Sample Tables ---------------------------------
+    # Rebuilt after every load so the samples follow the current agg_* data
+    if not create_scatter_sample_tables(conn):
+        print("Failed to create scatter sample tables!")
+
+    # -------------- Growth Rollups ---------------------------------
+    if not create_growth_tables(conn):
+        print("Failed to create growth tables!")
+
+    # -------------- Data Version Stamp ---------------------------------
+    # Last, so snapshot readers only reload once every table is written
+    if not stamp_data_version(conn):
+        print("Failed to stamp data version!")
+
     conn.close()
     print("\n=== Done! ===")
 
 
+def profiled_main(args):
+    """main() under the stage profiler, writing its reports however the run ends"""
+    global PROFILE
+    PROFILE = StageProfiler()
+    try:
+        main(args)
+    finally:
+        PROFILE.write(args.profile_json, args.profile_prom)
+        PROFILE = None
+        tracemalloc.stop()
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.profile:
+        profiled_main(args)
+    else:
+        main(args)
@@ -0,0 +1,92 @@
+import collections
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Append every span to this file as a JSON line for offline analysis (unset: the in-app panel only)
+PERF_LOG = os.getenv("PERF_LOG")
+
+# Spans kept per run for the in-app panel, the oldest are dropped past this (PERF_LOG still gets them all)
+MAX_RUN_SPANS = 500
+
+_log_lock = threading.Lock()
+_local = threading.local()
+
+
+# --------------------------------Spans--------------------------------
+def new_run(page):
+    """The spans of one script run of a session"""
+    return {"run_id": uuid.uuid4().hex[:12], "page": page, "started": time.perf_counter(), "spans": collections.deque(maxlen=MAX_RUN_SPANS)}
+
+
+def _open_spans():
+    if not hasattr(_local, "spans"):
+        _local.spans = []
+    return _local.spans
+
+
+@contextmanager
+def span(run, kind, name, **fields):
+    """Time a block as one span of the run. The yielded record takes extra fields (rows, cache, ...),
+    as does annotate() from code called inside the block on the same thread."""
+    record = dict(kind=kind, name=name, **fields)
+    open_spans = _open_spans()
+    open_spans.append(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["ms"] = (time.perf_counter() - start) * 1000
+        open_spans.pop()
+        # deque.append is atomic, spans can be added from the query worker threads
+        run["spans"].append(record)
+        write_log(run, record)
+
+
+def annotate(**fields):
+    """Add fields to the innermost open span of this thread, if there is one"""
+    open_spans = _open_spans()
+    if open_spans:
+        open_spans[-1].update(fields)
+
+
+def frame_stats(record, df):
+    record["rows"] = len(df)
+    record["bytes"] = int(df.memory_usage(deep=True).sum())
+
+
+def timed_fetch(run, fetch, **fields):
+    """fetch(name, params) recording a query span with the rows and bytes of its DataFrame (and fields)"""
+    def fetch_in_span(name, params=None):
+        with span(run, "query", name, **fields) as record:
+            df = fetch(name, params)
+            frame_stats(record, df)
+        return df
+    return fetch_in_span
+
+
+def finish_run(run):
+    """Record the whole script run as a span of its own"""
+    record = {"kind": "rerun", "name": run["page"], "ms": (time.perf_counter() - run["started"]) * 1000}
+    run["spans"].append(record)
+    write_log(run, record)
+    return record
+
+
+def write_log(run, record):
+    if not PERF_LOG:
+        return
+    line = json.dumps(dict(ts=time.time(), run_id=run["run_id"], page=run["page"], **record), default=str)
+    with _log_lock:
+        with open(PERF_LOG, "a") as f:
+            f.write(line + "\n")
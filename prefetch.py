@@ -0,0 +1,101 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from queries import QUERY_MODE
+from snapshot import SNAPSHOT_CHECK_SECONDS, current_version, get_tables
+
+load_dotenv()
+
+# Tasks waiting for the worker. Bounded so stepping quickly through the timeline drops new work
+# instead of piling up queries behind periods the user has already moved past. 0 turns prefetching off.
+PREFETCH_QUEUE_SIZE = int(os.getenv("PREFETCH_QUEUE_SIZE", "8"))
+
+# Results kept in the shared cache, least recently used dropped first
+PREFETCH_CACHE_SIZE = int(os.getenv("PREFETCH_CACHE_SIZE", "64"))
+
+_queue = queue.Queue(maxsize=max(PREFETCH_QUEUE_SIZE, 1))
+_pending = set()
+_lock = threading.Lock()
+_worker = None
+
+_results = OrderedDict()
+_results_lock = threading.Lock()
+_version = None
+_checked_at = None
+_version_lock = threading.Lock()
+
+
+# --------------------------------Background Prefetch--------------------------------
+def submit(key, task):
+    """Queue task() for the worker thread unless the same key is already waiting.
+    Returns False when the queue is full; tasks store their own results (e.g. with cached())."""
+    global _worker
+    if PREFETCH_QUEUE_SIZE <= 0:
+        return False
+    with _lock:
+        if key in _pending:
+            return True
+        try:
+            _queue.put_nowait((key, task))
+        except queue.Full:
+            return False
+        _pending.add(key)
+        if _worker is None:
+            _worker = threading.Thread(target=_run, name="prefetch", daemon=True)
+            _worker.start()
+    return True
+
+
+def _run():
+    while True:
+        key, task = _queue.get()
+        try:
+            task()
+        except Exception:
+            # A failed prefetch is only a cache miss later, the foreground run reports the error to the user
+            logging.exception("Prefetch %s failed", key)
+        finally:
+            with _lock:
+                _pending.discard(key)
+            _queue.task_done()
+
+
+# --------------------------------Shared Cache--------------------------------
+# Filled by the worker and by script runs alike and shared by every session. st.cache_data can't be
+# used from the worker: it needs a script run context, and lending it a session's lets a running
+# prefetch block that session's widgets (Streamlit flags the context while a cached function runs).
+def data_version():
+    """The data_version stamp, looked up at most every SNAPSHOT_CHECK_SECONDS (the snapshot's own in
+    snapshot mode)"""
+    global _version, _checked_at
+    if QUERY_MODE == "snapshot":
+        return get_tables()[1]
+    with _version_lock:
+        now = time.monotonic()
+        if _checked_at is None or now - _checked_at >= SNAPSHOT_CHECK_SECONDS:
+            _version = current_version()
+            _checked_at = now
+        return _version
+
+
+def cached(key, compute):
+    """compute() cached under key and the current data version. Two threads missing the same key
+    at once both compute it; callers must not modify the result."""
+    key = (data_version(), *key)
+    with _results_lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+    value = compute()
+    with _results_lock:
+        _results[key] = value
+        _results.move_to_end(key)
+        while len(_results) > PREFETCH_CACHE_SIZE:
+            _results.popitem(last=False)
+    return value
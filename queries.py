@@ -0,0 +1,700 @@
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from dotenv import load_dotenv
+from psycopg2.pool import ThreadedConnectionPool
+
+from backends import DB_BACKEND, duckdb_sql, open_duckdb, postgres_params
+from perf import annotate
+
+load_dotenv()
+
+# Max number of pooled connections, also the number of query worker threads
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+
+# Target number of points for the scatter charts
+SCATTER_POINT_BUDGET = int(os.getenv("SCATTER_POINT_BUDGET", "1000"))
+
+# Grid cell sizes in degrees of the map_insurance_bins zoom levels, coarsest first. data_extractor.py
+# bins the insurance points at each, reload map_insurance with --force after changing them
+MAP_BIN_SIZES = [1.0, 0.25, 0.0625]
+
+# Read scatter points from the sample tables built by data_extractor.py instead of sampling per query
+USE_SAMPLE_TABLES = os.getenv("USE_SAMPLE_TABLES", "0") == "1"
+
+# Amount columns hold integer paise instead of NUMERIC rupees (set for data_extractor.py too)
+MONEY_AS_PAISE = os.getenv("MONEY_AS_PAISE", "0") == "1"
+MONEY_SCALE = 100 if MONEY_AS_PAISE else 1
+
+# "sql" runs every dashboard query on the database, "snapshot" answers them from in-memory copies
+# of the tables (snapshot.py), reloaded when data_extractor.py stamps a new data_version
+QUERY_MODE = os.getenv("QUERY_MODE", "sql")
+
+DATA_VERSION_SQL = "SELECT CAST(loaded_at AS TEXT) FROM data_version"
+
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises once POOL_SIZE connections are out, callers past that wait here instead
+# (the chart pool, the script thread building a cube and the prefetch thread share the connections)
+_pool_slots = threading.BoundedSemaphore(POOL_SIZE)
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="chart-query")
+
+
+# --------------------------------Connection Pool--------------------------------
+def get_pool():
+    """Create the process-wide connection pool on first use (a read-only connection for DuckDB)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if DB_BACKEND == "duckdb":
+                _pool = open_duckdb(read_only=True)
+            else:
+                _pool = ThreadedConnectionPool(1, POOL_SIZE, **postgres_params())
+        return _pool
+
+
+def run_query(sql, columns, params=None, dtypes=None, copy=True):
+    """Run a read-only query into a DataFrame.
+
+    By default results are streamed with COPY ... TO STDOUT (CSV) and parsed by pandas' C reader,
+    so NUMERIC/BIGINT columns land directly in float64/int64 columns instead of going through
+    per-row tuples of Decimal objects. copy=False keeps the cursor path for results CSV can't
+    carry (e.g. arrays)."""
+    if DB_BACKEND == "duckdb":
+        return run_duckdb_query(sql, columns, params, dtypes)
+
+    start = time.perf_counter()
+    db_pool = get_pool()
+    with _pool_slots:
+        conn = db_pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                if copy:
+                    buffer = io.StringIO()
+                    bound_sql = cursor.mogrify(sql, params).decode()
+                    cursor.copy_expert(f"COPY ({bound_sql}) TO STDOUT WITH (FORMAT csv)", buffer)
+                else:
+                    cursor.execute(sql, params)
+                    rows = cursor.fetchall()
+            # Read-only queries, end the transaction before handing the connection back
+            conn.rollback()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            db_pool.putconn(conn, close=bool(conn.closed))
+    fetched = time.perf_counter()
+
+    if not copy:
+        df = pd.DataFrame(rows, columns=columns)
+    else:
+        buffer.seek(0)
+        df = pd.read_csv(buffer, names=columns, dtype=dtypes, true_values=['t'], false_values=['f'])
+    # Database round trip vs building the DataFrame, for the query's timing span (perf.py)
+    annotate(db_ms=(fetched - start) * 1000, convert_ms=(time.perf_counter() - fetched) * 1000)
+    return df
+
+
+def run_duckdb_query(sql, columns, params=None, dtypes=None):
+    """run_query on DuckDB, with the column dtypes the PostgreSQL path ends up with"""
+    # DuckDB cursors are independent connections to the same database, one per worker thread
+    start = time.perf_counter()
+    cursor = get_pool().cursor()
+    try:
+        result = cursor.execute(duckdb_sql(sql), params)
+        types = [str(column[1]) for column in result.description]
+        if "HUGEINT" in types:
+            # SUM(BIGINT) is a 128-bit integer, which .df() would turn into float64
+            df = pd.DataFrame(result.fetchall(), columns=columns)
+        else:
+            df = result.df()
+            df.columns = columns
+    finally:
+        cursor.close()
+    fetched = time.perf_counter()
+
+    for column, type_name in zip(columns, types):
+        if dtypes and column in dtypes:
+            df[column] = df[column].astype(dtypes[column])
+        elif type_name in ("HUGEINT", "BIGINT", "INTEGER", "SMALLINT", "TINYINT"):
+            df[column] = df[column].astype("int64") if df[column].notna().all() else df[column].astype("float64")
+        elif type_name.startswith("DECIMAL"):
+            df[column] = df[column].astype("float64")
+        elif type_name.endswith("[]"):
+            df[column] = df[column].apply(lambda values: [float(v) for v in values])
+        elif type_name == "VARCHAR":
+            # Numeric text (e.g. agg_transaction.Year) is parsed like the CSV reader does
+            numbers = pd.to_numeric(df[column], errors="coerce")
+            if numbers.notna().equals(df[column].notna()):
+                df[column] = numbers
+    annotate(db_ms=(fetched - start) * 1000, convert_ms=(time.perf_counter() - fetched) * 1000)
+    return df
+
+
+def fetch_query(name, params=None):
+    query = QUERIES[name]
+    params = params if params is not None else query.get("params")
+    if QUERY_MODE == "snapshot":
+        # Imported here, snapshot.py builds on this module
+        from snapshot import answer_query
+        return answer_query(name, params)
+    return run_query(
+        query["sql"],
+        query["columns"],
+        params,
+        dtypes=query.get("dtypes"),
+        copy=query.get("copy", True),
+    )
+
+
+def fetch_concurrently(names, fetch=None):
+    """Submit the named queries to the pool and return an iterator of (name, df, error) as each finishes.
+    The queries start right away, so the caller can do other work before consuming it.
+    fetch replaces fetch_query, e.g. to time each query (perf.timed_fetch)."""
+    futures = {_executor.submit(fetch or fetch_query, name): name for name in names}
+    return completed(futures)
+
+
+def completed(futures):
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            yield name, future.result(), None
+        except Exception as e:
+            yield name, None, e
+
+
+# --------------------------------Box Plot Summaries--------------------------------
+# Max number of outlier points shipped per box, the most extreme ones are kept
+BOX_OUTLIER_CAP = 50
+
+BOX_STATS_COLUMNS = ['Series', 'Q1', 'Median', 'Q3', 'Lower_Fence', 'Upper_Fence', 'Mean', 'Count', 'Outliers']
+BOX_MONEY_COLUMNS = ['Q1', 'Median', 'Q3', 'Lower_Fence', 'Upper_Fence', 'Mean', 'Outliers']
+
+
+def box_stats_sql(values_sql, outlier_cap=BOX_OUTLIER_CAP):
+    """Tukey box statistics per series, values_sql must return (series, v) rows"""
+    return f"""
+        WITH vals AS ({values_sql}),
+        stats AS (
+            SELECT series,
+                   percentile_cont(0.25) WITHIN GROUP (ORDER BY v) as q1,
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY v) as median,
+                   percentile_cont(0.75) WITHIN GROUP (ORDER BY v) as q3,
+                   AVG(v) as mean,
+                   COUNT(*) as n
+            FROM vals
+            GROUP BY series
+        ),
+        fences AS (
+            SELECT *, q1 - 1.5 * (q3 - q1) as lo, q3 + 1.5 * (q3 - q1) as hi
+            FROM stats
+        )
+        SELECT f.series, f.q1, f.median, f.q3,
+               (SELECT MIN(v) FROM vals WHERE vals.series = f.series AND v >= f.lo) as lowerfence,
+               (SELECT MAX(v) FROM vals WHERE vals.series = f.series AND v <= f.hi) as upperfence,
+               f.mean, f.n,
+               ARRAY(SELECT v FROM vals
+                     WHERE vals.series = f.series AND (v < f.lo OR v > f.hi)
+                     ORDER BY ABS(v - f.median) DESC
+                     LIMIT {int(outlier_cap)}) as outliers
+        FROM fences f
+        ORDER BY f.series
+    """
+
+
+# --------------------------------Histogram Binning--------------------------------
+HISTOGRAM_COLUMNS = ['Bin', 'Bin_Start', 'Bin_End', 'Count', 'Log_Scale']
+
+
+def histogram_sql(values_sql, nbins, log_scale=False):
+    """Equal-width bins (in log space when log_scale), values_sql must return v.
+
+    Buckets are PostgreSQL's width_bucket() written out, so DuckDB (which lacks it) bins the same."""
+    nbins = int(nbins)
+    x = "ln(v)" if log_scale else "v"
+    edge = "exp" if log_scale else ""
+    positive = "AND v > 0" if log_scale else ""
+    return f"""
+        WITH vals AS ({values_sql}),
+        pts AS (
+            SELECT {x}::double precision as x
+            FROM vals
+            WHERE v IS NOT NULL {positive}
+        ),
+        bounds AS (
+            SELECT MIN(x) as lo, MAX(x) as hi
+            FROM pts
+        ),
+        counts AS (
+            SELECT CASE WHEN b.hi > b.lo
+                        THEN LEAST(CAST(FLOOR({nbins} * ((p.x - b.lo) / (b.hi - b.lo))) AS INT) + 1, {nbins})
+                        ELSE 1 END as bucket,
+                   COUNT(*) as n
+            FROM pts p CROSS JOIN bounds b
+            GROUP BY 1
+        )
+        SELECT g.bucket,
+               {edge}(b.lo + (g.bucket - 1) * (b.hi - b.lo) / {nbins}) as bin_start,
+               {edge}(b.lo + g.bucket * (b.hi - b.lo) / {nbins}) as bin_end,
+               COALESCE(c.n, 0) as n,
+               {str(bool(log_scale)).upper()} as log_scale
+        FROM bounds b
+        CROSS JOIN generate_series(1, {nbins}) as g(bucket)
+        LEFT JOIN counts c ON c.bucket = g.bucket
+        WHERE b.lo IS NOT NULL
+        ORDER BY g.bucket
+    """
+
+
+# --------------------------------Stratified Sampling--------------------------------
+def stratified_sample_sql(table, columns, strata, budget=SCATTER_POINT_BUDGET, where="TRUE"):
+    """Deterministic sample of about `budget` rows, allocated to each stratum in proportion to its
+    size with at least one row per stratum. Rows are ranked by a hash of their natural key
+    (strata + Year + Quarter), so the same data always gives the same sample."""
+    strata_list = ", ".join(strata)
+    column_list = ", ".join(columns)
+    return f"""
+        WITH ranked AS (
+            SELECT {column_list},
+                   ROW_NUMBER() OVER (
+                       PARTITION BY {strata_list}
+                       ORDER BY md5(concat_ws('|', {strata_list}, Year, Quarter))
+                   ) as rn,
+                   COUNT(*) OVER (PARTITION BY {strata_list}) as stratum_rows,
+                   COUNT(*) OVER () as total_rows
+            FROM {table}
+            WHERE {where}
+        )
+        SELECT {column_list}
+        FROM ranked
+        WHERE rn <= GREATEST(1, ROUND({int(budget)} * stratum_rows::numeric / total_rows))
+    """
+
+
+# Scatter samples, also materialised by data_extractor.create_scatter_sample_tables
+SCATTER_SAMPLES = {
+    "scatter_sample_transaction": stratified_sample_sql(
+        "agg_transaction",
+        ["State", "Transaction_type", "Transaction_count", "Transaction_amount"],
+        ["State", "Transaction_type"],
+        where="Transaction_amount > 0",
+    ),
+    "scatter_sample_insurance": stratified_sample_sql(
+        "agg_insurance",
+        ["State", "Insurance_type", "Insurance_count", "Insurance_amount"],
+        ["State", "Insurance_type"],
+        where="Insurance_amount > 0",
+    ),
+}
+
+
+def scatter_sample_source(sample_table):
+    # Either the precomputed table or the same sample computed on the fly
+    if USE_SAMPLE_TABLES:
+        return sample_table
+    return f"({SCATTER_SAMPLES[sample_table]}) as sample"
+
+
+# --------------------------------Density Bins--------------------------------
+def density_sql(zoom):
+    """Centre, points and metric total of every map_insurance_bins cell at a zoom level,
+    summed over states and periods"""
+    size = MAP_BIN_SIZES[zoom]
+    return f"""
+        SELECT (Cell_row + 0.5) * {size} as lat, (Cell_col + 0.5) * {size} as lng,
+               SUM(Points) as points, SUM(Metric) as metric
+        FROM map_insurance_bins
+        WHERE Zoom = {int(zoom)}
+        GROUP BY Cell_row, Cell_col
+        ORDER BY Cell_row, Cell_col
+    """
+
+
+# --------------------------------Growth Rollups--------------------------------
+def growth_sql(table, keys, measure):
+    """Quarterly totals of measure per keys, with their growth. Period numbers the quarters
+    (Year * 4 + Quarter - 1), so the RANGE frames look exactly 1 and 4 quarters back and a
+    missing quarter gives NULL growth instead of comparing against the wrong one."""
+    key_list = ", ".join(keys)
+    prior = f"OVER (PARTITION BY {key_list} ORDER BY period RANGE BETWEEN %d PRECEDING AND %d PRECEDING)"
+    return f"""
+        WITH totals AS (
+            SELECT {key_list}, CAST(Year AS INT) * 4 + Quarter - 1 as period,
+                   CAST(Year AS INT) as year, Quarter as quarter, CAST(SUM({measure}) AS BIGINT) as value
+            FROM {table}
+            GROUP BY {key_list}, CAST(Year AS INT), Quarter
+        ),
+        windowed AS (
+            SELECT *,
+                   SUM(value) {prior % (1, 1)} as prev_quarter,
+                   SUM(value) {prior % (4, 4)} as prev_year,
+                   SUM(value) OVER (PARTITION BY {key_list} ORDER BY period
+                                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) as cumulative,
+                   SUM(value) OVER (PARTITION BY {key_list} ORDER BY period
+                                    RANGE BETWEEN 3 PRECEDING AND CURRENT ROW) as rolling_4q
+            FROM totals
+        )
+        SELECT {key_list}, period as Period, year as Year, quarter as Quarter, value as Value,
+               CAST(value - prev_quarter AS BIGINT) as QoQ_Delta,
+               CAST(100.0 * (value - prev_quarter) / NULLIF(prev_quarter, 0) AS DOUBLE PRECISION) as QoQ_Pct,
+               CAST(value - prev_year AS BIGINT) as YoY_Delta,
+               CAST(100.0 * (value - prev_year) / NULLIF(prev_year, 0) AS DOUBLE PRECISION) as YoY_Pct,
+               CAST(cumulative AS BIGINT) as Cumulative,
+               CAST(rolling_4q AS BIGINT) as Rolling_4Q
+        FROM windowed
+    """
+
+
+# table: (source table, grain keys, measure), materialised with an index on the period and on the keys
+# by data_extractor.create_growth_tables after every load. Only the grains a chart reads are kept.
+GROWTH_ROLLUPS = {
+    "growth_state_insurance": ("agg_insurance", ["State"], "Insurance_count"),
+    "growth_district_users": ("map_user_hover", ["State", "District"], "Registered_Users"),
+    "growth_type_transactions": ("agg_transaction", ["Transaction_type"], "Transaction_count"),
+}
+
+
+def fastest_growing_sql(growth_table, key, n=15):
+    """Largest YoY growth in the latest quarter of a growth table (keys without a year-ago value are skipped)"""
+    return f"""
+        SELECT {key}, Value, YoY_Delta, YoY_Pct
+        FROM {growth_table}
+        WHERE Period = (SELECT MAX(Period) FROM {growth_table}) AND YoY_Pct IS NOT NULL
+        ORDER BY YoY_Pct DESC, {key}
+        LIMIT {int(n)}
+    """
+
+
+# --------------------------------Dashboard Queries--------------------------------
+QUERIES = {
+    # Home
+    # National totals from the country-level tables, a few rows per period instead of every state row
+    "home_metrics": {
+        "sql": """
+            SELECT (SELECT SUM(Transaction_count) FROM agg_transaction_country),
+                   (SELECT SUM(Registered_Users) FROM agg_user_country),
+                   (SELECT SUM(Insurance_count) FROM agg_insurance_country),
+                   (SELECT SUM(Transaction_amount) FROM agg_transaction_country)
+        """,
+        "columns": ['Total_Transactions', 'Total_Users', 'Total_Insurance', 'Total_Amount'],
+        "money_columns": ['Total_Amount'],
+    },
+    "home_years": {
+        "sql": """
+            SELECT DISTINCT CAST(Year AS TEXT) FROM agg_transaction
+            UNION
+            SELECT DISTINCT CAST(Year AS TEXT) FROM agg_user
+            ORDER BY 1
+        """,
+        "columns": ['Year'],
+        "dtypes": {'Year': str},
+    },
+    "home_quarters_transactions": {
+        "sql": """
+            SELECT DISTINCT Quarter FROM agg_transaction
+            WHERE CAST(Year AS TEXT) = %s
+            ORDER BY Quarter
+        """,
+        "columns": ['Quarter'],
+    },
+    "home_quarters_users": {
+        "sql": """
+            SELECT DISTINCT Quarter FROM agg_user
+            WHERE CAST(Year AS TEXT) = %s
+            ORDER BY Quarter
+        """,
+        "columns": ['Quarter'],
+    },
+    "home_map_transactions": {
+        "sql": """
+            SELECT State, SUM(Transaction_count) as total_count, SUM(Transaction_amount) as total_amount
+            FROM agg_transaction
+            WHERE CAST(Year AS TEXT) = %s AND Quarter = %s
+            GROUP BY State
+        """,
+        "columns": ['State', 'Count', 'Amount'],
+        "money_columns": ['Amount'],
+    },
+    "home_map_users": {
+        "sql": """
+            SELECT State, SUM(Registered_Users) as total_count, SUM(App_Opens) as total_amount
+            FROM agg_user
+            WHERE CAST(Year AS TEXT) = %s AND Quarter = %s
+            GROUP BY State
+        """,
+        "columns": ['State', 'Count', 'Amount'],
+    },
+    # India-wide top districts and pincodes of a period, as published in the country-level top files
+    "home_top_transactions": {
+        "sql": """
+            SELECT Level, Entity_name, Count, Amount
+            FROM top_transaction_country
+            WHERE CAST(Year AS TEXT) = %s AND Quarter = %s AND Level IN ('district', 'pincode')
+            ORDER BY Level, Count DESC
+        """,
+        "columns": ['Level', 'Name', 'Count', 'Amount'],
+        "dtypes": {'Name': str},
+        "money_columns": ['Amount'],
+    },
+    "home_top_users": {
+        "sql": """
+            SELECT Level, Entity_name, Registered_Users
+            FROM top_user_country
+            WHERE CAST(Year AS TEXT) = %s AND Quarter = %s AND Level IN ('district', 'pincode')
+            ORDER BY Level, Registered_Users DESC
+        """,
+        "columns": ['Level', 'Name', 'Count'],
+        "dtypes": {'Name': str},
+    },
+
+    # Decoding Transaction Dynamics
+    "transaction_amount_vs_count": {
+        "sql": f"""
+            SELECT Transaction_count, Transaction_amount
+            FROM {scatter_sample_source("scatter_sample_transaction")}
+        """,
+        "columns": ['Count', 'Amount'],
+        "money_columns": ['Amount'],
+    },
+    # Every row instead of the sample, for the "All points" scatter mode
+    "transaction_amount_vs_count_all": {
+        "sql": """
+            SELECT Transaction_count, Transaction_amount
+            FROM agg_transaction
+            WHERE Transaction_amount > 0
+        """,
+        "columns": ['Count', 'Amount'],
+        "money_columns": ['Amount'],
+    },
+    "transaction_amount_box": {
+        "sql": box_stats_sql("""
+            SELECT 'Amount' as series, Transaction_amount::double precision as v
+            FROM agg_transaction
+            WHERE Transaction_amount > 0
+        """),
+        "columns": BOX_STATS_COLUMNS,
+        "money_columns": BOX_MONEY_COLUMNS,
+        "copy": False,
+    },
+    "transaction_type_growth": {
+        "sql": """
+            SELECT Year, Quarter, Transaction_type, YoY_Pct
+            FROM growth_type_transactions
+            WHERE YoY_Pct IS NOT NULL
+            ORDER BY Period, Transaction_type
+        """,
+        "columns": ['Year', 'Quarter', 'Transaction_Type', 'YoY_Pct'],
+    },
+    "top_transaction_districts": {
+        "sql": """
+            SELECT District, SUM(Count) as total_transactions
+            FROM map_transaction_hover
+            GROUP BY District
+            ORDER BY total_transactions DESC
+            LIMIT 15
+        """,
+        "columns": ['District', 'Transactions'],
+    },
+
+    # Device Dominance & User Engagement
+    "device_brand_distribution": {
+        "sql": """
+            SELECT Brand, SUM(User_Count) as total_users
+            FROM agg_user_device
+            GROUP BY Brand
+            ORDER BY total_users DESC
+            LIMIT 10
+        """,
+        "columns": ['Brand', 'Users'],
+    },
+    "top_user_states": {
+        "sql": """
+            SELECT State,
+                   SUM(Registered_Users) as total_users,
+                   SUM(App_Opens) as total_app_opens
+            FROM agg_user
+            GROUP BY State
+            HAVING SUM(Registered_Users) > 0
+            ORDER BY total_users DESC
+            LIMIT 15
+        """,
+        "columns": ['State', 'Users', 'App_Opens'],
+    },
+    "user_state_box": {
+        "sql": box_stats_sql("""
+            SELECT s.series, s.v
+            FROM (
+                SELECT State,
+                       SUM(Registered_Users) as total_users,
+                       SUM(App_Opens) as total_app_opens
+                FROM agg_user
+                GROUP BY State
+                HAVING SUM(Registered_Users) > 0
+            ) t
+            CROSS JOIN LATERAL (
+                VALUES ('Users', t.total_users::double precision),
+                       ('App_Opens', t.total_app_opens::double precision)
+            ) as s(series, v)
+        """),
+        "columns": BOX_STATS_COLUMNS,
+        "copy": False,
+    },
+    "top_user_districts_map": {
+        "sql": """
+            SELECT District, SUM(Registered_Users) as total_users
+            FROM map_user_hover
+            GROUP BY District
+            ORDER BY total_users DESC
+            LIMIT 15
+        """,
+        "columns": ['District', 'Users'],
+    },
+    "fastest_growing_user_districts": {
+        "sql": fastest_growing_sql("growth_district_users", "District, State"),
+        "columns": ['District', 'State', 'Users', 'YoY_Delta', 'YoY_Pct'],
+    },
+
+    # Insurance Penetration & Growth Potential
+    "insurance_amount_vs_count": {
+        "sql": f"""
+            SELECT Insurance_count, Insurance_amount
+            FROM {scatter_sample_source("scatter_sample_insurance")}
+        """,
+        "columns": ['Count', 'Amount'],
+        "money_columns": ['Amount'],
+    },
+    "insurance_amount_vs_count_all": {
+        "sql": """
+            SELECT Insurance_count, Insurance_amount
+            FROM agg_insurance
+            WHERE Insurance_amount > 0
+        """,
+        "columns": ['Count', 'Amount'],
+        "money_columns": ['Amount'],
+    },
+    "top_insurance_districts": {
+        "sql": """
+            SELECT District, SUM(Count) as total_insurance
+            FROM map_insurance_hover
+            GROUP BY District
+            ORDER BY total_insurance DESC
+            LIMIT 15
+        """,
+        "columns": ['District', 'Insurance_Count'],
+    },
+    "fastest_growing_insurance_states": {
+        "sql": fastest_growing_sql("growth_state_insurance", "State"),
+        "columns": ['State', 'Insurance_Count', 'YoY_Delta', 'YoY_Pct'],
+    },
+    # One query per zoom level of the insurance density map, insurance_density_0 is the coarsest
+    **{
+        f"insurance_density_{zoom}": {
+            "sql": density_sql(zoom),
+            "columns": ['Latitude', 'Longitude', 'Points', 'Metric'],
+        }
+        for zoom in range(len(MAP_BIN_SIZES))
+    },
+
+    # User Engagement & Growth Strategy
+    "user_engagement_by_state": {
+        "sql": """
+            SELECT State,
+                   SUM(Registered_Users) as total_users,
+                   SUM(App_Opens) as total_app_opens,
+                   ROUND(AVG(App_Opens::numeric / NULLIF(Registered_Users, 0)), 2) as engagement_ratio
+            FROM agg_user
+            GROUP BY State
+            HAVING SUM(Registered_Users) > 0
+            ORDER BY engagement_ratio DESC
+            LIMIT 15
+        """,
+        "columns": ['State', 'Registered_Users', 'App_Opens', 'Engagement_Ratio'],
+    },
+    "engagement_ratio_histogram": {
+        "sql": histogram_sql("""
+            SELECT AVG(App_Opens::double precision / NULLIF(Registered_Users, 0)) as v
+            FROM agg_user
+            GROUP BY State
+            HAVING SUM(Registered_Users) > 0
+        """, nbins=15),
+        "columns": HISTOGRAM_COLUMNS,
+    },
+    "app_opens_state_box": {
+        "sql": box_stats_sql("""
+            SELECT 'App_Opens' as series, SUM(App_Opens)::double precision as v
+            FROM agg_user
+            GROUP BY State
+            HAVING SUM(Registered_Users) > 0
+        """),
+        "columns": BOX_STATS_COLUMNS,
+        "copy": False,
+    },
+    "top_user_districts": {
+        "sql": """
+            SELECT District, SUM(Registered_Users) as total_users
+            FROM top_user_district
+            GROUP BY District
+            ORDER BY total_users DESC
+            LIMIT 15
+        """,
+        "columns": ['District', 'Users'],
+    },
+    "top_user_pincodes": {
+        "sql": """
+            SELECT Pincode, SUM(Registered_Users) as total_users
+            FROM top_user_pincode
+            GROUP BY Pincode
+            ORDER BY total_users DESC
+            LIMIT 15
+        """,
+        "columns": ['Pincode', 'Users'],
+        "dtypes": {'Pincode': str},
+    },
+
+    # Transaction Analysis Across States & Districts
+    "transaction_amount_state_box": {
+        "sql": box_stats_sql("""
+            SELECT 'Transaction_Amount' as series, SUM(Transaction_amount)::double precision as v
+            FROM agg_transaction
+            GROUP BY State
+        """),
+        "columns": BOX_STATS_COLUMNS,
+        "money_columns": BOX_MONEY_COLUMNS,
+        "copy": False,
+    },
+    "transaction_amount_state_histogram": {
+        "sql": histogram_sql("""
+            SELECT SUM(Transaction_amount) as v
+            FROM agg_transaction
+            GROUP BY State
+        """, nbins=20),
+        "columns": HISTOGRAM_COLUMNS,
+        "money_columns": ['Bin_Start', 'Bin_End'],
+    },
+    "transaction_amount_state_histogram_log": {
+        "sql": histogram_sql("""
+            SELECT SUM(Transaction_amount) as v
+            FROM agg_transaction
+            GROUP BY State
+        """, nbins=20, log_scale=True),
+        "columns": HISTOGRAM_COLUMNS,
+        "money_columns": ['Bin_Start', 'Bin_End'],
+    },
+    "top_transaction_pincodes": {
+        "sql": """
+            SELECT Pincode, SUM(Pincode_Count) as total_transactions
+            FROM top_transaction_pincode
+            GROUP BY Pincode
+            ORDER BY total_transactions DESC
+            LIMIT 10
+        """,
+        "columns": ['Pincode', 'Transactions'],
+        "dtypes": {'Pincode': str},
+    },
+}
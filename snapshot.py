@@ -0,0 +1,510 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+import pandas as pd
+
+from queries import (
+    BOX_OUTLIER_CAP,
+    BOX_STATS_COLUMNS,
+    DATA_VERSION_SQL,
+    HISTOGRAM_COLUMNS,
+    MAP_BIN_SIZES,
+    MONEY_AS_PAISE,
+    QUERIES,
+    SCATTER_POINT_BUDGET,
+    run_query,
+)
+
+# Seconds between checks of the data_version stamp, the only database round trip once loaded
+SNAPSHOT_CHECK_SECONDS = int(os.getenv("SNAPSHOT_CHECK_SECONDS", "60"))
+
+_tables = None
+_version = None
+_checked_at = 0.0
+_results = {}
+_lock = threading.Lock()
+
+
+# --------------------------------Snapshot Tables--------------------------------
+# Columns held in memory per table. Text columns become categoricals, Year/Quarter small ints and
+# money columns exact integer paise, so SUMs match PostgreSQL's NUMERIC arithmetic.
+SNAPSHOT_TABLES = {
+    "agg_transaction": {
+        "columns": ["State", "Year", "Quarter", "Transaction_type", "Transaction_count", "Transaction_amount"],
+        "money": ["Transaction_amount"],
+    },
+    "agg_user": {
+        "columns": ["State", "Year", "Quarter", "Registered_Users", "App_Opens"],
+    },
+    "agg_user_device": {
+        "columns": ["Brand", "User_Count"],
+    },
+    "agg_insurance": {
+        "columns": ["State", "Year", "Quarter", "Insurance_type", "Insurance_count", "Insurance_amount"],
+        "money": ["Insurance_amount"],
+    },
+    "map_transaction_hover": {
+        "columns": ["District", "Count"],
+    },
+    "map_user_hover": {
+        "columns": ["District", "Registered_Users"],
+    },
+    "map_insurance_hover": {
+        "columns": ["District", "Count"],
+    },
+    "map_insurance_bins": {
+        "columns": ["Zoom", "Cell_row", "Cell_col", "Points", "Metric"],
+    },
+    "agg_transaction_country": {
+        "columns": ["Transaction_count", "Transaction_amount"],
+        "money": ["Transaction_amount"],
+    },
+    "agg_user_country": {
+        "columns": ["Registered_Users"],
+    },
+    "agg_insurance_country": {
+        "columns": ["Insurance_count"],
+    },
+    "top_transaction_country": {
+        "columns": ["Year", "Quarter", "Level", "Entity_name", "Count", "Amount"],
+        "money": ["Amount"],
+    },
+    "top_user_country": {
+        "columns": ["Year", "Quarter", "Level", "Entity_name", "Registered_Users"],
+    },
+    "growth_state_insurance": {
+        "columns": ["State", "Period", "Value", "YoY_Delta", "YoY_Pct"],
+    },
+    "growth_district_users": {
+        "columns": ["State", "District", "Period", "Value", "YoY_Delta", "YoY_Pct"],
+    },
+    "growth_type_transactions": {
+        "columns": ["Transaction_type", "Year", "Quarter", "Period", "YoY_Pct"],
+    },
+    "top_user_district": {
+        "columns": ["District", "Registered_Users"],
+    },
+    "top_user_pincode": {
+        "columns": ["Pincode", "Registered_Users"],
+    },
+    "top_transaction_pincode": {
+        "columns": ["Pincode", "Pincode_Count"],
+    },
+}
+
+TEXT_COLUMNS = {"State", "Transaction_type", "Insurance_type", "Brand", "District", "Pincode", "Level", "Entity_name"}
+
+# Parameterised by the Home filters and answered on demand, every other query is computed at load
+FILTER_QUERIES = {"home_quarters_transactions", "home_quarters_users", "home_map_transactions", "home_map_users",
+                  "home_top_transactions", "home_top_users"}
+
+
+def load_table(table, spec):
+    columns = spec["columns"]
+    df = run_query(
+        f"SELECT {', '.join(columns)} FROM {table}",
+        columns,
+        dtypes={column: str for column in columns if column in TEXT_COLUMNS},
+    )
+    for column in columns:
+        if column in TEXT_COLUMNS:
+            df[column] = df[column].astype("category")
+        elif column == "Year":
+            df[column] = df[column].astype("int16")
+        elif column == "Quarter":
+            df[column] = df[column].astype("int8")
+        elif column in spec.get("money", []):
+            if not MONEY_AS_PAISE:
+                df[column] = (df[column] * 100).round()
+            df[column] = df[column].astype("int64")
+    return df
+
+
+def current_version():
+    try:
+        return run_query(DATA_VERSION_SQL, ["Version"], dtypes={"Version": str})["Version"].max()
+    except Exception:
+        # Databases loaded before the stamp existed, only the first load happens
+        return None
+
+
+def get_tables():
+    """Load the snapshot on first use and reload it when the data_version stamp changes"""
+    global _tables, _version, _checked_at
+    with _lock:
+        now = time.monotonic()
+        if _tables is not None and now - _checked_at < SNAPSHOT_CHECK_SECONDS:
+            return _tables, _version
+        version = current_version()
+        _checked_at = now
+        if _tables is None or version != _version:
+            _tables = {table: load_table(table, spec) for table, spec in SNAPSHOT_TABLES.items()}
+            _version = version
+            _results.clear()
+            for name, answer in SNAPSHOT_QUERIES.items():
+                if name not in FILTER_QUERIES:
+                    _results[(version, name, None)] = answer(_tables)
+        return _tables, _version
+
+
+def answer_query(name, params=None):
+    """In-process answer to a QUERIES entry, same columns, dtypes and values as the SQL path"""
+    tables, version = get_tables()
+    key = (version, name, tuple(params) if params is not None else None)
+    if key not in _results:
+        _results[key] = SNAPSHOT_QUERIES[name](tables, *(params or ()))
+    # Callers convert money columns in place
+    return _results[key].copy()
+
+
+# --------------------------------Snapshot Helpers--------------------------------
+def money(paise):
+    """Paise back to the unit the SQL path returns: rupees, or paise when MONEY_AS_PAISE"""
+    return paise if MONEY_AS_PAISE else paise / 100
+
+
+def money_float(paise):
+    # Matches a ::double precision cast of the stored amount
+    return paise.astype("float64") if MONEY_AS_PAISE else paise / 100
+
+
+def result(df, query_name):
+    """Registry column names, categoricals back to strings and ints widened like the SQL path"""
+    df = df.reset_index(drop=True)
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(object)
+        elif pd.api.types.is_integer_dtype(df[column].dtype):
+            df[column] = df[column].astype("int64")
+    df.columns = QUERIES[query_name]["columns"]
+    return df
+
+
+def group_sum(df, keys, measures):
+    return df.groupby(keys, observed=True, sort=False)[measures].sum().reset_index()
+
+
+def top(df, column, n):
+    return df.sort_values(column, ascending=False, kind="stable").head(n)
+
+
+def total(series):
+    # SUM over no rows is NULL
+    return series.sum() if len(series) else np.nan
+
+
+def percentile_cont(sorted_values, fraction):
+    # PostgreSQL's float8 percentile_cont interpolation
+    position = fraction * (len(sorted_values) - 1)
+    first, second = math.floor(position), math.ceil(position)
+    low = sorted_values[first]
+    if first == second:
+        return low
+    return low + (sorted_values[second] - low) * (position - first)
+
+
+def box_stats(values, outlier_cap=BOX_OUTLIER_CAP):
+    """queries.box_stats_sql on a (series, v) DataFrame"""
+    rows = []
+    for series, v in values.groupby("series", sort=True)["v"]:
+        v = np.sort(v.to_numpy(dtype="float64"))
+        q1, median, q3 = (percentile_cont(v, fraction) for fraction in (0.25, 0.5, 0.75))
+        lo, hi = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        outliers = v[(v < lo) | (v > hi)]
+        outliers = outliers[np.argsort(-np.abs(outliers - median), kind="stable")][:outlier_cap]
+        rows.append((
+            series, q1, median, q3,
+            v[v >= lo].min(), v[v <= hi].max(),
+            v.sum() / len(v), len(v),
+            outliers.tolist(),
+        ))
+    return pd.DataFrame(rows, columns=BOX_STATS_COLUMNS)
+
+
+def histogram(values, nbins, log_scale=False):
+    """queries.histogram_sql on a Series of values"""
+    x = values.dropna().astype("float64")
+    if log_scale:
+        x = x[x > 0].map(math.log)
+    x = x.to_numpy()
+    if len(x) == 0:
+        return pd.DataFrame(columns=HISTOGRAM_COLUMNS)
+
+    lo, hi = x.min(), x.max()
+    if hi > lo:
+        # Same bucket arithmetic as histogram_sql, the top edge folds into the last bucket
+        bucket = np.minimum((nbins * ((x - lo) / (hi - lo))).astype("int64"), nbins - 1) + 1
+    else:
+        bucket = np.ones(len(x), dtype="int64")
+
+    bins = np.arange(1, nbins + 1)
+    starts = lo + ((bins - 1) * (hi - lo)) / nbins
+    ends = lo + (bins * (hi - lo)) / nbins
+    if log_scale:
+        starts, ends = [math.exp(s) for s in starts], [math.exp(e) for e in ends]
+    return pd.DataFrame({
+        "Bin": bins,
+        "Bin_Start": starts,
+        "Bin_End": ends,
+        "Count": np.bincount(bucket, minlength=nbins + 1)[1:],
+        "Log_Scale": bool(log_scale),
+    })
+
+
+def stratified_sample(df, strata, budget=SCATTER_POINT_BUDGET):
+    """queries.stratified_sample_sql: same md5 ranking and ROUND allocation, so the same rows"""
+    if len(df) == 0:
+        return df
+    key = df[strata[0]].astype(str)
+    for column in strata[1:] + ["Year", "Quarter"]:
+        key = key + "|" + df[column].astype(str)
+    ranked = df.assign(_hash=key.map(lambda k: hashlib.md5(k.encode()).hexdigest()))
+    ranked = ranked.sort_values(strata + ["_hash"], kind="stable")
+    by_stratum = ranked.groupby(strata, observed=True, sort=False)
+    rank = by_stratum.cumcount() + 1
+    stratum_rows = by_stratum["_hash"].transform("size")
+    # ROUND(budget * stratum_rows / total_rows) in integers, halves round up like NUMERIC ROUND
+    allocation = np.maximum(1, (2 * budget * stratum_rows + len(df)) // (2 * len(df)))
+    return ranked[rank <= allocation]
+
+
+def state_users(tables):
+    # Per-state user totals shared by the engagement queries (GROUP BY State HAVING users > 0)
+    users = group_sum(tables["agg_user"], ["State"], ["Registered_Users", "App_Opens"])
+    return users[users["Registered_Users"] > 0]
+
+
+# --------------------------------Snapshot Queries--------------------------------
+# One function per QUERIES entry, taking the snapshot tables and the query parameters
+def home_metrics(tables):
+    transactions, users = tables["agg_transaction_country"], tables["agg_user_country"]
+    insurance = tables["agg_insurance_country"]
+    return result(pd.DataFrame([[
+        total(transactions["Transaction_count"]),
+        total(users["Registered_Users"]),
+        total(insurance["Insurance_count"]),
+        money(total(transactions["Transaction_amount"])),
+    ]]), "home_metrics")
+
+
+def home_years(tables):
+    years = set(tables["agg_transaction"]["Year"].unique()) | set(tables["agg_user"]["Year"].unique())
+    return result(pd.DataFrame({"Year": [str(year) for year in sorted(years)]}), "home_years")
+
+
+def home_quarters(table, query_name):
+    def answer(tables, year):
+        df = tables[table]
+        quarters = np.sort(df.loc[df["Year"] == int(year), "Quarter"].unique())
+        return result(pd.DataFrame({"Quarter": quarters}), query_name)
+    return answer
+
+
+def home_map_transactions(tables, year, quarter):
+    df = tables["agg_transaction"]
+    df = df[(df["Year"] == int(year)) & (df["Quarter"] == int(quarter))]
+    df = group_sum(df, ["State"], ["Transaction_count", "Transaction_amount"])
+    df["Transaction_amount"] = money(df["Transaction_amount"])
+    return result(df, "home_map_transactions")
+
+
+def home_map_users(tables, year, quarter):
+    df = tables["agg_user"]
+    df = df[(df["Year"] == int(year)) & (df["Quarter"] == int(quarter))]
+    return result(group_sum(df, ["State"], ["Registered_Users", "App_Opens"]), "home_map_users")
+
+
+def home_top(table, measures, query_name):
+    # One period's district and pincode rows, ORDER BY Level, the first measure DESC
+    def answer(tables, year, quarter):
+        df = tables[table]
+        df = df[(df["Year"] == int(year)) & (df["Quarter"] == int(quarter)) & df["Level"].isin(["district", "pincode"])]
+        df = df.sort_values(["Level", measures[0]], ascending=[True, False], kind="stable")
+        df = df[["Level", "Entity_name"] + measures].copy()
+        if "Amount" in measures:
+            df["Amount"] = money(df["Amount"])
+        return result(df, query_name)
+    return answer
+
+
+def fastest_growing(table, keys, query_name, n=15):
+    # queries.fastest_growing_sql: the latest Period, ORDER BY YoY_Pct DESC, keys LIMIT n
+    def answer(tables):
+        df = tables[table]
+        df = df[(df["Period"] == df["Period"].max()) & df["YoY_Pct"].notna()]
+        df = df.sort_values(["YoY_Pct"] + keys, ascending=[False] + [True] * len(keys), kind="stable").head(n)
+        return result(df[keys + ["Value", "YoY_Delta", "YoY_Pct"]].astype({"YoY_Delta": "int64"}), query_name)
+    return answer
+
+
+def transaction_type_growth(tables):
+    df = tables["growth_type_transactions"]
+    df = df[df["YoY_Pct"].notna()].sort_values(["Period", "Transaction_type"], kind="stable")
+    return result(df[["Year", "Quarter", "Transaction_type", "YoY_Pct"]], "transaction_type_growth")
+
+
+def distribution(table, key, measure, query_name, n=None):
+    # SUM(measure) GROUP BY key ORDER BY the sum DESC [LIMIT n]
+    def answer(tables):
+        df = group_sum(tables[table], [key], [measure])
+        return result(top(df, measure, n if n is not None else len(df)), query_name)
+    return answer
+
+
+def amount_vs_count(table, type_column, count_column, amount_column, query_name):
+    def answer(tables):
+        df = tables[table]
+        sample = stratified_sample(df[df[amount_column] > 0], ["State", type_column])
+        return result(pd.DataFrame({
+            "Count": sample[count_column],
+            "Amount": money(sample[amount_column]),
+        }), query_name)
+    return answer
+
+
+def amount_vs_count_all(table, count_column, amount_column, query_name):
+    def answer(tables):
+        df = tables[table]
+        df = df[df[amount_column] > 0]
+        return result(pd.DataFrame({"Count": df[count_column], "Amount": money(df[amount_column])}), query_name)
+    return answer
+
+
+def transaction_amount_box(tables):
+    df = tables["agg_transaction"]
+    amounts = df.loc[df["Transaction_amount"] > 0, "Transaction_amount"]
+    return box_stats(pd.DataFrame({"series": "Amount", "v": money_float(amounts)}))
+
+
+def top_user_states(tables):
+    return result(top(state_users(tables), "Registered_Users", 15), "top_user_states")
+
+
+def user_state_box(tables):
+    users = state_users(tables)
+    return box_stats(pd.concat([
+        pd.DataFrame({"series": "Users", "v": users["Registered_Users"]}),
+        pd.DataFrame({"series": "App_Opens", "v": users["App_Opens"]}),
+    ]))
+
+
+def state_engagement_ratios(tables):
+    # AVG(App_Opens / NULLIF(Registered_Users, 0)) per state with users, rows without users skipped
+    df = tables["agg_user"]
+    ratios = df["App_Opens"] / df["Registered_Users"].where(df["Registered_Users"] != 0)
+    df = df.assign(ratio=ratios).groupby("State", observed=True, sort=False).agg(
+        users=("Registered_Users", "sum"), ratio=("ratio", "mean"))
+    return df.loc[df["users"] > 0, "ratio"]
+
+
+def user_engagement_by_state(tables):
+    users = state_users(tables).set_index("State")
+    ratios = state_engagement_ratios(tables)
+    users["Engagement_Ratio"] = [
+        float(Decimal(repr(float(ratio))).quantize(Decimal("0.01"), ROUND_HALF_UP)) if not math.isnan(ratio) else np.nan
+        for ratio in ratios.reindex(users.index)
+    ]
+    return result(top(users.reset_index(), "Engagement_Ratio", 15), "user_engagement_by_state")
+
+
+def engagement_ratio_histogram(tables):
+    return histogram(state_engagement_ratios(tables), nbins=15)
+
+
+def app_opens_state_box(tables):
+    return box_stats(pd.DataFrame({"series": "App_Opens", "v": state_users(tables)["App_Opens"]}))
+
+
+def state_transaction_amounts(tables):
+    return group_sum(tables["agg_transaction"], ["State"], ["Transaction_amount"])["Transaction_amount"]
+
+
+def transaction_amount_state_box(tables):
+    amounts = money_float(state_transaction_amounts(tables))
+    return box_stats(pd.DataFrame({"series": "Transaction_Amount", "v": amounts}))
+
+
+def transaction_amount_state_histogram(log_scale):
+    def answer(tables):
+        return histogram(money_float(state_transaction_amounts(tables)), nbins=20, log_scale=log_scale)
+    return answer
+
+
+def insurance_density(zoom):
+    def answer(tables):
+        df = tables["map_insurance_bins"]
+        df = group_sum(df[df["Zoom"] == zoom], ["Cell_row", "Cell_col"], ["Points", "Metric"])
+        df = df.sort_values(["Cell_row", "Cell_col"], kind="stable")
+        size = MAP_BIN_SIZES[zoom]
+        return result(pd.DataFrame({
+            "Latitude": (df["Cell_row"] + 0.5) * size,
+            "Longitude": (df["Cell_col"] + 0.5) * size,
+            "Points": df["Points"],
+            "Metric": df["Metric"],
+        }), f"insurance_density_{zoom}")
+    return answer
+
+
+SNAPSHOT_QUERIES = {
+    # Home
+    "home_metrics": home_metrics,
+    "home_years": home_years,
+    "home_quarters_transactions": home_quarters("agg_transaction", "home_quarters_transactions"),
+    "home_quarters_users": home_quarters("agg_user", "home_quarters_users"),
+    "home_map_transactions": home_map_transactions,
+    "home_map_users": home_map_users,
+    "home_top_transactions": home_top("top_transaction_country", ["Count", "Amount"], "home_top_transactions"),
+    "home_top_users": home_top("top_user_country", ["Registered_Users"], "home_top_users"),
+
+    # Decoding Transaction Dynamics
+    "transaction_amount_vs_count": amount_vs_count(
+        "agg_transaction", "Transaction_type", "Transaction_count", "Transaction_amount", "transaction_amount_vs_count"),
+    "transaction_amount_vs_count_all": amount_vs_count_all(
+        "agg_transaction", "Transaction_count", "Transaction_amount", "transaction_amount_vs_count_all"),
+    "transaction_amount_box": transaction_amount_box,
+    "transaction_type_growth": transaction_type_growth,
+    "top_transaction_districts": distribution(
+        "map_transaction_hover", "District", "Count", "top_transaction_districts", 15),
+
+    # Device Dominance & User Engagement
+    "device_brand_distribution": distribution(
+        "agg_user_device", "Brand", "User_Count", "device_brand_distribution", 10),
+    "top_user_states": top_user_states,
+    "user_state_box": user_state_box,
+    "top_user_districts_map": distribution(
+        "map_user_hover", "District", "Registered_Users", "top_user_districts_map", 15),
+    "fastest_growing_user_districts": fastest_growing(
+        "growth_district_users", ["District", "State"], "fastest_growing_user_districts"),
+
+    # Insurance Penetration & Growth Potential
+    "insurance_amount_vs_count": amount_vs_count(
+        "agg_insurance", "Insurance_type", "Insurance_count", "Insurance_amount", "insurance_amount_vs_count"),
+    "insurance_amount_vs_count_all": amount_vs_count_all(
+        "agg_insurance", "Insurance_count", "Insurance_amount", "insurance_amount_vs_count_all"),
+    "top_insurance_districts": distribution(
+        "map_insurance_hover", "District", "Count", "top_insurance_districts", 15),
+    "fastest_growing_insurance_states": fastest_growing(
+        "growth_state_insurance", ["State"], "fastest_growing_insurance_states"),
+    **{f"insurance_density_{zoom}": insurance_density(zoom) for zoom in range(len(MAP_BIN_SIZES))},
+
+    # User Engagement & Growth Strategy
+    "user_engagement_by_state": user_engagement_by_state,
+    "engagement_ratio_histogram": engagement_ratio_histogram,
+    "app_opens_state_box": app_opens_state_box,
+    "top_user_districts": distribution(
+        "top_user_district", "District", "Registered_Users", "top_user_districts", 15),
+    "top_user_pincodes": distribution(
+        "top_user_pincode", "Pincode", "Registered_Users", "top_user_pincodes", 15),
+
+    # Transaction Analysis Across States & Districts
+    "transaction_amount_state_box": transaction_amount_state_box,
+    "transaction_amount_state_histogram": transaction_amount_state_histogram(log_scale=False),
+    "transaction_amount_state_histogram_log": transaction_amount_state_histogram(log_scale=True),
+    "top_transaction_pincodes": distribution(
+        "top_transaction_pincode", "Pincode", "Pincode_Count", "top_transaction_pincodes", 10),
+}